@@ -0,0 +1,89 @@
+"""
+Checkout latency vs. basket size, measured against the local stand-in.
+
+    python -m bench.bench_order_create --latency 0.002 --sizes 1 10 40
+
+For every basket size this prints the round trips and wall time of one
+OrderService.create_order for:
+  per-line  - the previous implementation (one read/insert per line)
+  batched   - bulk product select + multi-row order_items insert
+  atomic    - the place_order RPC (`order create --atomic`)
+"""
+import argparse
+import time
+
+from bench.standin import StandInClient
+from src.dao.order_dao import OrderDAO
+from src.dao.product_dao import ProductDAO
+from src.services.order_service import OrderService
+from src.services.product_service import ProductService
+
+
+def build_service(client: StandInClient) -> OrderService:
+    product_service = ProductService(ProductDAO(client))
+    return OrderService(OrderDAO(client, product_service), product_service)
+
+
+def seed(client: StandInClient, n_products: int) -> None:
+    client.table("customers").insert(
+        {"name": "Bench", "email": "bench@example.com", "phone": "0", "city": "Bench"}
+    ).execute()
+    client.table("products").insert([
+        {"name": f"Product {i}", "sku": f"SKU-{i}", "price": 10.0 + i, "stock": 10**9}
+        for i in range(1, n_products + 1)
+    ]).execute()
+
+
+def per_line_create_order(service: OrderService, cust_id: int, items: list[dict]):
+    """The pre-batching checkout: every line costs its own reads and inserts."""
+    sb = service.dao._sb
+    products = ProductService(ProductDAO(sb), cache_size=0)
+    total_amount = 0
+    for item in items:
+        product = products.get_product_by_id(item["prod_id"])
+        total_amount += product["price"] * item["quantity"]
+    for item in items:
+        product = products.get_product_by_id(item["prod_id"])
+        products.update_product(item["prod_id"], {"stock": product["stock"] - item["quantity"]})
+    order_id = sb.table("orders").insert({"cust_id": cust_id, "status": "PLACED", "total_amount": total_amount}).execute().data[0]["order_id"]
+    for item in items:
+        product = products.get_product_by_id(item["prod_id"])
+        sb.table("order_items").insert({"order_id": order_id, "prod_id": item["prod_id"], "quantity": item["quantity"], "price": product["price"]}).execute()
+    return service.get_order_details(order_id)
+
+
+def measure(client: StandInClient, fn, repeat: int):
+    client.reset_counters()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    return client.requests / repeat, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="create_order benchmark")
+    parser.add_argument("--latency", type=float, default=0.002, help="simulated round trip in seconds")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10, 20, 40])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    client = StandInClient(latency=args.latency)
+    seed(client, max(args.sizes))
+    service = build_service(client)
+
+    print(f"{'lines':>5} {'mode':>9} {'round trips':>12} {'ms/order':>10}")
+    for size in args.sizes:
+        items = [{"prod_id": pid, "quantity": 1} for pid in range(1, size + 1)]
+        modes = {
+            "per-line": lambda: per_line_create_order(service, 1, items),
+            "batched": lambda: service.create_order(1, items),
+            "atomic": lambda: service.create_order(1, items, atomic=True),
+        }
+        for mode, fn in modes.items():
+            trips, elapsed = measure(client, fn, args.repeat)
+            print(f"{size:>5} {mode:>9} {trips:>12.0f} {elapsed * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
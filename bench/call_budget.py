@@ -0,0 +1,116 @@
+"""
+Round-trip budget check for every service mutation, against the local stand-in.
+
+    python -m bench.call_budget
+
+Each operation runs once on a fresh fixture with the product cache off and
+the number of backend requests it made is compared with BUDGETS. Exits
+non-zero if any operation goes over budget, so it can gate CI.
+"""
+import sys
+from datetime import timedelta
+
+from bench.standin import StandInClient
+from src.dao.customer_dao import CustomerDAO
+from src.dao.order_dao import OrderDAO
+from src.dao.payment_dao import PaymentDAO
+from src.dao.product_dao import ProductDAO
+from src.services.customer_service import CustomerService
+from src.services.order_service import OrderService
+from src.services.payment_service import PaymentService
+from src.services.product_service import ProductService
+
+# operation -> maximum backend requests
+BUDGETS = {
+    "product.add": 2,
+    "product.update": 1,
+    "product.restock": 1,
+    "product.delete": 1,
+    "customer.add": 2,
+    "customer.update": 1,
+    "customer.delete": 2,
+    "order.create": 5,
+    "order.create_atomic": 2,
+    "order.cancel": 3,
+    "order.complete": 1,
+    "order.cancel_batch": 3,
+    "order.expire": 4,
+    "payment.create": 1,
+    "payment.process": 3,
+    "payment.process_batch": 4,
+    "payment.refund": 2,
+}
+
+
+class Fixture:
+    """
+    Fresh stand-in database with two customers, three products and one
+    order. The second customer and third product have no orders, so they
+    can be deleted (foreign keys are enforced).
+    """
+
+    def __init__(self):
+        self.client = StandInClient()
+        self.products = ProductService(ProductDAO(self.client), cache_size=0)
+        self.customers = CustomerService(CustomerDAO(self.client))
+        self.orders = OrderService(OrderDAO(self.client, self.products), self.products)
+        self.payments = PaymentService(PaymentDAO(self.client), self.orders)
+
+        self.customers.add_customer("Budget", "budget@example.com", "0", "Pune")
+        self.customers.add_customer("Spare", "spare@example.com", "0", "Pune")
+        self.products.add_product("Pen", "PEN-1", 10.0, 100)
+        self.products.add_product("Ink", "INK-1", 5.0, 100)
+        self.products.add_product("Tape", "TAPE-1", 2.0, 100)
+        self.order = self.orders.create_order(1, [{"prod_id": 1, "quantity": 1}, {"prod_id": 2, "quantity": 2}])
+        self.payments.create_payment(self.order["order_id"], self.order["total_amount"])
+        self.client.reset_counters()
+
+
+def _paid(f: Fixture):
+    f.payments.process_payment(f.order["order_id"], "CARD")
+    f.client.reset_counters()
+    return f
+
+
+OPERATIONS = {
+    "product.add": lambda f: f.products.add_product("Pad", "PAD-1", 3.0, 10),
+    "product.update": lambda f: f.products.update_product(1, {"price": 11.0}),
+    "product.restock": lambda f: f.products.restock_product(1, 5),
+    "product.delete": lambda f: f.products.delete_product(3),
+    "customer.add": lambda f: f.customers.add_customer("New", "new@example.com", "1", "Pune"),
+    "customer.update": lambda f: f.customers.update_customer(1, city="Mumbai"),
+    "customer.delete": lambda f: f.customers.delete_customer(2, f.orders.has_orders),
+    "order.create": lambda f: f.orders.create_order(1, [{"prod_id": 1, "quantity": 1}, {"prod_id": 2, "quantity": 1}]),
+    "order.create_atomic": lambda f: f.orders.create_order(1, [{"prod_id": 1, "quantity": 1}], atomic=True),
+    "order.cancel": lambda f: f.orders.cancel_order(f.order["order_id"]),
+    "order.complete": lambda f: f.orders.complete_order(f.order["order_id"]),
+    "order.cancel_batch": lambda f: f.orders.cancel_orders([f.order["order_id"]]),
+    "order.expire": lambda f: f.orders.expire_orders(timedelta(microseconds=1)),
+    "payment.create": lambda f: f.payments.create_payment(f.order["order_id"], 1.0),
+    "payment.process": lambda f: f.payments.process_payment(f.order["order_id"], "CARD"),
+    "payment.process_batch": lambda f: f.payments.process_payments([{"order_id": f.order["order_id"], "method": "CARD"}]),
+    "payment.refund": lambda f: _paid(f).payments.refund_payment(f.order["order_id"]),
+}
+
+
+def measure() -> dict:
+    counts = {}
+    for name, operation in OPERATIONS.items():
+        fixture = Fixture()
+        operation(fixture)
+        counts[name] = fixture.client.requests
+    return counts
+
+
+def main() -> int:
+    failures = 0
+    print(f"{'operation':<22} {'requests':>8} {'budget':>7}")
+    for name, count in measure().items():
+        over = count > BUDGETS[name]
+        failures += over
+        print(f"{name:<22} {count:>8} {BUDGETS[name]:>7}{'  OVER BUDGET' if over else ''}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
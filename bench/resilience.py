@@ -0,0 +1,201 @@
+"""
+Call-layer check (src/db/resilience.py) against the fault-injecting stand-in.
+
+    python -m bench.resilience
+
+Each scenario builds a fresh FaultInjectingClient behind a ResilientClient,
+injects failures and checks what the DAOs and services see: coalesced
+reads, retried reads, unretried writes, orders whose item insert lost its
+response, circuits opening and closing (also after an interrupted probe),
+and deadlines. Exits non-zero if
+any scenario fails, so it can gate CI.
+"""
+import sys
+import threading
+import time
+from typing import Callable, Dict
+
+from bench.standin import FaultInjectingClient
+from src.dao.customer_dao import CustomerDAO
+from src.dao.order_dao import OrderDAO
+from src.dao.product_dao import ProductDAO
+from src.dao.report_dao import ReportDAO
+from src.db.resilience import (
+    BackendUnavailable, CallExecutor, CircuitOpenError, DeadlineExceeded, ResilientClient, deadline,
+)
+from src.services.order_service import OrderError, OrderService
+from src.services.product_service import ProductService
+
+
+class Fixture:
+    """One customer and two products behind a ResilientClient."""
+
+    def __init__(self, latency: float = 0.0, **executor):
+        self.backend = FaultInjectingClient(latency=latency)
+        self.executor = CallExecutor(**{"retries": 2, "backoff": 0.001, "breaker_cooldown": 0.05, **executor})
+        self.client = ResilientClient(self.backend, self.executor)
+        self.products = ProductService(ProductDAO(self.client), cache_size=0)
+        self.orders = OrderService(OrderDAO(self.client, self.products), self.products)
+        CustomerDAO(self.client).create_customer("Fault", "fault@example.com", "0", "Pune")
+        self.products.add_product("Pen", "PEN-1", 10.0, 100)
+        self.products.add_product("Ink", "INK-1", 5.0, 100)
+        self.backend.reset_counters()
+
+
+def single_flight(f: Fixture) -> str:
+    threads, barrier = 20, threading.Barrier(20)
+    dao = ProductDAO(f.client)
+    results = []
+
+    def read():
+        barrier.wait()
+        results.append(dao.get_product_by_id(1))
+
+    workers = [threading.Thread(target=read) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert all(r and r["prod_id"] == 1 for r in results) and len(results) == threads
+    assert f.backend.requests <= 3, f"{f.backend.requests} requests for {threads} identical reads"
+    return f"{threads} concurrent reads -> {f.backend.requests} request(s)"
+
+
+def read_after_write(f: Fixture) -> str:
+    dao = ProductDAO(f.client)
+    dao.get_product_by_id(1)
+    dao.update_product(1, {"price": 12.0})
+    assert dao.get_product_by_id(1)["price"] == 12.0, "read issued after a write saw the old row"
+    return "write then read sees the write"
+
+
+def read_retry(f: Fixture) -> str:
+    f.backend.fail("products", times=2)
+    row = ProductDAO(f.client).get_product_by_id(1)
+    assert row and row["prod_id"] == 1
+    assert f.backend.requests == 3 and f.executor.counters["retries"] == 2
+    return "2 injected 503s -> read succeeded on attempt 3"
+
+
+def write_not_retried(f: Fixture) -> str:
+    f.backend.fail("orders", times=1)
+    try:
+        f.orders.create_order(1, [{"prod_id": 1, "quantity": 2}])
+    except OrderError as e:
+        assert isinstance(e.__cause__, BackendUnavailable)
+    else:
+        raise AssertionError("create_order succeeded through an injected failure")
+    assert f.backend.calls[("orders", "insert")] == 1, "order insert was retried"
+    assert f.products.get_product_by_id(1)["stock"] == 100, "stock not released"
+    return "failed order insert -> one attempt, OrderError, stock released"
+
+
+def lost_items_response(f: Fixture) -> str:
+    f.backend.fail("order_items", times=1, after=True)
+    try:
+        f.orders.create_order(1, [{"prod_id": 1, "quantity": 2}])
+    except OrderError:
+        pass
+    else:
+        raise AssertionError("create_order succeeded through an injected failure")
+    order = OrderDAO(f.client).get_order_header(1)
+    assert order["status"] == "CANCELLED", f"order left {order['status']}"
+    assert f.products.get_product_by_id(1)["stock"] == 100, "stock not released"
+    assert f.orders.cancel_orders([1])["skipped"] == [1]
+    assert f.products.get_product_by_id(1)["stock"] == 100, "stock released twice"
+    return "applied item insert, lost response -> order cancelled, stock released once"
+
+
+def breaker(f: Fixture) -> str:
+    f.backend.fail("customers")
+    dao = CustomerDAO(f.client)
+    for _ in range(10):
+        try:
+            dao.get_customer_by_id(1)
+        except BackendUnavailable:
+            pass
+    assert f.executor.breaker("customers").state == "open"
+    sent = f.backend.requests
+    try:
+        dao.get_customer_by_id(1)
+    except CircuitOpenError:
+        pass
+    assert f.backend.requests == sent, "open circuit still sent a request"
+    assert ProductDAO(f.client).get_product_by_id(1), "breaker is not per table"
+    f.backend.heal()
+    time.sleep(f.executor.breaker_cooldown)
+    assert dao.get_customer_by_id(1)
+    assert f.executor.breaker("customers").state == "closed"
+    return f"circuit opened after {sent} requests, failed fast, closed after cooldown"
+
+
+def interrupted_probe(f: Fixture) -> str:
+    f.backend.fail("customers")
+    dao = CustomerDAO(f.client)
+    for _ in range(f.executor.breaker_threshold):
+        try:
+            dao.get_customer_by_id(1)
+        except BackendUnavailable:
+            pass
+    time.sleep(f.executor.breaker_cooldown)
+
+    def interrupted():
+        raise KeyboardInterrupt
+    try:
+        f.executor.execute("customers", "probe", True, interrupted)
+    except KeyboardInterrupt:
+        pass
+    f.backend.heal()
+    assert dao.get_customer_by_id(1), "no probe allowed after an interrupted one"
+    assert f.executor.breaker("customers").state == "closed"
+    return "probe interrupted by KeyboardInterrupt -> next call probes and closes the circuit"
+
+
+def deadlines(f: Fixture) -> str:
+    f.backend.fail("products")
+    started = time.perf_counter()
+    try:
+        with deadline(0.1):
+            ProductDAO(f.client).get_product_by_id(1)
+    except DeadlineExceeded:
+        pass
+    else:
+        raise AssertionError("read succeeded through a permanent failure")
+    elapsed = time.perf_counter() - started
+    assert elapsed < 0.15, f"took {elapsed:.3f}s with a 0.1s deadline"
+    return f"permanent failure with 0.1 s deadline -> gave up after {elapsed * 1000:.0f} ms"
+
+
+def passthrough(f: Fixture) -> str:
+    f.backend.functions.pop("top_selling_products", None)
+    assert ReportDAO(f.client).top_selling_products(5) is None, "missing-function error did not pass through"
+    return "non-transient errors reach the DAOs unchanged"
+
+
+SCENARIOS: Dict[str, Callable[[], Fixture]] = {
+    "single_flight": lambda: Fixture(latency=0.02),
+    "read_after_write": Fixture,
+    "read_retry": Fixture,
+    "write_not_retried": Fixture,
+    "lost_items_response": Fixture,
+    "breaker": lambda: Fixture(breaker_threshold=3),
+    "interrupted_probe": lambda: Fixture(breaker_threshold=3),
+    "deadlines": lambda: Fixture(latency=0.02, retries=10, backoff=0.05),
+    "passthrough": Fixture,
+}
+
+
+def main() -> int:
+    failures = 0
+    for name, fixture in SCENARIOS.items():
+        check = globals()[name]
+        try:
+            print(f"{name:<20} ok    {check(fixture())}")
+        except AssertionError as e:
+            failures += 1
+            print(f"{name:<20} FAIL  {e}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
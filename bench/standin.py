@@ -0,0 +1,109 @@
+"""
+Benchmark stand-in for the Supabase/PostgREST client.
+
+StandInClient is the SQLite backend (src/db/sqlite_backend.py) with
+request accounting: every execute() counts as one round trip, can sleep
+for a simulated network latency, and adds the JSON size of what it sends
+and receives to the byte counters. FaultInjectingClient also fails
+requests on demand, to exercise src/db/resilience.py.
+"""
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict
+
+from src.db.sqlite_backend import SQLiteClient, SQLiteError as StandInError  # noqa: F401
+
+
+def _json_size(value: Any) -> int:
+    if value is None:
+        return 0
+    return len(json.dumps(value, default=str))
+
+
+class StandInClient(SQLiteClient):
+    """
+    `latency` is slept once per request to model the network round trip.
+    `requests` counts every request; `calls` breaks it down by (target, op).
+    `bytes_sent` / `bytes_received` approximate the payload on the wire.
+    """
+
+    def __init__(self, path: str = ":memory:", latency: float = 0.0):
+        super().__init__(path)
+        self.latency = latency
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.calls: Dict[tuple, int] = defaultdict(int)
+
+    def reset_counters(self):
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.calls.clear()
+
+    def _send(self, target: str, op: str, run: Callable, body: Any = None):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            self.calls[(target, op)] += 1
+            self.bytes_sent += _json_size(body)
+        resp = super()._send(target, op, run, body)
+        with self._lock:
+            self.bytes_received += _json_size(resp.data)
+        return resp
+
+
+class _Fault:
+    def __init__(self, target, times, rate, after, code):
+        self.target, self.times, self.rate, self.after, self.code = target, times, rate, after, code
+
+
+class FaultInjectingClient(StandInClient):
+    """
+    StandInClient whose requests fail on demand. fail() adds a fault for
+    one target (a table or "rpc/<name>"; None is every request): the next
+    `times` matching requests (all of them when None) fail, each with
+    probability `rate`, with a StandInError carrying `code` (503 by
+    default). With after=True the request is applied first and only its
+    response is lost. Failed requests still count as round trips.
+    """
+
+    def __init__(self, path: str = ":memory:", latency: float = 0.0, seed: int = 0):
+        super().__init__(path, latency)
+        self.rng = random.Random(seed)
+        self.faults = []
+        self.injected = 0
+
+    def fail(self, target: str | None = None, times: int | None = None, rate: float = 1.0, after: bool = False, code: str = "503"):
+        self.faults.append(_Fault(target, times, rate, after, code))
+
+    def heal(self):
+        self.faults.clear()
+
+    def _pick(self, target: str):
+        with self._lock:
+            for fault in self.faults:
+                if fault.target not in (None, target) or fault.times == 0:
+                    continue
+                if self.rng.random() >= fault.rate:
+                    return None
+                if fault.times is not None:
+                    fault.times -= 1
+                self.injected += 1
+                return fault
+        return None
+
+    def _send(self, target: str, op: str, run: Callable, body: Any = None):
+        fault = self._pick(target)
+        if fault is None:
+            return super()._send(target, op, run, body)
+        error = StandInError(f"Service Unavailable (injected into {target})", code=fault.code)
+
+        def failing(conn):
+            if fault.after:
+                run(conn)
+            raise error
+        return super()._send(target, op, failing, body)
@@ -0,0 +1,113 @@
+"""
+CLI startup budget: time `python -m src.cli.main ...` end to end.
+
+    python -m bench.startup --repeat 20
+    python -m bench.startup --serve
+
+Each case runs `--repeat` times in a fresh interpreter. The median time of a
+bare interpreter (`python -c pass`) is subtracted, and what is left is the
+CLI's own startup. That figure is compared with BUDGETS_MS. Help screens
+never reach a backend, so they also must not import the modules in
+FORBIDDEN (services, database client, HTTP stack, numpy). Exits non-zero
+on any breach, so it can gate CI.
+
+--serve also starts `retail serve` on a scratch SQLite database and times
+one command forwarded to it against the same command run in-process
+(both are database calls, so neither is held to a budget).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# CLI arguments -> maximum startup in ms on top of the bare interpreter
+BUDGETS_MS = {
+    "--help": 50,
+    "product --help": 50,
+    "order create --help": 50,
+    "report --help": 70,
+    "report revenue --help": 70,
+}
+
+SERVE_COMMAND = "order show --order_id 1"
+
+FORBIDDEN = ("supabase", "httpx", "numpy", "src.db.registry", "src.dao.product_dao", "src.services.order_service")
+
+# Runs the CLI in-process and prints the modules it loaded
+_PROBE = """
+import sys
+sys.argv = ["retail"] + sys.argv[1:]
+from src.cli import main
+try:
+    main.main()
+except SystemExit:
+    pass
+sys.stderr.write("\\n".join(sys.modules) + "\\n")
+"""
+
+
+def _env(**overrides) -> Dict[str, str]:
+    # Never let a running `serve` worker answer for the process being timed
+    return {**os.environ, "SERVE_FORWARD": "0", **overrides}
+
+
+def _time(cmd: List[str], repeat: int, env: Dict[str, str] | None = None) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, env=env or _env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def _loaded_modules(args: List[str]) -> List[str]:
+    out = subprocess.run([sys.executable, "-c", _PROBE, *args], cwd=ROOT, env=_env(), capture_output=True, text=True)
+    return out.stderr.splitlines()
+
+
+def _time_serve(repeat: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _env(DB_BACKEND="sqlite", SQLITE_PATH=os.path.join(tmp, "bench.db"), SERVE_SOCKET_PATH=os.path.join(tmp, "serve.sock"))
+        server = subprocess.Popen([sys.executable, "-m", "src.cli.main", "serve"], cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True)
+        try:
+            server.stdout.readline()  # "Serving on ..."
+            cmd = [sys.executable, "-m", "src.cli.main", *SERVE_COMMAND.split()]
+            local = _time(cmd, repeat, env)
+            forwarded = _time(cmd, repeat, {**env, "SERVE_FORWARD": "1"})
+        finally:
+            server.terminate()
+            server.wait()
+    print(f"{SERVE_COMMAND}: {local:.1f} ms in-process, {forwarded:.1f} ms forwarded to serve")
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="CLI startup-time budget")
+    parser.add_argument("--repeat", type=int, default=15, help="runs per case (the median is used)")
+    parser.add_argument("--serve", action="store_true", help="also time a command forwarded to `retail serve`")
+    args = parser.parse_args(argv)
+
+    bare = _time([sys.executable, "-c", "pass"], args.repeat)
+    print(f"bare interpreter: {bare:.1f} ms")
+    print(f"{'command':<28} {'ms':>8} {'budget':>7}")
+    failures = 0
+    for case, budget in BUDGETS_MS.items():
+        case_args = case.split()
+        ms = _time([sys.executable, "-m", "src.cli.main", *case_args], args.repeat) - bare
+        over = ms > budget
+        leaked = [m for m in _loaded_modules(case_args) if m.split(".")[0] in FORBIDDEN or m in FORBIDDEN]
+        failures += over or bool(leaked)
+        flags = ("  OVER BUDGET" if over else "") + (f"  imports {', '.join(sorted(leaked))}" if leaked else "")
+        print(f"{case:<28} {ms:>8.1f} {budget:>7}{flags}")
+    if args.serve:
+        _time_serve(args.repeat)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
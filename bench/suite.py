@@ -0,0 +1,320 @@
+"""
+Benchmark suite for the order, payment and report hot paths, run against
+the local stand-in.
+
+    python -m bench.suite --orders 1000 100000 --latency 0.001 --output results.json
+    python -m bench.suite --orders 100000 --compare results.json
+
+For every scale it seeds a synthetic catalog, customer base and order
+history, then times OrderService.create_order (batched and atomic),
+cancel_order, PaymentService.process_payment and every ReportService
+report in each of its modes (database functions, Python fallback,
+columnar engine when numpy is installed, and materialized state). Each case records wall time per call, backend
+requests, bytes sent/received and peak Python memory (measured in a
+separate tracemalloc run so it does not skew the timings).
+
+--output writes the results as JSON; --compare reads an earlier file and
+exits non-zero when a case makes more requests than before or is slower
+than --tolerance times its old mean.
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List
+
+from bench.standin import StandInClient
+from src.dao.order_dao import OrderDAO
+from src.dao.payment_dao import PaymentDAO
+from src.dao.product_dao import ProductDAO
+from src.dao.report_dao import ReportDAO
+from src.services.order_service import OrderService
+from src.services.payment_service import PaymentService
+from src.services.product_service import ProductService
+from src.services import report_columnar
+from src.services.report_service import ReportService
+from src.services.report_state import ReportState
+
+SEED_BATCH = 10000
+STATUS_WEIGHTS = (("COMPLETED", 80), ("PLACED", 15), ("CANCELLED", 5))
+CITIES = ("Pune", "Mumbai", "Delhi", "Chennai", "Kolkata", "Bengaluru", "Hyderabad", "Jaipur")
+CATEGORIES = ("Stationery", "Grocery", "Electronics", "Apparel", "Home", "Toys")
+
+
+# ---------- Seeding ----------
+def seed(client: StandInClient, orders: int, products: int | None = None, customers: int | None = None,
+         items_per_order: int = 3, days: int = 90, rng_seed: int = 42) -> Dict:
+    """
+    Bulk-load a deterministic dataset straight into the stand-in's SQLite
+    connection (bypassing the request counters). Order dates are spread
+    over the last `days` days so the monthly revenue report has data.
+    Returns the scale that was seeded.
+    """
+    rng = random.Random(rng_seed)
+    products = products or max(50, orders // 100)
+    customers = customers or max(20, orders // 10)
+    conn = client._conn
+    now = datetime.utcnow() - timedelta(minutes=1)
+    statuses = [s for s, w in STATUS_WEIGHTS for _ in range(w)]
+
+    with client._lock, conn:
+        conn.executemany(
+            "INSERT INTO products (prod_id, name, sku, price, stock, category) VALUES (?, ?, ?, ?, ?, ?)",
+            ((i, f"Product {i}", f"SKU-{i:07d}", round(rng.uniform(1, 500), 2), 10**9, rng.choice(CATEGORIES))
+             for i in range(1, products + 1)),
+        )
+        conn.executemany(
+            "INSERT INTO customers (cust_id, name, email, phone, city) VALUES (?, ?, ?, ?, ?)",
+            ((i, f"Customer {i}", f"customer{i}@example.com", f"9{i:09d}", rng.choice(CITIES))
+             for i in range(1, customers + 1)),
+        )
+        prices = {row[0]: row[1] for row in conn.execute("SELECT prod_id, price FROM products")}
+
+        item_id = 0
+        for start in range(1, orders + 1, SEED_BATCH):
+            order_rows, item_rows, payment_rows = [], [], []
+            for order_id in range(start, min(start + SEED_BATCH, orders + 1)):
+                lines = rng.randint(1, 2 * items_per_order - 1)
+                total = 0.0
+                for prod_id in rng.sample(range(1, products + 1), min(lines, products)):
+                    qty = rng.randint(1, 5)
+                    item_id += 1
+                    item_rows.append((item_id, order_id, prod_id, qty, prices[prod_id]))
+                    total += prices[prod_id] * qty
+                status = rng.choice(statuses)
+                order_date = now - timedelta(seconds=rng.uniform(0, days * 86400))
+                order_rows.append((order_id, rng.randint(1, customers), order_date.strftime("%Y-%m-%dT%H:%M:%S.%f"),
+                                   status, round(total, 2)))
+                payment_status = {"COMPLETED": "PAID", "PLACED": "PENDING", "CANCELLED": "REFUNDED"}[status]
+                payment_rows.append((order_id, round(total, 2), payment_status, None if status == "PLACED" else "CARD"))
+            conn.executemany(
+                "INSERT INTO orders (order_id, cust_id, order_date, status, total_amount) VALUES (?, ?, ?, ?, ?)",
+                order_rows,
+            )
+            conn.executemany(
+                "INSERT INTO order_items (item_id, order_id, prod_id, quantity, price) VALUES (?, ?, ?, ?, ?)",
+                item_rows,
+            )
+            conn.executemany("INSERT INTO payments (order_id, amount, status, method) VALUES (?, ?, ?, ?)", payment_rows)
+    return {"orders": orders, "products": products, "customers": customers, "order_items": item_id}
+
+
+# ---------- Cases ----------
+@dataclass
+class Result:
+    calls: int
+    mean_ms: float
+    min_ms: float
+    max_ms: float
+    requests: float
+    bytes_sent: float
+    bytes_received: float
+    peak_kib: float | None
+
+
+class Context:
+    """Services wired to one seeded stand-in, plus pools of orders the mutating cases consume."""
+
+    def __init__(self, client: StandInClient, scale: Dict, rng_seed: int = 42):
+        self.client = client
+        self.scale = scale
+        self.rng = random.Random(rng_seed)
+        self.products = ProductService(ProductDAO(client))
+        self.orders = OrderService(OrderDAO(client, self.products), self.products)
+        self.payments = PaymentService(PaymentDAO(client), self.orders)
+        report_dao = ReportDAO(client)
+        self.reports = {
+            "rpc": ReportService(report_dao),
+            "python": ReportService(report_dao, server_side=False),
+            "state": ReportService(report_dao, state=ReportState(settle_seconds=0)),
+        }
+        if report_columnar.available():
+            self.reports["columnar"] = ReportService(report_dao, server_side=False, engine="columnar")
+        with client._lock:
+            placed = [r[0] for r in client._conn.execute("SELECT order_id FROM orders WHERE status = 'PLACED' ORDER BY order_id")]
+        self.rng.shuffle(placed)
+        self._placed: Iterator[int] = iter(placed)
+
+    def placed_order(self) -> int:
+        """A PLACED order with a PENDING payment that no other case has touched."""
+        try:
+            return next(self._placed)
+        except StopIteration:
+            raise RuntimeError("Seeded data ran out of PLACED orders; lower --repeat or raise --orders") from None
+
+    def basket(self, lines: int = 3) -> List[Dict]:
+        prod_ids = self.rng.sample(range(1, self.scale["products"] + 1), min(lines, self.scale["products"]))
+        return [{"prod_id": pid, "quantity": self.rng.randint(1, 3)} for pid in prod_ids]
+
+    def customer(self) -> int:
+        return self.rng.randint(1, self.scale["customers"])
+
+
+def _report_cases() -> Dict[str, Callable[[Context], Callable]]:
+    cases = {}
+    for mode in ("rpc", "python", "columnar", "state"):
+        cases[f"report.top_selling_products[{mode}]"] = lambda ctx, m=mode: lambda: ctx.reports[m].top_selling_products(5)
+        cases[f"report.total_revenue_last_month[{mode}]"] = lambda ctx, m=mode: lambda: ctx.reports[m].total_revenue_last_month()
+        cases[f"report.total_orders_per_customer[{mode}]"] = lambda ctx, m=mode: lambda: ctx.reports[m].total_orders_per_customer()
+        cases[f"report.frequent_customers[{mode}]"] = lambda ctx, m=mode: lambda: ctx.reports[m].frequent_customers(2)
+        cases[f"report.all[{mode}]"] = lambda ctx, m=mode: lambda: ctx.reports[m].all_reports(5, 2)
+    return cases
+
+
+# case name -> factory(ctx) returning a zero-argument call. Reports run
+# first, while the seeded history is untouched; order/payment cases mutate it.
+REPORT_CASES = _report_cases()
+MUTATION_CASES = {
+    "order.create_order[batched]": lambda ctx: (lambda: ctx.orders.create_order(ctx.customer(), ctx.basket())),
+    "order.create_order[atomic]": lambda ctx: (lambda: ctx.orders.create_order(ctx.customer(), ctx.basket(), atomic=True)),
+    "order.cancel_order": lambda ctx: (lambda: ctx.orders.cancel_order(ctx.placed_order())),
+    "payment.process_payment": lambda ctx: (lambda: ctx.payments.process_payment(ctx.placed_order(), "CARD")),
+}
+
+
+def run_case(ctx: Context, factory: Callable[[Context], Callable], repeat: int, memory: bool = True) -> Result:
+    call = factory(ctx)
+    client = ctx.client
+    client.reset_counters()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    requests, sent, received = client.requests, client.bytes_sent, client.bytes_received
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        call()
+        peak = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+
+    return Result(
+        calls=repeat,
+        mean_ms=round(sum(timings) / repeat, 3),
+        min_ms=round(min(timings), 3),
+        max_ms=round(max(timings), 3),
+        requests=requests / repeat,
+        bytes_sent=sent / repeat,
+        bytes_received=received / repeat,
+        peak_kib=round(peak, 1) if peak is not None else None,
+    )
+
+
+def run_scale(orders: int, latency: float, repeat: int, report_repeat: int, memory: bool,
+              pattern: str | None = None) -> Dict:
+    client = StandInClient()
+    start = time.perf_counter()
+    scale = seed(client, orders)
+    seed_seconds = time.perf_counter() - start
+    ctx = Context(client, scale)
+    client.latency = latency
+
+    # The state-mode reports are timed warm; the first refresh is its own case.
+    results = {}
+    cold = "report.refresh_state[cold]"
+    if not pattern or pattern in cold:
+        results[cold] = asdict(run_case(ctx, lambda c: c.reports["state"].refresh_state, 1, memory=False))
+        print(_format_row(orders, cold, results[cold]), flush=True)
+    else:
+        ctx.reports["state"].refresh_state()
+    for name, factory in list(REPORT_CASES.items()) + list(MUTATION_CASES.items()):
+        if pattern and pattern not in name:
+            continue
+        if name.endswith("[columnar]") and "columnar" not in ctx.reports:
+            continue
+        n = report_repeat if name.startswith("report.") else repeat
+        results[name] = asdict(run_case(ctx, factory, n, memory))
+        print(_format_row(orders, name, results[name]), flush=True)
+    client.close()
+    return {"scale": scale, "seed_seconds": round(seed_seconds, 2), "results": results}
+
+
+# ---------- Output ----------
+def _format_row(orders: int, name: str, r: Dict) -> str:
+    peak = f"{r['peak_kib']:>10.0f}" if r["peak_kib"] is not None else f"{'-':>10}"
+    return (f"{orders:>8} {name:<44} {r['mean_ms']:>10.2f} {r['requests']:>8.1f} "
+            f"{r['bytes_sent']:>10.0f} {r['bytes_received']:>12.0f} {peak}")
+
+
+def _version() -> str | None:
+    try:
+        out = subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> int:
+    """Print regressions of `current` against `baseline`. Returns the number found."""
+    regressions = 0
+    for orders, run in current["runs"].items():
+        old_run = baseline.get("runs", {}).get(orders)
+        if not old_run:
+            continue
+        for name, r in run["results"].items():
+            old = old_run["results"].get(name)
+            if not old:
+                continue
+            problems = []
+            if r["requests"] > old["requests"]:
+                problems.append(f"requests {old['requests']:.1f} -> {r['requests']:.1f}")
+            if old["mean_ms"] and r["mean_ms"] > old["mean_ms"] * tolerance:
+                problems.append(f"time {old['mean_ms']:.2f}ms -> {r['mean_ms']:.2f}ms")
+            if problems:
+                regressions += 1
+                print(f"REGRESSION {orders} {name}: {', '.join(problems)}")
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Order, payment and report benchmark suite")
+    parser.add_argument("--orders", type=int, nargs="+", default=[1000, 10000], help="order-history sizes to seed")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated round trip in seconds")
+    parser.add_argument("--repeat", type=int, default=20, help="calls per order/payment case")
+    parser.add_argument("--report_repeat", type=int, default=3, help="calls per report case")
+    parser.add_argument("--only", help="run only cases whose name contains this text")
+    parser.add_argument("--no_memory", action="store_true", help="skip the tracemalloc peak-memory run")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="earlier JSON results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="allowed slowdown factor for --compare")
+    args = parser.parse_args(argv)
+
+    print(f"{'orders':>8} {'case':<44} {'ms/call':>10} {'requests':>8} {'sent B':>10} {'received B':>12} {'peak KiB':>10}")
+    runs = {}
+    for orders in args.orders:
+        runs[str(orders)] = run_scale(orders, args.latency, args.repeat, args.report_repeat,
+                                      not args.no_memory, args.only)
+
+    report = {
+        "meta": {
+            "version": _version(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency": args.latency,
+            "repeat": args.repeat,
+            "report_repeat": args.report_repeat,
+        },
+        "runs": runs,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+-- Relative, guarded stock updates used by ProductDAO.adjust_stock(_batch).
+-- A delta is only applied when the resulting stock stays >= 0, in the same
+-- statement, so concurrent checkouts cannot lose updates or oversell.
+
+-- Apply one delta. Returns the updated row, or no rows when the product
+-- does not exist or has too little stock.
+create or replace function adjust_stock(p_prod_id bigint, p_delta int)
+returns setof products
+language sql
+as $$
+    update products
+       set stock = stock + p_delta
+     where prod_id = p_prod_id
+       and stock + p_delta >= 0
+    returning *;
+$$;
+
+-- Apply a whole basket of deltas ([{"prod_id": ..., "delta": ...}, ...])
+-- all-or-nothing. Raises if any product is missing or would go negative.
+create or replace function adjust_stock_batch(p_items jsonb)
+returns setof products
+language plpgsql
+as $$
+declare
+    v_line record;
+    v_row products;
+begin
+    -- lock rows in prod_id order to avoid deadlocks between baskets
+    for v_line in
+        select (i ->> 'prod_id')::bigint as prod_id,
+               sum((i ->> 'delta')::int) as delta
+        from jsonb_array_elements(p_items) as i
+        group by 1
+        order by 1
+    loop
+        update products
+           set stock = stock + v_line.delta
+         where prod_id = v_line.prod_id
+           and stock + v_line.delta >= 0
+        returning * into v_row;
+        if not found then
+            if exists (select 1 from products where prod_id = v_line.prod_id) then
+                raise exception 'Not enough stock for product %', v_line.prod_id;
+            end if;
+            raise exception 'Product not found with id: %', v_line.prod_id;
+        end if;
+        return next v_row;
+    end loop;
+end;
+$$;
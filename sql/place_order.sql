@@ -0,0 +1,52 @@
+-- place_order(p_cust_id, p_items)
+-- Places a whole order in one transaction: checks and deducts stock,
+-- inserts the order and all of its order_items, and returns the new order_id.
+-- p_items is a JSON array of {"prod_id": ..., "quantity": ...}.
+-- Used by OrderDAO.create_order_atomic (`order create --atomic`).
+
+create or replace function place_order(p_cust_id bigint, p_items jsonb)
+returns bigint
+language plpgsql
+as $$
+declare
+    v_order_id bigint;
+    v_total numeric;
+    v_line record;
+begin
+    -- Deduct stock per product; lock rows in prod_id order to avoid deadlocks
+    for v_line in
+        select (i ->> 'prod_id')::bigint as prod_id,
+               sum((i ->> 'quantity')::int) as quantity
+        from jsonb_array_elements(p_items) as i
+        group by 1
+        order by 1
+    loop
+        update products
+           set stock = stock - v_line.quantity
+         where prod_id = v_line.prod_id
+           and stock >= v_line.quantity;
+        if not found then
+            if exists (select 1 from products where prod_id = v_line.prod_id) then
+                raise exception 'Not enough stock for product %', v_line.prod_id;
+            end if;
+            raise exception 'Product not found with id: %', v_line.prod_id;
+        end if;
+    end loop;
+
+    select coalesce(sum(p.price * (i ->> 'quantity')::int), 0)
+      into v_total
+      from jsonb_array_elements(p_items) as i
+      join products p on p.prod_id = (i ->> 'prod_id')::bigint;
+
+    insert into orders (cust_id, status, total_amount)
+    values (p_cust_id, 'PLACED', v_total)
+    returning order_id into v_order_id;
+
+    insert into order_items (order_id, prod_id, quantity, price)
+    select v_order_id, p.prod_id, (i ->> 'quantity')::int, p.price
+      from jsonb_array_elements(p_items) as i
+      join products p on p.prod_id = (i ->> 'prod_id')::bigint;
+
+    return v_order_id;
+end;
+$$;
@@ -0,0 +1,51 @@
+-- Server-side aggregations used by ReportDAO / ReportService.
+-- When these functions are not installed, ReportService falls back to
+-- computing the reports in Python. Cancelled orders are excluded
+-- everywhere, as in every other report engine.
+
+-- Top N products by total quantity sold.
+create or replace function top_selling_products(p_top_n int default 5)
+returns table (prod_id bigint, product text, quantity bigint)
+language sql
+stable
+as $$
+    select oi.prod_id, p.name, sum(oi.quantity)::bigint
+      from order_items oi
+      join orders o on o.order_id = oi.order_id
+      left join products p on p.prod_id = oi.prod_id
+     where o.status <> 'CANCELLED'
+     group by oi.prod_id, p.name
+     order by 3 desc, 1
+     limit p_top_n;
+$$;
+
+-- Sum of orders.total_amount for p_start <= order_date < p_end.
+create or replace function revenue_between(p_start timestamptz, p_end timestamptz)
+returns numeric
+language sql
+stable
+as $$
+    select coalesce(sum(total_amount), 0)
+      from orders
+     where order_date >= p_start
+       and order_date < p_end
+       and status <> 'CANCELLED';
+$$;
+
+-- Orders per customer, optionally only customers with more than p_min_orders.
+create or replace function orders_per_customer(p_min_orders int default null)
+returns table (cust_id bigint, total_orders bigint)
+language sql
+stable
+as $$
+    select o.cust_id, count(*)::bigint
+      from orders o
+     where o.status <> 'CANCELLED'
+     group by o.cust_id
+    having p_min_orders is null or count(*) > p_min_orders
+     order by 1;
+$$;
+
+create index if not exists order_items_prod_id_idx on order_items (prod_id);
+create index if not exists orders_order_date_idx on orders (order_date);
+create index if not exists orders_cust_id_idx on orders (cust_id);
@@ -0,0 +1,36 @@
+-- Cancellation log read by ReportState (src/services/report_state.py), so a
+-- refresh only reads the orders cancelled (or restored) since the last one.
+-- Required when REPORT_STATE_PATH is set.
+
+-- One row per order entering (cancelled) or leaving (not cancelled) CANCELLED
+create table if not exists order_status_log (
+    log_id bigserial primary key,
+    order_id bigint not null references orders (order_id),
+    cancelled boolean not null,
+    logged_at timestamptz not null default now()
+);
+
+create or replace function log_order_cancellation()
+returns trigger
+language plpgsql
+as $$
+begin
+    if (old.status = 'CANCELLED') is distinct from (new.status = 'CANCELLED') then
+        insert into order_status_log (order_id, cancelled)
+        values (new.order_id, new.status = 'CANCELLED');
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists orders_cancellation_log on orders;
+create trigger orders_cancellation_log
+after update of status on orders
+for each row execute function log_order_cancellation();
+
+-- Orders cancelled before the log existed
+insert into order_status_log (order_id, cancelled)
+select o.order_id, true
+  from orders o
+ where o.status = 'CANCELLED'
+   and not exists (select 1 from order_status_log l where l.order_id = o.order_id);
@@ -0,0 +1,21 @@
+-- Low-stock listing and restock planning (ProductDAO.iter_low_stock,
+-- ReportDAO.product_sales_since). Without product_sales_since, RestockService
+-- sums the order items of the window in Python.
+
+-- stock <= threshold filters, paged by prod_id
+create index if not exists products_stock_idx on products (stock, prod_id);
+
+-- Units sold per product in orders placed since p_start, cancelled orders excluded.
+create or replace function product_sales_since(p_since timestamptz)
+returns table (prod_id bigint, quantity bigint)
+language sql
+stable
+as $$
+    select oi.prod_id, sum(oi.quantity)::bigint
+      from order_items oi
+      join orders o on o.order_id = oi.order_id
+     where o.order_date >= p_since
+       and o.status <> 'CANCELLED'
+     group by oi.prod_id
+     order by 1;
+$$;
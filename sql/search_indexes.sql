@@ -0,0 +1,19 @@
+-- Indexes behind ProductDAO.search_products, CustomerDAO.search_customers, OrderDAO.list_orders
+-- and OrderDAO.list_placed_before.
+-- Searches page by primary key (keyset), so equality filters are indexed
+-- together with the key; name prefixes (ilike 'abc%') use trigram indexes.
+
+create extension if not exists pg_trgm;
+
+create index if not exists products_category_idx on products (category, prod_id);
+create index if not exists products_price_idx on products (price);
+create index if not exists products_name_trgm_idx on products using gin (name gin_trgm_ops);
+
+create index if not exists customers_city_idx on customers (city, cust_id);
+create index if not exists customers_name_trgm_idx on customers using gin (name gin_trgm_ops);
+
+-- OrderDAO.list_orders: a customer's orders, newest first, by keyset on order_id
+create index if not exists orders_cust_id_order_id_idx on orders (cust_id, order_id desc);
+
+-- OrderDAO.list_placed_before (order expire): only PLACED orders are indexed, by key
+create index if not exists orders_placed_order_id_idx on orders (order_id) where status = 'PLACED';
@@ -0,0 +1,67 @@
+"""
+Streaming CSV / NDJSON readers and writers for the import/export commands.
+A path of "-" means stdin/stdout; the format defaults to the file extension.
+"""
+import csv
+import json
+import sys
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator
+
+FORMATS = ("csv", "ndjson")
+
+
+def detect_format(path: str, fmt: str | None = None) -> str:
+    if fmt:
+        return fmt
+    if path.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+@contextmanager
+def _open(path: str, mode: str):
+    if path == "-":
+        yield sys.stdin if "r" in mode else sys.stdout
+    else:
+        with open(path, mode, newline="", encoding="utf-8") as f:
+            yield f
+
+
+def read_records(path: str, fmt: str | None = None) -> Iterator[Dict]:
+    """
+    Yield one dict per CSV row / NDJSON line without loading the whole file.
+    An unparsable NDJSON line is yielded as a ValueError in its place.
+    """
+    fmt = detect_format(path, fmt)
+    with _open(path, "r") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    # reported as that row's error by the importer
+                    yield ValueError(f"Invalid JSON: {e}")
+
+
+def write_records(path: str, records: Iterable[Dict], fmt: str | None = None) -> int:
+    """Write records as they arrive; CSV columns come from the first record. Returns the count."""
+    fmt = detect_format(path, fmt)
+    count = 0
+    with _open(path, "w") as f:
+        writer = None
+        for record in records:
+            if fmt == "csv":
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(record), extrasaction="ignore")
+                    writer.writeheader()
+                writer.writerow(record)
+            else:
+                f.write(json.dumps(record, default=str) + "\n")
+            count += 1
+    return count
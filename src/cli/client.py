@@ -0,0 +1,98 @@
+"""
+Thin client for `retail serve`: sends one CLI call to the running server
+over its Unix socket and replays the output and exit code, so the call
+skips client setup. Kept to the standard library so forwarding stays cheap:
+its settings are read from the environment only, not through src.config
+(and its .env file), which would cost every call the dotenv import.
+
+    SERVE_FORWARD       0 runs every call in-process (default 1)
+    SERVE_SOCKET_PATH   the worker's socket (default: socket_path())
+    SERVE_TIMEOUT       seconds to wait for the worker's reply (default 300)
+
+Only a socket owned by the calling user is trusted.
+"""
+import json
+import os
+import socket
+import stat
+import sys
+from typing import List
+
+# Calls that must run in this process: the server itself, --profile
+# (timed here), and anything reading the caller's stdin
+_LOCAL_COMMANDS = {"serve"}
+# Options taking a path, made absolute since the server has its own cwd
+_PATH_OPTIONS = {"--file", "--results", "--path"}
+
+
+def _forwardable(argv: List[str]) -> bool:
+    words = [a for a in argv if not a.startswith("-")]
+    if words and words[0] in _LOCAL_COMMANDS:
+        return False
+    return "--profile" not in argv and "-" not in argv
+
+
+def _absolute_paths(argv: List[str]) -> List[str]:
+    out = list(argv)
+    for i, arg in enumerate(out[:-1]):
+        if arg in _PATH_OPTIONS:
+            out[i + 1] = os.path.abspath(out[i + 1])
+    return out
+
+
+def socket_path() -> str:
+    """
+    SERVE_SOCKET_PATH, else retail-cli.sock in the user's runtime directory:
+    $XDG_RUNTIME_DIR, or a per-user /tmp/retail-cli-<uid> the server creates
+    with mode 0700.
+    """
+    path = os.environ.get("SERVE_SOCKET_PATH")
+    if path:
+        return path
+    runtime = os.environ.get("XDG_RUNTIME_DIR") or f"/tmp/retail-cli-{os.getuid()}"
+    return os.path.join(runtime, "retail-cli.sock")
+
+
+def _trusted(path: str) -> bool:
+    # Never send a call (and its arguments) to someone else's socket
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+
+def forward(argv: List[str]) -> int | None:
+    """
+    Run `argv` on the server and return its exit code, or None when it
+    should run in-process: forwarding is off, no server of this user is
+    listening, or the call is one the server does not take.
+    """
+    if os.environ.get("SERVE_FORWARD", "1") != "1" or not _forwardable(argv):
+        return None
+    path = socket_path()
+    if not _trusted(path):
+        return None
+    timeout = float(os.environ.get("SERVE_TIMEOUT", "300"))
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    try:
+        with sock, sock.makefile("rwb") as stream:
+            stream.write(json.dumps({"argv": _absolute_paths(argv)}).encode("utf-8") + b"\n")
+            stream.flush()
+            line = stream.readline()
+    except TimeoutError:
+        print(f"Error: no reply from the serve worker within {timeout:g} s (SERVE_TIMEOUT)", file=sys.stderr)
+        return 1
+    if not line:
+        print("Error: the serve worker closed the connection", file=sys.stderr)
+        return 1
+    response = json.loads(line)
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["exit_code"]
@@ -1,125 +1,333 @@
-import argparse
-from src.services.product_service import ProductService, ProductError
-from src.services.customer_service import CustomerService, CustomerError
-from src.services.order_service import OrderService, OrderError
-from src.services.payment_service import PaymentService, PaymentError
-from src.services.report_service import ReportService
+import functools
+import sys
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, List
+from src.cli.bulk_io import FORMATS, read_records, write_records
+
+if TYPE_CHECKING:
+    import argparse
+
+# Startup matters: ops scripts run this module thousands of times a day.
+# Services (and the database client behind them) are built on first use,
+# only the chosen command's subparsers are built, and modules a command
+# does not need are never imported (argparse included, when the call is
+# forwarded to a `serve` worker).
+
+
+# ------------------- Argument parsers -------------------
+# Handlers are named by string (set_defaults(handler=...)) rather than bound,
+# so the parser does not depend on a RetailCLI and is built once per process.
+def _product_commands(parser):
+    product_sub = parser.add_subparsers(dest="action")
+
+    add_product_parser = product_sub.add_parser("add")
+    add_product_parser.add_argument("--name", required=True)
+    add_product_parser.add_argument("--sku", required=True)
+    add_product_parser.add_argument("--price", type=float, required=True)
+    add_product_parser.add_argument("--stock", type=int, default=0)
+    add_product_parser.add_argument("--category")
+
+    list_product_parser = product_sub.add_parser("list")
+    list_product_parser.add_argument("--category")
+    list_product_parser.add_argument("--name", help="name prefix")
+    list_product_parser.add_argument("--min_price", type=float)
+    list_product_parser.add_argument("--max_price", type=float)
+    list_product_parser.add_argument("--max_stock", type=int)
+    list_product_parser.add_argument("--cursor", type=int, help="next cursor printed by the previous page")
+    list_product_parser.add_argument("--page_size", type=int, default=100)
+
+    import_product_parser = product_sub.add_parser("import", help="bulk insert from CSV/NDJSON")
+    import_product_parser.add_argument("--file", required=True, help="path, or - for stdin")
+    import_product_parser.add_argument("--format", choices=FORMATS)
+    import_product_parser.add_argument("--chunk_size", type=int, default=500)
+
+    export_product_parser = product_sub.add_parser("export", help="stream all products to CSV/NDJSON")
+    export_product_parser.add_argument("--file", required=True, help="path, or - for stdout")
+    export_product_parser.add_argument("--format", choices=FORMATS)
+
+    snapshot_product_parser = product_sub.add_parser("snapshot", help="rebuild the memory-mapped catalog snapshot")
+    snapshot_product_parser.add_argument("--path", help="snapshot file (default CATALOG_SNAPSHOT_PATH)")
+
+    add_product_parser.set_defaults(handler="product_add")
+    list_product_parser.set_defaults(handler="product_list")
+    import_product_parser.set_defaults(handler="product_import")
+    export_product_parser.set_defaults(handler="product_export")
+    snapshot_product_parser.set_defaults(handler="product_snapshot")
+
+
+def _customer_commands(parser):
+    customer_sub = parser.add_subparsers(dest="action")
+
+    add_customer_parser = customer_sub.add_parser("add")
+    add_customer_parser.add_argument("--name", required=True)
+    add_customer_parser.add_argument("--email", required=True)
+    add_customer_parser.add_argument("--phone", required=True)
+    add_customer_parser.add_argument("--city", required=True)
+
+    list_customer_parser = customer_sub.add_parser("list")
+    list_customer_parser.add_argument("--city")
+    list_customer_parser.add_argument("--name", help="name prefix")
+    list_customer_parser.add_argument("--email")
+    list_customer_parser.add_argument("--cursor", type=int, help="next cursor printed by the previous page")
+    list_customer_parser.add_argument("--page_size", type=int, default=100)
+
+    import_customer_parser = customer_sub.add_parser("import", help="bulk insert from CSV/NDJSON")
+    import_customer_parser.add_argument("--file", required=True, help="path, or - for stdin")
+    import_customer_parser.add_argument("--format", choices=FORMATS)
+    import_customer_parser.add_argument("--chunk_size", type=int, default=500)
+
+    export_customer_parser = customer_sub.add_parser("export", help="stream all customers to CSV/NDJSON")
+    export_customer_parser.add_argument("--file", required=True, help="path, or - for stdout")
+    export_customer_parser.add_argument("--format", choices=FORMATS)
+
+    add_customer_parser.set_defaults(handler="customer_add")
+    list_customer_parser.set_defaults(handler="customer_list")
+    import_customer_parser.set_defaults(handler="customer_import")
+    export_customer_parser.set_defaults(handler="customer_export")
+
+
+def _duration(value: str):
+    """'90m', '12h', '7d' or '2w' (a bare number is days) -> timedelta."""
+    from datetime import timedelta
+    units = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+    unit = value[-1:].lower() if value[-1:].isalpha() else "d"
+    number = value[:-1] if value[-1:].isalpha() else value
+    try:
+        return timedelta(**{units[unit]: float(number)})
+    except (KeyError, ValueError):
+        raise ValueError(f"invalid duration: {value}")
+
+
+def _order_commands(parser):
+    from datetime import date
+    order_sub = parser.add_subparsers(dest="action")
+
+    create_order_parser = order_sub.add_parser("create")
+    create_order_parser.add_argument("--customer_id", type=int, required=True)
+    create_order_parser.add_argument("--items", nargs="+", required=True, help="prod_id:quantity")
+    create_order_parser.add_argument("--atomic", action="store_true", help="place the order in one server-side transaction")
+
+    list_order_parser = order_sub.add_parser("list", help="a customer's orders, newest first")
+    list_order_parser.add_argument("--customer_id", type=int, required=True)
+    list_order_parser.add_argument("--status", choices=("PLACED", "COMPLETED", "CANCELLED"), type=str.upper)
+    list_order_parser.add_argument("--start", type=date.fromisoformat, help="YYYY-MM-DD, inclusive")
+    list_order_parser.add_argument("--end", type=date.fromisoformat, help="YYYY-MM-DD, exclusive")
+    list_order_parser.add_argument("--cursor", type=int, help="next cursor printed by the previous page")
+    list_order_parser.add_argument("--page_size", type=int, default=100)
+
+    show_order_parser = order_sub.add_parser("show")
+    show_order_parser.add_argument("--order_id", type=int, required=True)
+
+    cancel_order_parser = order_sub.add_parser("cancel")
+    cancel_order_parser.add_argument("--order_id", type=int, required=True)
+
+    complete_order_parser = order_sub.add_parser("complete")
+    complete_order_parser.add_argument("--order_id", type=int, required=True)
+
+    expire_order_parser = order_sub.add_parser("expire", help="cancel stale PLACED orders and release their stock")
+    expire_order_parser.add_argument("--older_than", "--older-than", type=_duration, required=True, help="e.g. 90m, 12h, 7d, 2w")
+    expire_order_parser.add_argument("--batch_size", type=int, default=1000)
+    expire_order_parser.add_argument("--dry_run", action="store_true", help="only count the orders")
+
+    create_order_parser.set_defaults(handler="order_create")
+    list_order_parser.set_defaults(handler="order_list")
+    show_order_parser.set_defaults(handler="order_show")
+    cancel_order_parser.set_defaults(handler="order_cancel")
+    complete_order_parser.set_defaults(handler="order_complete")
+    expire_order_parser.set_defaults(handler="order_expire")
+
+
+def _payment_commands(parser):
+    payment_sub = parser.add_subparsers(dest="action")
+
+    create_payment_parser = payment_sub.add_parser("create")
+    create_payment_parser.add_argument("--order_id", type=int, required=True)
+    create_payment_parser.add_argument("--amount", type=float, required=True)
+
+    process_payment_parser = payment_sub.add_parser("process")
+    process_payment_parser.add_argument("--order_id", type=int, required=True)
+    process_payment_parser.add_argument("--method", required=True)
+
+    batch_payment_parser = payment_sub.add_parser("process-batch", help="settle order_id/method pairs from CSV/NDJSON")
+    batch_payment_parser.add_argument("--file", required=True, help="path, or - for stdin")
+    batch_payment_parser.add_argument("--format", choices=FORMATS)
+    batch_payment_parser.add_argument("--chunk_size", type=int, default=1000)
+    batch_payment_parser.add_argument("--results", help="write per-order results to this CSV/NDJSON path")
+
+    refund_payment_parser = payment_sub.add_parser("refund")
+    refund_payment_parser.add_argument("--order_id", type=int, required=True)
+
+    create_payment_parser.set_defaults(handler="payment_create")
+    process_payment_parser.set_defaults(handler="payment_process")
+    batch_payment_parser.set_defaults(handler="payment_process_batch")
+    refund_payment_parser.set_defaults(handler="payment_refund")
+
+
+def _report_commands(parser):
+    # Light imports only: src.config (dotenv) and the services wait for the handler
+    from src.services.report_periods import GRANULARITIES, GROUP_BYS
+    from datetime import date
+    report_sub = parser.add_subparsers(dest="action")
+
+    top_products_parser = report_sub.add_parser("top_products")
+    top_products_parser.add_argument("--top_n", type=int, default=5)
+
+    revenue_parser = report_sub.add_parser("total_revenue_last_month")
+    orders_parser = report_sub.add_parser("total_orders_per_customer")
+    frequent_parser = report_sub.add_parser("frequent_customers")
+    frequent_parser.add_argument("--min_orders", type=int, default=2)
+    refresh_parser = report_sub.add_parser("refresh", help="fold new orders into REPORT_STATE_PATH")
+    revenue_window_parser = report_sub.add_parser("revenue", help="revenue for a date range by day/week/month")
+    revenue_window_parser.add_argument("--start", type=date.fromisoformat, required=True, help="YYYY-MM-DD, inclusive")
+    revenue_window_parser.add_argument("--end", type=date.fromisoformat, required=True, help="YYYY-MM-DD, exclusive")
+    revenue_window_parser.add_argument("--granularity", choices=GRANULARITIES, default="day")
+    revenue_window_parser.add_argument("--group_by", choices=GROUP_BYS)
+    low_stock_parser = report_sub.add_parser("low_stock", help="products with stock <= threshold")
+    low_stock_parser.add_argument("--threshold", type=int, default=5)
+    low_stock_parser.add_argument("--category")
+    restock_parser = report_sub.add_parser("restock_plan", help="suggested restock quantities from sales velocity")
+    restock_parser.add_argument("--window_days", type=int, help="trailing days of sales (default RESTOCK_WINDOW_DAYS)")
+    restock_parser.add_argument("--lead_time_days", type=int, help="default RESTOCK_LEAD_TIME_DAYS")
+    restock_parser.add_argument("--cover_days", type=int, help="days of stock to order up to (default RESTOCK_COVER_DAYS)")
+    restock_parser.add_argument("--category")
+    all_parser = report_sub.add_parser("all", help="the four summary reports from one scan, as one JSON document")
+    all_parser.add_argument("--top_n", type=int, default=5)
+    all_parser.add_argument("--min_orders", type=int, default=2)
+    all_parser.add_argument("--file", default="-", help="path, or - for stdout")
+
+    top_products_parser.set_defaults(handler="report_run")
+    revenue_parser.set_defaults(handler="report_run")
+    orders_parser.set_defaults(handler="report_run")
+    frequent_parser.set_defaults(handler="report_run")
+    refresh_parser.set_defaults(handler="report_run")
+    revenue_window_parser.set_defaults(handler="report_run")
+    low_stock_parser.set_defaults(handler="report_low_stock")
+    restock_parser.set_defaults(handler="report_restock_plan")
+    all_parser.set_defaults(handler="report_all")
+
+
+def _serve_commands(parser):
+    from src.cli.client import socket_path
+    parser.add_argument("--socket", default=socket_path(), help="Unix socket to listen on")
+    parser.add_argument("--stdin", action="store_true", help="read requests from stdin and answer on stdout instead")
+    parser.set_defaults(handler="serve", action=None)
+
+
+# command -> (help, function adding its arguments / actions)
+COMMANDS = {
+    "product": ("Product operations", _product_commands),
+    "customer": ("Customer operations", _customer_commands),
+    "order": ("Order operations", _order_commands),
+    "payment": ("Payment operations", _payment_commands),
+    "report": ("Reporting commands", _report_commands),
+    "serve": ("Run commands sent as NDJSON by a long-running worker", _serve_commands),
+}
+_command_parsers: Dict[str, "argparse.ArgumentParser"] = {}
+
+
+@functools.cache
+def build_parser() -> "argparse.ArgumentParser":
+    """Top-level parser; each command's actions are added by command_parser() when first needed."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Retail CLI")
+    parser.add_argument("--profile", action="store_true", help="print a per-call time breakdown after the command")
+    subparsers = parser.add_subparsers(dest="cmd")
+    for name, (help_text, _) in COMMANDS.items():
+        _command_parsers[name] = subparsers.add_parser(name, help=help_text)
+    return parser
+
+
+@functools.cache
+def command_parser(name: str) -> "argparse.ArgumentParser":
+    build_parser()
+    parser = _command_parsers[name]
+    COMMANDS[name][1](parser)
+    return parser
+
+
+def parse_args(argv: List[str] | None = None) -> "argparse.Namespace":
+    argv = sys.argv[1:] if argv is None else argv
+    # --profile is the only top-level option, so the first bare word is the command
+    command = next((a for a in argv if not a.startswith("-")), None)
+    if command in COMMANDS:
+        command_parser(command)
+    return build_parser().parse_args(argv)
+
 
 class RetailCLI:
-    def __init__(self):
-        self.product_service = ProductService()
-        self.customer_service = CustomerService()
-        self.order_service = OrderService()
-        self.payment_service = PaymentService(self.order_service)
-        self.report_service = ReportService()
+    # ------------------- Services -------------------
+    # All services share one ProductService and, through src.config, one client
+    @cached_property
+    def product_service(self):
+        from src.services.product_service import ProductService
+        return ProductService()
+
+    @cached_property
+    def customer_service(self):
+        from src.services.customer_service import CustomerService
+        return CustomerService()
+
+    @cached_property
+    def order_service(self):
+        from src.services.order_service import OrderService
+        return OrderService(product_service=self.product_service)
+
+    @cached_property
+    def payment_service(self):
+        from src.services.payment_service import PaymentService
+        return PaymentService(order_service=self.order_service)
+
+    @cached_property
+    def report_service(self):
+        from src.config import REPORT_STATE_PATH
+        from src.services.report_service import ReportService
+        from src.services.report_state import ReportState
+        return ReportService(state=ReportState(REPORT_STATE_PATH) if REPORT_STATE_PATH else None)
+
+    @cached_property
+    def restock_service(self):
+        from src.services.restock_service import RestockService
+        return RestockService()
+
+    def run(self, argv: List[str] | None = None):
+        args = parse_args(argv)
+        if not hasattr(args, "handler"):
+            build_parser().print_help()
+            return
+        handler = getattr(self, args.handler)
 
-    def run(self):
-        parser = argparse.ArgumentParser(description="Retail CLI")
-        subparsers = parser.add_subparsers(dest="cmd")
-
-        # ------------------- Product -------------------
-        product_parser = subparsers.add_parser("product", help="Product operations")
-        product_sub = product_parser.add_subparsers(dest="action")
-
-        add_product_parser = product_sub.add_parser("add")
-        add_product_parser.add_argument("--name", required=True)
-        add_product_parser.add_argument("--sku", required=True)
-        add_product_parser.add_argument("--price", type=float, required=True)
-        add_product_parser.add_argument("--stock", type=int, default=0)
-        add_product_parser.add_argument("--category")
-
-        list_product_parser = product_sub.add_parser("list")
-        list_product_parser.add_argument("--category")
-
-        add_product_parser.set_defaults(func=self.product_add)
-        list_product_parser.set_defaults(func=self.product_list)
-
-        # ------------------- Customer -------------------
-        customer_parser = subparsers.add_parser("customer", help="Customer operations")
-        customer_sub = customer_parser.add_subparsers(dest="action")
-
-        add_customer_parser = customer_sub.add_parser("add")
-        add_customer_parser.add_argument("--name", required=True)
-        add_customer_parser.add_argument("--email", required=True)
-        add_customer_parser.add_argument("--phone", required=True)
-        add_customer_parser.add_argument("--city", required=True)
-
-        list_customer_parser = customer_sub.add_parser("list")
-        list_customer_parser.add_argument("--city")
-
-        add_customer_parser.set_defaults(func=self.customer_add)
-        list_customer_parser.set_defaults(func=self.customer_list)
-
-        # ------------------- Order -------------------
-        order_parser = subparsers.add_parser("order", help="Order operations")
-        order_sub = order_parser.add_subparsers(dest="action")
-
-        create_order_parser = order_sub.add_parser("create")
-        create_order_parser.add_argument("--customer_id", type=int, required=True)
-        create_order_parser.add_argument("--items", nargs="+", required=True, help="prod_id:quantity")
-
-        list_order_parser = order_sub.add_parser("list")
-        list_order_parser.add_argument("--customer_id", type=int, required=True)
-
-        show_order_parser = order_sub.add_parser("show")
-        show_order_parser.add_argument("--order_id", type=int, required=True)
-
-        cancel_order_parser = order_sub.add_parser("cancel")
-        cancel_order_parser.add_argument("--order_id", type=int, required=True)
-
-        complete_order_parser = order_sub.add_parser("complete")
-        complete_order_parser.add_argument("--order_id", type=int, required=True)
-
-        create_order_parser.set_defaults(func=self.order_create)
-        list_order_parser.set_defaults(func=self.order_list)
-        show_order_parser.set_defaults(func=self.order_show)
-        cancel_order_parser.set_defaults(func=self.order_cancel)
-        complete_order_parser.set_defaults(func=self.order_complete)
-
-        # ------------------- Payment -------------------
-        payment_parser = subparsers.add_parser("payment", help="Payment operations")
-        payment_sub = payment_parser.add_subparsers(dest="action")
-
-        create_payment_parser = payment_sub.add_parser("create")
-        create_payment_parser.add_argument("--order_id", type=int, required=True)
-        create_payment_parser.add_argument("--amount", type=float, required=True)
-
-        process_payment_parser = payment_sub.add_parser("process")
-        process_payment_parser.add_argument("--order_id", type=int, required=True)
-        process_payment_parser.add_argument("--method", required=True)
-
-        refund_payment_parser = payment_sub.add_parser("refund")
-        refund_payment_parser.add_argument("--order_id", type=int, required=True)
-
-        create_payment_parser.set_defaults(func=self.payment_create)
-        process_payment_parser.set_defaults(func=self.payment_process)
-        refund_payment_parser.set_defaults(func=self.payment_refund)
-
-        # ------------------- Report -------------------
-        report_parser = subparsers.add_parser("report", help="Reporting commands")
-        report_sub = report_parser.add_subparsers(dest="action")
-
-        top_products_parser = report_sub.add_parser("top_products")
-        top_products_parser.add_argument("--top_n", type=int, default=5)
-
-        revenue_parser = report_sub.add_parser("total_revenue_last_month")
-        orders_parser = report_sub.add_parser("total_orders_per_customer")
-        frequent_parser = report_sub.add_parser("frequent_customers")
-        frequent_parser.add_argument("--min_orders", type=int, default=2)
-
-        top_products_parser.set_defaults(func=self.report_run)
-        revenue_parser.set_defaults(func=self.report_run)
-        orders_parser.set_defaults(func=self.report_run)
-        frequent_parser.set_defaults(func=self.report_run)
+        from src.config import TRACE_EXPORTERS
+        if args.cmd == "serve" or (not TRACE_EXPORTERS and not args.profile):
+            handler(args)
+            return
 
-        args = parser.parse_args()
-        if hasattr(args, "func"):
-            args.func(args)
+        from src.telemetry import tracing
+        from src.telemetry.exporters import SummaryExporter, from_spec
+        exporters = from_spec(TRACE_EXPORTERS)
+        summary = SummaryExporter() if args.profile else None
+        if summary:
+            exporters.append(summary)
+        tracing.enable(*exporters)
+        try:
+            with tracing.span(f"cli.{args.cmd}.{args.action}", layer="cli"):
+                handler(args)
+        finally:
+            tracing.disable()
+            if summary:
+                print(summary.format(), file=sys.stderr)
+
+    # ------------------- Serve -------------------
+    def serve(self, args):
+        from src.cli.server import Server
+        server = Server(self)
+        if args.stdin:
+            server.serve_stdin()
         else:
-            parser.print_help()
+            server.serve_socket(args.socket)
 
     # ------------------- Product Handlers -------------------
     def product_add(self, args):
+        from src.services.product_service import ProductError
         try:
             product = self.product_service.add_product(
                 args.name, args.sku, args.price, args.stock, args.category
@@ -129,11 +337,38 @@ class RetailCLI:
             print("Error:", e)
 
     def product_list(self, args):
-        products = self.product_service.list_products(category=args.category)
-        print(products)
+        from src.services.product_service import ProductError
+        try:
+            page = self.product_service.search_products(
+                name_prefix=args.name, category=args.category, min_price=args.min_price,
+                max_price=args.max_price, max_stock=args.max_stock, cursor=args.cursor, page_size=args.page_size
+            )
+        except ProductError as e:
+            print("Error:", e)
+            return
+        self._print_page(page)
+
+    def product_import(self, args):
+        result = self.product_service.import_products(read_records(args.file, args.format), args.chunk_size)
+        self._print_import_result("products", result)
+
+    def product_export(self, args):
+        count = write_records(args.file, self.product_service.export_products(), args.format)
+        if args.file != "-":
+            print(f"Exported {count} products to {args.file}")
+
+    def product_snapshot(self, args):
+        from src.services.product_service import ProductError
+        try:
+            result = self.product_service.build_catalog_snapshot(args.path)
+        except ProductError as e:
+            print("Error:", e)
+            return
+        print(f"Catalog snapshot {result['version']} written to {result['path']} ({result['products']} products)")
 
     # ------------------- Customer Handlers -------------------
     def customer_add(self, args):
+        from src.services.customer_service import CustomerError
         try:
             customer = self.customer_service.add_customer(
                 args.name, args.email, args.phone, args.city
@@ -143,23 +378,59 @@ class RetailCLI:
             print("Error:", e)
 
     def customer_list(self, args):
-        customers = self.customer_service.list_customers(city=args.city)
-        print(customers)
+        from src.services.customer_service import CustomerError
+        try:
+            page = self.customer_service.find_customers(
+                email=args.email, city=args.city, name_prefix=args.name, cursor=args.cursor, page_size=args.page_size
+            )
+        except CustomerError as e:
+            print("Error:", e)
+            return
+        self._print_page(page)
+
+    def customer_import(self, args):
+        result = self.customer_service.import_customers(read_records(args.file, args.format), args.chunk_size)
+        self._print_import_result("customers", result)
+
+    def customer_export(self, args):
+        count = write_records(args.file, self.customer_service.export_customers(), args.format)
+        if args.file != "-":
+            print(f"Exported {count} customers to {args.file}")
+
+    def _print_page(self, page):
+        print(page["items"])
+        if page["next_cursor"] is not None:
+            print(f"More results: --cursor {page['next_cursor']}")
+
+    def _print_import_result(self, what, result):
+        print(f"Imported {result['inserted']} {what}, {len(result['errors'])} rows rejected")
+        for err in result["errors"]:
+            print(f"  row {err['row']}: {err['error']}")
 
     # ------------------- Order Handlers -------------------
     def order_create(self, args):
+        from src.services.order_service import OrderError
         try:
             items = [{"prod_id": int(x.split(":")[0]), "quantity": int(x.split(":")[1])} for x in args.items]
-            order = self.order_service.create_order(args.customer_id, items)
+            order = self.order_service.create_order(args.customer_id, items, atomic=args.atomic)
             print(f"Order created successfully! Order ID: {order['order_id']}")
         except OrderError as e:
             print("Error:", e)
 
     def order_list(self, args):
-        orders = self.order_service.list_orders(args.customer_id)
-        print(orders)
+        from src.services.order_service import OrderError
+        try:
+            page = self.order_service.list_orders(
+                args.customer_id, status=args.status, start=args.start, end=args.end,
+                cursor=args.cursor, page_size=args.page_size
+            )
+        except OrderError as e:
+            print("Error:", e)
+            return
+        self._print_page(page)
 
     def order_show(self, args):
+        from src.services.order_service import OrderError
         try:
             order = self.order_service.get_order_details(args.order_id)
             print(order)
@@ -167,6 +438,7 @@ class RetailCLI:
             print("Error:", e)
 
     def order_cancel(self, args):
+        from src.services.order_service import OrderError
         try:
             order = self.order_service.cancel_order(args.order_id)
             print("Order cancelled:", order)
@@ -174,14 +446,29 @@ class RetailCLI:
             print("Error:", e)
 
     def order_complete(self, args):
+        from src.services.order_service import OrderError
         try:
             order = self.order_service.complete_order(args.order_id)
             print("Order completed:", order)
         except OrderError as e:
             print("Error:", e)
 
+    def order_expire(self, args):
+        from src.services.order_service import OrderError
+        try:
+            summary = self.order_service.expire_orders(args.older_than, args.batch_size, args.dry_run)
+        except OrderError as e:
+            print("Error:", e)
+            return
+        if args.dry_run:
+            print(f"{summary['expired']} PLACED orders dated before {summary['cutoff']} would expire")
+        else:
+            print(f"Expired {summary['expired']} orders dated before {summary['cutoff']}, "
+                  f"released {summary['units_released']} units ({summary['skipped']} skipped)")
+
     # ------------------- Payment Handlers -------------------
     def payment_create(self, args):
+        from src.services.payment_service import PaymentError
         try:
             payment = self.payment_service.create_payment(args.order_id, args.amount)
             print("Payment created:", payment)
@@ -189,13 +476,26 @@ class RetailCLI:
             print("Error:", e)
 
     def payment_process(self, args):
+        from src.services.payment_service import PaymentError
         try:
             payment = self.payment_service.process_payment(args.order_id, args.method)
             print("Payment processed:", payment)
         except PaymentError as e:
             print("Error:", e)
 
+    def payment_process_batch(self, args):
+        result = self.payment_service.process_payments(read_records(args.file, args.format), args.chunk_size)
+        print(f"Processed {result['paid']} payments, {result['failed']} failed")
+        if args.results:
+            columns = ("row", "order_id", "payment_status", "order_status", "error")
+            write_records(args.results, ({c: r.get(c) for c in columns} for r in result["results"]))
+        else:
+            for r in result["results"]:
+                if "error" in r:
+                    print(f"  row {r['row']} (order {r['order_id']}): {r['error']}")
+
     def payment_refund(self, args):
+        from src.services.payment_service import PaymentError
         try:
             payment = self.payment_service.refund_payment(args.order_id)
             print("Payment refunded:", payment)
@@ -212,15 +512,60 @@ class RetailCLI:
             result = self.report_service.total_orders_per_customer()
         elif args.action == "frequent_customers":
             result = self.report_service.frequent_customers(args.min_orders)
+        elif args.action == "refresh":
+            if self.report_service.state is None:
+                print("Error: REPORT_STATE_PATH is not set")
+                return
+            result = f"Applied {self.report_service.refresh_state()} orders"
+        elif args.action == "revenue":
+            result = self.report_service.revenue_report(args.start, args.end, args.granularity, args.group_by)
         else:
             print("Invalid report action")
             return
         print(result)
 
+    def report_low_stock(self, args):
+        from src.services.restock_service import RestockError
+        try:
+            # one line per product as the pages arrive
+            for product in self.restock_service.low_stock(args.threshold, args.category):
+                print(product)
+        except RestockError as e:
+            print("Error:", e)
+
+    def report_restock_plan(self, args):
+        from src.services.restock_service import RestockError
+        # Unset options keep restock_plan's RESTOCK_* defaults
+        options = {"window_days": args.window_days, "lead_time_days": args.lead_time_days, "cover_days": args.cover_days}
+        try:
+            plan = self.restock_service.restock_plan(category=args.category, **{k: v for k, v in options.items() if v is not None})
+        except RestockError as e:
+            print("Error:", e)
+            return
+        for row in plan:
+            print(row)
+        print(f"{len(plan)} products to restock")
+
+    def report_all(self, args):
+        import json
+        document = json.dumps(self.report_service.all_reports(args.top_n, args.min_orders), indent=2, default=str)
+        if args.file == "-":
+            print(document)
+            return
+        with open(args.file, "w", encoding="utf-8") as f:
+            f.write(document + "\n")
+        print(f"Reports written to {args.file}")
+
 
 def main():
+    argv = sys.argv[1:]
+    # Hand the call to a running `serve` worker if there is one
+    from src.cli import client
+    code = client.forward(argv)
+    if code is not None:
+        sys.exit(code)
     cli = RetailCLI()
-    cli.run()
+    cli.run(argv)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,206 @@
+"""
+`retail serve`: one long-running RetailCLI that runs many commands.
+
+Requests are newline-delimited JSON, one command per line:
+
+    {"id": 7, "argv": ["order", "create", "--customer_id", "1", "--items", "3:2"]}
+
+and every request gets one line back:
+
+    {"id": 7, "exit_code": 0, "stdout": "Order created successfully! ...", "stderr": ""}
+
+with whatever the command printed. A request may carry "deadline_ms" (null
+means none): the command's backend calls are then bounded by it: no call or
+retry starts after it, and on the Supabase backend each HTTP request gets
+the time left as its timeout (see src/db/resilience.py). The services, the
+backend client (and its connection pool) and the product cache stay warm
+between commands.
+
+Requests come from a Unix socket, with one thread per connection, or from
+stdin with --stdin. src/cli/client.py forwards ordinary CLI calls to the
+socket while the server runs. Commands run concurrently on the socket, so
+TRACE_EXPORTERS tracing is switched on once for the server's lifetime and
+--profile is not available here.
+"""
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Dict
+
+
+class _ThreadOutput(io.TextIOBase):
+    """
+    Stand-in for sys.stdout / sys.stderr: what a thread prints while
+    capture() is active goes to that thread's buffer, and anything else
+    goes to the real stream.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer or self._stream).write(s)
+
+    def flush(self):
+        if getattr(self._local, "buffer", None) is None:
+            self._stream.flush()
+
+    @contextmanager
+    def capture(self):
+        self._local.buffer = io.StringIO()
+        try:
+            yield self._local.buffer
+        finally:
+            self._local.buffer = None
+
+
+class Server:
+    def __init__(self, cli):
+        self.cli = cli
+        self._stdout = sys.stdout
+        self._stdin = sys.stdin
+
+    def _start(self):
+        from src.cli.main import COMMANDS, command_parser
+        from src.config import TRACE_EXPORTERS
+        from src.telemetry import tracing
+        from src.telemetry.exporters import from_spec
+
+        # Build every service (and so the client) up front, once
+        for name in ("product_service", "customer_service", "order_service", "payment_service", "report_service", "restock_service"):
+            getattr(self.cli, name)
+        # ... and every command's parser: they are built lazily and cached,
+        # which is not safe with two connections parsing their first command
+        for name in COMMANDS:
+            command_parser(name)
+        exporters = from_spec(TRACE_EXPORTERS)
+        if exporters:
+            tracing.enable(*exporters)
+        sys.stdout = _ThreadOutput(self._stdout)
+        sys.stderr = _ThreadOutput(sys.stderr)
+        # Commands must not read the request stream (e.g. `import --file -`)
+        sys.stdin = io.StringIO()
+
+    def _stop(self):
+        from src.telemetry import tracing
+        sys.stdout, sys.stderr, sys.stdin = self._stdout, sys.stderr._stream, self._stdin
+        if tracing.is_enabled():
+            tracing.disable()
+
+    # ---------- Requests ----------
+    def handle_line(self, line: str) -> Dict:
+        try:
+            request = json.loads(line)
+            argv = request.get("argv") if isinstance(request, dict) else None
+            if not isinstance(argv, list) or not all(isinstance(a, str) for a in argv):
+                raise ValueError('expected {"argv": [str, ...]}')
+            deadline_ms = request.get("deadline_ms")
+            if deadline_ms is not None and not isinstance(deadline_ms, (int, float)):
+                raise ValueError("deadline_ms must be a number")
+        except ValueError as e:
+            return {"id": None, "exit_code": 2, "stdout": "", "stderr": f"Invalid request: {e}\n"}
+        return {"id": request.get("id"), **self.execute(argv, deadline_ms)}
+
+    def execute(self, argv, deadline_ms: float | None = None) -> Dict:
+        """Run one command line; returns its exit code and what it printed."""
+        from src.cli.main import build_parser, parse_args
+        from src.db.resilience import deadline
+        from src.telemetry import tracing
+
+        with sys.stdout.capture() as out, sys.stderr.capture() as err:
+            code = 0
+            try:
+                args = parse_args(argv)
+                if getattr(args, "cmd", None) == "serve":
+                    print("Error: already serving", file=sys.stderr)
+                    code = 2
+                elif not hasattr(args, "handler"):
+                    build_parser().print_help()
+                else:
+                    if args.profile:
+                        print("--profile is ignored by the server; set SERVE_FORWARD=0 to profile a call", file=sys.stderr)
+                    with tracing.span(f"cli.{args.cmd}.{args.action}", layer="cli"), \
+                            (deadline(deadline_ms / 1000) if deadline_ms else nullcontext()):
+                        getattr(self.cli, args.handler)(args)
+            except SystemExit as e:  # argparse errors and --help
+                code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception as e:
+                print(f"Error: {e}", file=sys.stderr)
+                code = 1
+        return {"exit_code": code, "stdout": out.getvalue(), "stderr": err.getvalue()}
+
+    # ---------- Transports ----------
+    def serve_stdin(self):
+        """Answer requests from stdin on stdout, one at a time, until EOF."""
+        requests, responses = self._stdin, self._stdout
+        self._start()
+        try:
+            for line in requests:
+                if line.strip():
+                    responses.write(json.dumps(self.handle_line(line), default=str) + "\n")
+                    responses.flush()
+        finally:
+            self._stop()
+
+    def serve_socket(self, path: str):
+        """Listen on the Unix socket `path` until interrupted."""
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if line.strip():
+                        response = server.handle_line(line.decode("utf-8"))
+                        self.wfile.write(json.dumps(response, default=str).encode("utf-8") + b"\n")
+                        self.wfile.flush()
+
+        class ThreadingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            # e.g. the per-user default directory (see client.socket_path)
+            os.makedirs(directory, mode=0o700)
+        _remove_stale_socket(path)
+        self._start()
+        listener = ThreadingServer(path, Handler)
+        os.chmod(path, 0o600)
+        print(f"Serving on {path}", file=self._stdout, flush=True)
+        signal.signal(signal.SIGTERM, _interrupt)
+        try:
+            listener.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            listener.server_close()
+            os.unlink(path)
+            self._stop()
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _remove_stale_socket(path: str):
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)  # left behind by a server that died
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"A server is already listening on {path}")
@@ -1,17 +1,93 @@
 import os
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
-from supabase import create_client, Client
+
+if TYPE_CHECKING:
+    from supabase import Client
  
 load_dotenv()  # loads .env from project root
  
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+
+# Storage backend used by the DAOs: "supabase" or "sqlite" (see src/db/backend.py)
+DB_BACKEND = os.getenv("DB_BACKEND", "supabase")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "retail.db")
+
+# Shared HTTP connection pool (see src/db/registry.py)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_KEEPALIVE_EXPIRY = float(os.getenv("DB_KEEPALIVE_EXPIRY", "30"))
+DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "10"))
+DB_CONNECT_TIMEOUT = float(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+DB_RETRIES = int(os.getenv("DB_RETRIES", "2"))
+DB_RETRY_BACKOFF = float(os.getenv("DB_RETRY_BACKOFF", "0.2"))
+DB_HTTP2 = os.getenv("DB_HTTP2", "1") == "1"
+
+# Call layer under every DAO (see src/db/resilience.py): single-flight reads,
+# DB_RETRIES jittered retries of transient read failures (backoff capped at
+# DB_RETRY_BACKOFF_MAX s) and per-table circuit breakers. While it is on, the
+# HTTP transport makes no retries of its own.
+DB_CALL_LAYER = os.getenv("DB_CALL_LAYER", "1") == "1"
+DB_RETRY_BACKOFF_MAX = float(os.getenv("DB_RETRY_BACKOFF_MAX", "2"))
+DB_BREAKER_THRESHOLD = int(os.getenv("DB_BREAKER_THRESHOLD", "5"))
+DB_BREAKER_COOLDOWN = float(os.getenv("DB_BREAKER_COOLDOWN", "10"))
+
+# Worker threads that run backend calls for the asyncio DAOs/services
+ASYNC_MAX_WORKERS = int(os.getenv("ASYNC_MAX_WORKERS", "64"))
+
+# How ReportService computes reports the database functions cannot serve:
+# "python" (row by row) or "columnar" (NumPy arrays, see src/services/report_columnar.py)
+REPORT_ENGINE = os.getenv("REPORT_ENGINE", "python")
+
+# Rows per page for streaming report reads
+REPORT_PAGE_SIZE = int(os.getenv("REPORT_PAGE_SIZE", "1000"))
+
+# Threads (and key-range partitions per table) for the single scan of `report all`
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "4"))
+
+# Product read-through cache (see src/dao/product_cache.py)
+PRODUCT_CACHE_ENABLED = os.getenv("PRODUCT_CACHE_ENABLED", "1") == "1"
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "5000"))
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "30"))
+
+# Restock planning (see src/services/restock_service.py): trailing days of sales
+# used for velocity, supplier lead time, and days of stock to order up to
+RESTOCK_WINDOW_DAYS = int(os.getenv("RESTOCK_WINDOW_DAYS", "30"))
+RESTOCK_LEAD_TIME_DAYS = int(os.getenv("RESTOCK_LEAD_TIME_DAYS", "7"))
+RESTOCK_COVER_DAYS = int(os.getenv("RESTOCK_COVER_DAYS", "30"))
+
+# The `serve` worker's settings (SERVE_SOCKET_PATH, SERVE_FORWARD,
+# SERVE_TIMEOUT) are read from the environment by src/cli/client.py, so that
+# forwarding a call never imports this module.
+
+# Memory-mapped catalog snapshot (see src/dao/catalog_snapshot.py), built by
+# `product snapshot`; report product names are read from it when set. A
+# snapshot older than CATALOG_SNAPSHOT_MAX_AGE seconds is not used.
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH")
+CATALOG_SNAPSHOT_MAX_AGE = float(os.getenv("CATALOG_SNAPSHOT_MAX_AGE", "3600"))
+
+# JSON file holding materialized report state (see src/services/report_state.py,
+# which needs sql/report_state.sql installed); unset means reports are computed on demand
+REPORT_STATE_PATH = os.getenv("REPORT_STATE_PATH")
+
+# Trace exporters for DAO/service calls, e.g. "log,prometheus=retail.prom,otlp=traces.jsonl"
+# (see src/telemetry/exporters.py); empty leaves tracing off
+TRACE_EXPORTERS = os.getenv("TRACE_EXPORTERS", "")
  
-def get_supabase() -> Client:
+def get_supabase() -> "Client":
     """
-    Return a supabase client. Raises RuntimeError if config missing.
+    Return the process-wide shared supabase client. Raises RuntimeError if config missing.
     """
     if not SUPABASE_URL or not SUPABASE_KEY:
         raise RuntimeError("SUPABASE_URL and SUPABASE_KEY must be set in environment (.env)")
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
- 
+    from src.db import registry
+    return registry.get_client(SUPABASE_URL, SUPABASE_KEY)
+
+
+def get_client():
+    """
+    Return the shared client of the configured DB_BACKEND. DAOs use this
+    unless they are given a client explicitly.
+    """
+    from src.db.backend import get_backend
+    return get_backend(DB_BACKEND)
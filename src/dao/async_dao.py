@@ -0,0 +1,39 @@
+"""
+Asyncio variants of the DAOs.
+
+Each Async*DAO exposes the same methods as its synchronous DAO, as
+coroutines running on the shared backend thread pool (src/db/aio.py), so
+they work with every backend the sync DAOs support and share their client.
+"""
+from typing import Optional
+from src.db.aio import AsyncFacade
+from src.dao.customer_dao import CustomerDAO
+from src.dao.order_dao import OrderDAO
+from src.dao.payment_dao import PaymentDAO
+from src.dao.product_cache import CachedProductDAO
+from src.dao.report_dao import ReportDAO
+
+
+class AsyncProductDAO(AsyncFacade):
+    def __init__(self, dao: Optional[CachedProductDAO] = None):
+        super().__init__(dao or CachedProductDAO())
+
+
+class AsyncCustomerDAO(AsyncFacade):
+    def __init__(self, dao: Optional[CustomerDAO] = None):
+        super().__init__(dao or CustomerDAO())
+
+
+class AsyncOrderDAO(AsyncFacade):
+    def __init__(self, dao: Optional[OrderDAO] = None):
+        super().__init__(dao or OrderDAO())
+
+
+class AsyncPaymentDAO(AsyncFacade):
+    def __init__(self, dao: Optional[PaymentDAO] = None):
+        super().__init__(dao or PaymentDAO())
+
+
+class AsyncReportDAO(AsyncFacade):
+    def __init__(self, dao: Optional[ReportDAO] = None):
+        super().__init__(dao or ReportDAO())
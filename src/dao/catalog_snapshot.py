@@ -0,0 +1,306 @@
+"""
+Read-only, memory-mapped catalog snapshot.
+
+build_snapshot() streams the products table once and writes it as one
+binary file of parallel arrays (prod_id, price, stock, category) with the
+names and SKUs in a shared UTF-8 blob, plus a persisted SKU hash table and
+per-category row lists. CatalogSnapshot maps that file: opening it parses
+nothing, lookups read straight from the mapping, and every worker process
+mapping the same file shares its pages through the OS page cache.
+
+The file is replaced atomically (written aside, then os.replace), and each
+build has a new version. Readers call reload_if_changed() to switch to the
+newest file. Everything in a snapshot is as of its build, so it serves
+display data (names, categories, list prices), never stock decisions or
+the price an order is charged. A snapshot older than its max_age answers
+no lookups, and products changed in this process since the build are
+skipped (invalidate()), so callers fall back to the database for them.
+"""
+import mmap
+import os
+import struct
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+MAGIC = b"RCAT"
+FORMAT_VERSION = 1
+PRODUCT_COLUMNS = "prod_id,name,sku,price,stock,category"
+
+# Section order in the file; each section starts 8-byte aligned
+SECTIONS = (
+    ("prod_id", "q"),         # sorted ascending
+    ("price", "d"),
+    ("stock", "q"),
+    ("category", "i"),        # index into the category names, -1 for none
+    ("text_offset", "I"),     # 2n + 1 offsets into text: name i, then SKU i
+    ("category_offset", "I"), # categories + 1 offsets into text
+    ("category_start", "I"),  # categories + 1 offsets into category_rows
+    ("category_rows", "i"),   # row numbers grouped by category, in prod_id order
+    ("sku_slots", "i"),       # open-addressing table of row numbers, -1 = empty
+    ("text", "B"),
+)
+# magic, format, version, products, categories, hash slots, then one offset per section
+HEADER = struct.Struct("<4sIQQII" + "Q" * len(SECTIONS))
+
+
+def _sku_hash(sku: bytes) -> int:
+    # crc32 rather than hash(): it must be the same in every process
+    return zlib.crc32(sku)
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+# ---------- Building ----------
+def build_snapshot(products: Iterable[Dict], path: str) -> int:
+    """
+    Write `products` (rows with PRODUCT_COLUMNS, e.g. ProductDAO.iter_products)
+    to `path` as a new snapshot version. Returns that version.
+    """
+    rows = sorted(products, key=lambda p: p["prod_id"])
+    n = len(rows)
+    categories = sorted({p["category"] for p in rows if p.get("category")})
+    category_ids = {c: i for i, c in enumerate(categories)}
+
+    text = bytearray()
+    text_offset = array("I", [0])
+    skus = []
+    for p in rows:
+        text += (p.get("name") or "").encode("utf-8")
+        text_offset.append(len(text))
+        sku = (p.get("sku") or "").encode("utf-8")
+        skus.append(sku)
+        text += sku
+        text_offset.append(len(text))
+    category_offset = array("I", [len(text)])
+    for c in categories:
+        text += c.encode("utf-8")
+        category_offset.append(len(text))
+
+    category = array("i", (category_ids.get(p.get("category"), -1) for p in rows))
+    grouped: List[List[int]] = [[] for _ in categories]
+    for i, c in enumerate(category):
+        if c >= 0:
+            grouped[c].append(i)
+    category_rows, category_start = array("i"), array("I", [0])
+    for members in grouped:
+        category_rows.extend(members)
+        category_start.append(len(category_rows))
+
+    size = 8
+    while size < 2 * n:
+        size *= 2
+    slots = array("i", [-1]) * size
+    for i, sku in enumerate(skus):
+        if not sku:
+            continue
+        h = _sku_hash(sku) & (size - 1)
+        while slots[h] != -1:
+            h = (h + 1) & (size - 1)
+        slots[h] = i
+
+    sections = {
+        "prod_id": array("q", (p["prod_id"] for p in rows)),
+        "price": array("d", (float(p.get("price") or 0) for p in rows)),
+        "stock": array("q", (int(p.get("stock") or 0) for p in rows)),
+        "category": category,
+        "text_offset": text_offset,
+        "category_offset": category_offset,
+        "category_rows": category_rows,
+        "category_start": category_start,
+        "sku_slots": slots,
+        "text": bytes(text),
+    }
+    version = time.time_ns()
+    offsets, position = [], _align(HEADER.size)
+    for name, _ in SECTIONS:
+        offsets.append(position)
+        position = _align(position + len(memoryview(sections[name]).cast("B")))
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, version, n, len(categories), size, *offsets))
+        for (name, _), offset in zip(SECTIONS, offsets):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(memoryview(sections[name]).cast("B"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return version
+
+
+# ---------- Reading ----------
+class _Mapping:
+    """One mapped snapshot file and typed views over its sections."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.stat = os.fstat(f.fileno())
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = HEADER.unpack_from(self.mm, 0)
+        magic, fmt, self.version, self.count, self.categories, self.slots_size = header[:6]
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a catalog snapshot (format {FORMAT_VERSION})")
+        # Sections are read in order, so lengths stored in earlier ones are available
+        lengths = {
+            "prod_id": lambda: self.count, "price": lambda: self.count, "stock": lambda: self.count,
+            "category": lambda: self.count, "text_offset": lambda: 2 * self.count + 1,
+            "category_offset": lambda: self.categories + 1, "category_start": lambda: self.categories + 1,
+            "category_rows": lambda: self.views["category_start"][-1], "sku_slots": lambda: self.slots_size,
+            "text": lambda: self.views["category_offset"][-1],
+        }
+        view = memoryview(self.mm)
+        self.views = {}
+        for (name, fmt_char), start in zip(SECTIONS, header[6:]):
+            end = start + lengths[name]() * struct.calcsize(fmt_char)
+            self.views[name] = view[start:end].cast(fmt_char)
+        offsets = self.views["category_offset"]
+        self.category_names = [str(self.views["text"][offsets[c]:offsets[c + 1]], "utf-8") for c in range(self.categories)]
+        self.category_ids = {c: i for i, c in enumerate(self.category_names)}
+
+
+class CatalogSnapshot:
+    """
+    Lookups over a snapshot file written by build_snapshot(). Rows come back
+    as plain dicts with PRODUCT_COLUMNS, like ProductDAO rows.
+    """
+
+    def __init__(self, path: str, max_age: float | None = None):
+        self.path = path
+        self.max_age = max_age
+        self._m = _Mapping(path)
+        self._checked = time.monotonic()
+        # prod_ids changed since the build; never cleared, as a rebuild may predate the change
+        self._changed: Set[int] = set()
+
+    @property
+    def version(self) -> int:
+        return self._m.version
+
+    def __len__(self) -> int:
+        return self._m.count
+
+    def reload_if_changed(self, min_interval: float = 1.0) -> bool:
+        """Map the file again if it was replaced (checked at most every `min_interval` s)."""
+        now = time.monotonic()
+        if now - self._checked < min_interval:
+            return False
+        self._checked = now
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        old = self._m.stat
+        if (st.st_ino, st.st_mtime_ns, st.st_size) == (old.st_ino, old.st_mtime_ns, old.st_size):
+            return False
+        mapping = _Mapping(self.path)
+        if mapping.version == self._m.version:
+            return False
+        # Swapped in one assignment; readers holding the old mapping finish on it
+        self._m = mapping
+        return True
+
+    def invalidate(self, prod_id: int):
+        """Stop answering for `prod_id`: it changed after the snapshot was built."""
+        self._changed.add(prod_id)
+
+    def expired(self) -> bool:
+        # The version is the build time in ns
+        return self.max_age is not None and time.time() - self._m.version / 1e9 > self.max_age
+
+    # ---------- Lookups ----------
+    def _text(self, m: _Mapping, start: int, end: int) -> str:
+        return str(m.views["text"][start:end], "utf-8")
+
+    def _row(self, m: _Mapping, i: int) -> Dict:
+        v = m.views
+        offsets = v["text_offset"]
+        category = v["category"][i]
+        return {
+            "prod_id": v["prod_id"][i],
+            "name": self._text(m, offsets[2 * i], offsets[2 * i + 1]),
+            "sku": self._text(m, offsets[2 * i + 1], offsets[2 * i + 2]),
+            "price": v["price"][i],
+            "stock": v["stock"][i],
+            "category": m.category_names[category] if category >= 0 else None,
+        }
+
+    def _index(self, m: _Mapping, prod_id: int) -> int:
+        if prod_id in self._changed or self.expired():
+            return -1
+        ids = m.views["prod_id"]
+        i = bisect_left(ids, prod_id)
+        return i if i < m.count and ids[i] == prod_id else -1
+
+    def get(self, prod_id: int) -> Optional[Dict]:
+        m = self._m
+        i = self._index(m, prod_id)
+        return self._row(m, i) if i >= 0 else None
+
+    def get_many(self, prod_ids: Iterable[int]) -> Dict[int, Dict]:
+        """prod_id -> row for the ids present in the snapshot."""
+        m = self._m
+        rows = {}
+        for prod_id in prod_ids:
+            i = self._index(m, prod_id)
+            if i >= 0:
+                rows[prod_id] = self._row(m, i)
+        return rows
+
+    def names(self, prod_ids: Iterable[int]) -> Dict[int, str]:
+        return {pid: row["name"] for pid, row in self.get_many(prod_ids).items()}
+
+    def price(self, prod_id: int) -> Optional[float]:
+        m = self._m
+        i = self._index(m, prod_id)
+        return m.views["price"][i] if i >= 0 else None
+
+    def by_sku(self, sku: str) -> Optional[Dict]:
+        m = self._m
+        v = m.views
+        key = sku.encode("utf-8")
+        mask = m.slots_size - 1
+        h = _sku_hash(key) & mask
+        while True:
+            i = v["sku_slots"][h]
+            if i == -1:
+                return None
+            if v["text"][v["text_offset"][2 * i + 1]:v["text_offset"][2 * i + 2]] == key:
+                return self._row(m, i) if self._index(m, v["prod_id"][i]) >= 0 else None
+            h = (h + 1) & mask
+
+    def categories(self) -> List[str]:
+        return list(self._m.category_names)
+
+    def in_category(self, category: str) -> Iterator[Dict]:
+        """Products of one category, in prod_id order."""
+        m = self._m
+        c = m.category_ids.get(category)
+        if c is None:
+            return
+        start, end = m.views["category_start"][c], m.views["category_start"][c + 1]
+        for i in m.views["category_rows"][start:end]:
+            if self._index(m, m.views["prod_id"][i]) >= 0:
+                yield self._row(m, i)
+
+
+_shared: Dict[str, CatalogSnapshot] = {}
+
+
+def shared_snapshot(path: str | None, max_age: float | None = None) -> Optional[CatalogSnapshot]:
+    """
+    The process-wide CatalogSnapshot of `path`, or None when `path` is unset
+    or nothing has been built there yet (the next call looks again).
+    """
+    if not path:
+        return None
+    if path not in _shared:
+        try:
+            _shared[path] = CatalogSnapshot(path, max_age)
+        except FileNotFoundError:
+            return None
+    return _shared[path]
@@ -1,19 +1,28 @@
-from typing import Optional, List, Dict
-from src.config import get_supabase
+from typing import Optional, List, Dict, Iterator
+from src.config import get_client
+from src.dao.pagination import chunks, fetch_page, iter_keyset, prefix_pattern
+from src.telemetry.tracing import instrument
 
+@instrument("dao")
 class CustomerDAO:
     """Data Access Object for Customers table."""
 
-    def __init__(self):
-        self._sb = get_supabase()
+    def __init__(self, client=None):
+        self._sb = client or get_client()
 
     # CREATE
     def create_customer(self, name: str, email: str, phone: str, city: str) -> Optional[Dict]:
         payload = {"name": name, "email": email, "phone": phone, "city": city}
-        self._sb.table("customers").insert(payload).execute()
-        resp = self._sb.table("customers").select("*").eq("email", email).limit(1).execute()
+        resp = self._sb.table("customers").insert(payload).execute()
         return resp.data[0] if resp.data else None
 
+    def create_customers(self, rows: List[Dict]) -> List[Dict]:
+        """Insert many customers with one multi-row insert; returns the inserted rows."""
+        if not rows:
+            return []
+        resp = self._sb.table("customers").insert(rows).execute()
+        return resp.data or []
+
     # READ
     def get_customer_by_id(self, cust_id: int) -> Optional[Dict]:
         resp = self._sb.table("customers").select("*").eq("cust_id", cust_id).limit(1).execute()
@@ -23,22 +32,44 @@ class CustomerDAO:
         resp = self._sb.table("customers").select("*").eq("email", email).limit(1).execute()
         return resp.data[0] if resp.data else None
 
-    def list_customers(self, limit: int = 100, city: str | None = None) -> List[Dict]:
-        q = self._sb.table("customers").select("*").order("cust_id", desc=False).limit(limit)
+    def get_customers_by_emails(self, emails: List[str]) -> List[Dict]:
+        """Customers with any of `emails`, one `in_` select per IN_CHUNK_SIZE emails."""
+        rows = []
+        for chunk in chunks(list(emails)):
+            resp = self._sb.table("customers").select("*").in_("email", chunk).execute()
+            rows.extend(resp.data or [])
+        return rows
+
+    def iter_customers(self, page_size: int = 1000) -> Iterator[Dict]:
+        return iter_keyset(self._sb, "customers", "cust_id", page_size=page_size)
+
+    def list_customers(self, limit: int = 100, city: str | None = None, after: int | None = None) -> List[Dict]:
+        return self.search_customers(city=city, after=after, limit=limit)
+
+    def search_customers(
+        self,
+        name_prefix: str | None = None,
+        email: str | None = None,
+        city: str | None = None,
+        after: int | None = None,
+        limit: int = 100
+    ) -> List[Dict]:
+        """Up to `limit` customers matching every given filter with cust_id > after, in cust_id order."""
+        filters = []
+        if name_prefix:
+            filters.append(("ilike", "name", prefix_pattern(name_prefix)))
+        if email:
+            filters.append(("eq", "email", email))
         if city:
-            q = q.eq("city", city)
-        resp = q.execute()
-        return resp.data or []
+            filters.append(("eq", "city", city))
+        return fetch_page(self._sb, "customers", "cust_id", limit=limit, filters=filters, after=after)
 
     # UPDATE
     def update_customer(self, cust_id: int, fields: Dict) -> Optional[Dict]:
-        self._sb.table("customers").update(fields).eq("cust_id", cust_id).execute()
-        resp = self._sb.table("customers").select("*").eq("cust_id", cust_id).limit(1).execute()
+        resp = self._sb.table("customers").update(fields).eq("cust_id", cust_id).execute()
         return resp.data[0] if resp.data else None
 
     # DELETE
     def delete_customer(self, cust_id: int) -> Optional[Dict]:
-        resp_before = self._sb.table("customers").select("*").eq("cust_id", cust_id).limit(1).execute()
-        row = resp_before.data[0] if resp_before.data else None
-        self._sb.table("customers").delete().eq("cust_id", cust_id).execute()
-        return row
+        resp = self._sb.table("customers").delete().eq("cust_id", cust_id).execute()
+        return resp.data[0] if resp.data else None
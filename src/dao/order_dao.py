@@ -1,15 +1,34 @@
-from src.config import get_supabase
+from typing import Optional
+from src.config import get_client
+from src.dao.pagination import chunks, fetch_page
 from src.services.product_service import ProductService
+from src.telemetry.tracing import instrument
 
+# Order with its items and each item's product name, as one embedded select
+ORDER_WITH_ITEMS = "*, items:order_items(item_id, prod_id, quantity, price, products(name))"
+
+@instrument("dao")
 class OrderDAO:
     """DAO for Orders table."""
-    def __init__(self):
-        self._sb = get_supabase()
-        self.product_service = ProductService()
+    def __init__(self, client=None, product_service: Optional[ProductService] = None):
+        self._sb = client or get_client()
+        self.product_service = product_service or ProductService()
 
     # CREATE
-    def create_order(self, cust_id: int, items: list[dict], total_amount: float):
-        # Insert order
+    def create_order(self, cust_id: int, items: list[dict], total_amount: float, products: dict | None = None):
+        """
+        Insert the order and all of its items in two requests.
+        `products` (prod_id -> row) can be passed in by callers that already
+        fetched them, otherwise they are loaded with a single `in_` select.
+        """
+        if products is None:
+            products = self.product_service.get_products_by_ids([item["prod_id"] for item in items])
+        order_id = self.insert_order(cust_id, total_amount)
+        self.insert_order_items(order_id, items, products)
+        return order_id
+
+    def insert_order(self, cust_id: int, total_amount: float) -> int:
+        """Insert a PLACED order header and return its id."""
         order_payload = {
             "cust_id": cust_id,
             "status": "PLACED",
@@ -18,37 +37,104 @@ class OrderDAO:
         resp = self._sb.table("orders").insert(order_payload).execute()
         if not resp.data:
             raise Exception(f"Order creation failed: {resp.data}")
-        order_id = resp.data[0]["order_id"]
+        return resp.data[0]["order_id"]
 
-        # Insert order_items with price
-        for item in items:
-            product = self.product_service.get_product_by_id(item["prod_id"])
-            resp_item = self._sb.table("order_items").insert({
+    def insert_order_items(self, order_id: int, items: list[dict], products: dict):
+        """Insert all of an order's items, priced from `products`, in one multi-row insert."""
+        rows = [
+            {
                 "order_id": order_id,
                 "prod_id": item["prod_id"],
                 "quantity": item["quantity"],
-                "price": product["price"]
-            }).execute()
-            if not resp_item.data:
-                raise Exception(f"Failed to insert order item: {item}")
+                "price": products[item["prod_id"]]["price"]
+            }
+            for item in items
+        ]
+        if rows:
+            resp_items = self._sb.table("order_items").insert(rows).execute()
+            if len(resp_items.data or []) != len(rows):
+                raise Exception(f"Failed to insert order items for order {order_id}")
 
-        return order_id
+    def create_order_atomic(self, cust_id: int, items: list[dict]):
+        """
+        Place the whole order (stock check, stock deduction, order and items)
+        in one transaction through the `place_order` database function.
+        See sql/place_order.sql.
+        """
+        payload = [{"prod_id": item["prod_id"], "quantity": item["quantity"]} for item in items]
+        resp = self._sb.rpc("place_order", {"p_cust_id": cust_id, "p_items": payload}).execute()
+        if resp.data is None:
+            raise Exception(f"Order creation failed: {resp.data}")
+        return resp.data
 
     # READ
     def get_order(self, order_id: int):
-        """Fetch order along with its items."""
-        order_resp = self._sb.table("orders").select("*").eq("order_id", order_id).execute()
-        if not order_resp.data:
+        """Fetch the order with its items and their product names in one request."""
+        resp = self._sb.table("orders").select(ORDER_WITH_ITEMS).eq("order_id", order_id).limit(1).execute()
+        if not resp.data:
             return None
-        order = order_resp.data[0]
+        order = resp.data[0]
+        for item in order["items"]:
+            product = item.pop("products", None) or {}
+            item["order_id"] = order_id
+            item["product"] = product.get("name")
+        return order
+
+    def get_order_header(self, order_id: int):
+        """Fetch the orders row only (for status checks and transitions)."""
+        order_resp = self._sb.table("orders").select("*").eq("order_id", order_id).limit(1).execute()
+        return order_resp.data[0] if order_resp.data else None
 
+    def get_order_items(self, order_id: int):
         items_resp = self._sb.table("order_items").select("*").eq("order_id", order_id).execute()
-        order["items"] = items_resp.data or []
-        return order
+        return items_resp.data or []
+
+    def get_order_headers(self, order_ids: list[int], columns: str = "*") -> dict:
+        """order_id -> orders row, one `in_` select per IN_CHUNK_SIZE ids."""
+        orders = {}
+        for chunk in chunks(order_ids):
+            resp = self._sb.table("orders").select(columns).in_("order_id", chunk).execute()
+            orders.update({o["order_id"]: o for o in resp.data or []})
+        return orders
+
+    def get_items_for_orders(self, order_ids: list[int], columns: str = "order_id,prod_id,quantity") -> list[dict]:
+        """order_items of all `order_ids`, one `in_` select per IN_CHUNK_SIZE ids."""
+        items = []
+        for chunk in chunks(order_ids):
+            resp = self._sb.table("order_items").select(columns).in_("order_id", chunk).execute()
+            items.extend(resp.data or [])
+        return items
+
+    def list_placed_before(self, before: str, after_id: int | None = None, limit: int = 1000, columns: str = "order_id") -> list[dict]:
+        """Up to `limit` PLACED orders with order_date < before and order_id > after_id, by order_id."""
+        filters = [("eq", "status", "PLACED"), ("lt", "order_date", before)]
+        return fetch_page(self._sb, "orders", "order_id", columns, limit, filters, after=after_id)
 
-    def list_orders(self, cust_id: int):
-        resp = self._sb.table("orders").select("*").eq("cust_id", cust_id).execute()
-        return resp.data or []
+    def list_orders(
+        self,
+        cust_id: int,
+        status: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        before: int | None = None,
+        limit: int = 100
+    ) -> list[dict]:
+        """
+        Up to `limit` orders of a customer, newest (highest order_id) first,
+        with order_id < before and optionally a status and since <= order_date < until.
+        """
+        filters = [("eq", "cust_id", cust_id)]
+        if status:
+            filters.append(("eq", "status", status))
+        if since:
+            filters.append(("gte", "order_date", since))
+        if until:
+            filters.append(("lt", "order_date", until))
+        return fetch_page(self._sb, "orders", "order_id", limit=limit, filters=filters, after=before, desc=True)
+
+    def has_orders(self, cust_id: int) -> bool:
+        resp = self._sb.table("orders").select("order_id").eq("cust_id", cust_id).limit(1).execute()
+        return bool(resp.data)
 
     # UPDATE
     def update_order_status(self, order_id: int, status: str):
@@ -56,3 +142,15 @@ class OrderDAO:
         if not resp.data:
             raise Exception(f"Failed to update order status: {resp.data}")
         return resp.data[0]
+
+    def transition_orders(self, order_ids: list[int], from_status: str, to_status: str) -> list[dict]:
+        """
+        Move the orders in `order_ids` that are still `from_status` to
+        `to_status`, one conditional update per IN_CHUNK_SIZE ids. Returns the rows changed.
+        """
+        rows = []
+        for chunk in chunks(order_ids):
+            resp = self._sb.table("orders").update({"status": to_status}).in_("order_id", chunk).eq("status", from_status).execute()
+            rows.extend(resp.data or [])
+        return rows
+
@@ -0,0 +1,61 @@
+from typing import Dict, Iterator, List
+
+# Largest page a search/list call may ask for
+MAX_PAGE_SIZE = 1000
+
+# Ids per `in_` filter; keeps request URLs well under proxy limits
+IN_CHUNK_SIZE = 200
+
+
+def fetch_page(sb, table: str, key: str, columns: str = "*", limit: int = 100, filters: list | None = None, after=None,
+               desc: bool = False) -> List[Dict]:
+    """
+    One keyset page: up to `limit` rows of `table` with key > after, ordered
+    by `key` (key < after, newest first, with desc). `filters` is a list of
+    (method, column, value) tuples, e.g. ("eq", "city", "Pune").
+    """
+    if columns != "*" and key not in [c.strip() for c in columns.split(",")]:
+        columns = f"{key},{columns}"
+    q = sb.table(table).select(columns)
+    for op, column, value in filters or []:
+        q = getattr(q, op)(column, value)
+    if after is not None:
+        q = q.lt(key, after) if desc else q.gt(key, after)
+    return q.order(key, desc=desc).limit(limit).execute().data or []
+
+
+def iter_keyset(sb, table: str, key: str, columns: str = "*", page_size: int = 1000, filters: list | None = None, after=None) -> Iterator[Dict]:
+    """
+    Yield rows of `table` ordered by `key`, one page of `page_size` rows per
+    request (keyset pagination: key > last key seen).
+    """
+    last_key = after
+    while True:
+        rows = fetch_page(sb, table, key, columns, page_size, filters, last_key)
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last_key = rows[-1][key]
+
+
+def to_page(rows: List[Dict], page_size: int, key: str) -> Dict:
+    """
+    {"items", "next_cursor"} from a fetch of page_size + 1 rows. The extra
+    row only signals that another page exists; next_cursor is None on the last page.
+    """
+    items = rows[:page_size]
+    more = len(rows) > page_size
+    return {"items": items, "next_cursor": items[-1][key] if more and items else None}
+
+
+def prefix_pattern(prefix: str) -> str:
+    """ilike pattern matching values that start with `prefix` (% and _ in it match literally)."""
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}*"
+
+
+def chunks(values: List, size: int = IN_CHUNK_SIZE) -> Iterator[List]:
+    """Split `values` into lists of at most `size` (one `in_` filter each)."""
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
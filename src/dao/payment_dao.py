@@ -1,12 +1,15 @@
 
-from typing import Optional, Dict
-from src.config import get_supabase
+from typing import Optional, Dict, List
+from src.config import get_client
+from src.dao.pagination import chunks
+from src.telemetry.tracing import instrument
 
+@instrument("dao")
 class PaymentDAO:
     """Data Access Object (DAO) for Payments table."""
 
-    def __init__(self):
-        self._sb = get_supabase()
+    def __init__(self, client=None):
+        self._sb = client or get_client()
 
     # CREATE
     def create_payment(self, order_id: int, amount: float) -> Optional[Dict]:
@@ -17,8 +20,7 @@ class PaymentDAO:
             "status": "PENDING",
             "method": None
         }
-        self._sb.table("payments").insert(payload).execute()
-        resp = self._sb.table("payments").select("*").eq("order_id", order_id).limit(1).execute()
+        resp = self._sb.table("payments").insert(payload).execute()
         return resp.data[0] if resp.data else None
 
     # READ
@@ -26,15 +28,32 @@ class PaymentDAO:
         resp = self._sb.table("payments").select("*").eq("order_id", order_id).limit(1).execute()
         return resp.data[0] if resp.data else None
 
+    def get_payments_by_orders(self, order_ids: List[int]) -> Dict[int, Dict]:
+        """order_id -> payment, one `in_` select per IN_CHUNK_SIZE ids."""
+        payments = {}
+        for chunk in chunks(order_ids):
+            resp = self._sb.table("payments").select("*").in_("order_id", chunk).execute()
+            for p in resp.data or []:
+                payments.setdefault(p["order_id"], p)
+        return payments
+
     # UPDATE
     def update_payment(self, order_id: int, fields: Dict) -> Optional[Dict]:
-        self._sb.table("payments").update(fields).eq("order_id", order_id).execute()
-        resp = self._sb.table("payments").select("*").eq("order_id", order_id).limit(1).execute()
+        resp = self._sb.table("payments").update(fields).eq("order_id", order_id).execute()
         return resp.data[0] if resp.data else None
 
+    def transition_payments(self, order_ids: List[int], from_status: str, fields: Dict) -> List[Dict]:
+        """
+        Apply `fields` to the payments of `order_ids` still in `from_status`,
+        one conditional update per IN_CHUNK_SIZE ids. Returns the rows changed.
+        """
+        rows = []
+        for chunk in chunks(order_ids):
+            resp = self._sb.table("payments").update(fields).in_("order_id", chunk).eq("status", from_status).execute()
+            rows.extend(resp.data or [])
+        return rows
+
     # DELETE (optional)
     def delete_payment(self, order_id: int) -> Optional[Dict]:
-        resp_before = self._sb.table("payments").select("*").eq("order_id", order_id).limit(1).execute()
-        row = resp_before.data[0] if resp_before.data else None
-        self._sb.table("payments").delete().eq("order_id", order_id).execute()
-        return row
+        resp = self._sb.table("payments").delete().eq("order_id", order_id).execute()
+        return resp.data[0] if resp.data else None
@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, List, Dict
+from src.config import PRODUCT_CACHE_SIZE, PRODUCT_CACHE_TTL
+from src.dao.product_dao import ProductDAO
+from src.telemetry.tracing import instrument
+
+
+@instrument("dao")
+class CachedProductDAO:
+    """
+    Read-through cache in front of ProductDAO.
+
+    Rows are kept in a bounded LRU keyed by prod_id and expire after `ttl`
+    seconds. Writes made through this DAO replace or drop the cached row.
+    Reads accept consistent=True to go straight to the database; a max_size
+    of 0 disables caching altogether.
+    Anything not overridden here is delegated to the wrapped DAO.
+    """
+
+    def __init__(self, dao: Optional[ProductDAO] = None, max_size: int = PRODUCT_CACHE_SIZE, ttl: float = PRODUCT_CACHE_TTL):
+        self.dao = dao or ProductDAO()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._rows: OrderedDict = OrderedDict()  # prod_id -> (expires_at, row)
+        self._skus: Dict[str, int] = {}  # sku -> prod_id
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getattr__(self, name):
+        return getattr(self.dao, name)
+
+    # ---------- Cache internals ----------
+    def _get(self, prod_id) -> Optional[Dict]:
+        with self._lock:
+            entry = self._rows.get(prod_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(prod_id)
+                self.misses += 1
+                return None
+            self._rows.move_to_end(prod_id)
+            self.hits += 1
+            return dict(entry[1])
+
+    def _put(self, row: Optional[Dict]):
+        if not row or row.get("prod_id") is None or self.max_size <= 0:
+            return
+        with self._lock:
+            self._rows[row["prod_id"]] = (time.monotonic() + self.ttl, dict(row))
+            self._rows.move_to_end(row["prod_id"])
+            if row.get("sku") is not None:
+                self._skus[row["sku"]] = row["prod_id"]
+            while len(self._rows) > self.max_size:
+                oldest, (_, old_row) = self._rows.popitem(last=False)
+                if self._skus.get(old_row.get("sku")) == oldest:
+                    del self._skus[old_row["sku"]]
+                self.evictions += 1
+
+    def _drop(self, prod_id):
+        entry = self._rows.pop(prod_id, None)
+        if entry and entry[1].get("sku") is not None:
+            self._skus.pop(entry[1]["sku"], None)
+
+    def invalidate(self, prod_id: int | None = None):
+        """Drop one product, or the whole cache when prod_id is None."""
+        with self._lock:
+            if prod_id is None:
+                self._rows.clear()
+                self._skus.clear()
+            else:
+                self._drop(prod_id)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._rows),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    # ---------- Reads ----------
+    def get_product_by_id(self, prod_id: int, consistent: bool = False) -> Optional[Dict]:
+        if not consistent:
+            row = self._get(prod_id)
+            if row is not None:
+                return row
+        row = self.dao.get_product_by_id(prod_id)
+        self._put(row)
+        return row
+
+    def get_products_by_ids(self, prod_ids: List[int], consistent: bool = False) -> List[Dict]:
+        found, missing = [], []
+        for prod_id in dict.fromkeys(prod_ids):
+            row = None if consistent else self._get(prod_id)
+            if row is None:
+                missing.append(prod_id)
+            else:
+                found.append(row)
+        for row in self.dao.get_products_by_ids(missing) if missing else []:
+            self._put(row)
+            found.append(row)
+        return found
+
+    def get_product_by_sku(self, sku: str, consistent: bool = False) -> Optional[Dict]:
+        if not consistent:
+            prod_id = self._skus.get(sku)
+            row = self._get(prod_id) if prod_id is not None else None
+            if row is not None and row.get("sku") == sku:
+                return row
+        row = self.dao.get_product_by_sku(sku)
+        self._put(row)
+        return row
+
+    # ---------- Writes ----------
+    def create_product(self, *args, **kwargs) -> Optional[Dict]:
+        row = self.dao.create_product(*args, **kwargs)
+        self._put(row)
+        return row
+
+    def update_product(self, prod_id: int, fields: Dict) -> Optional[Dict]:
+        self.invalidate(prod_id)
+        row = self.dao.update_product(prod_id, fields)
+        self._put(row)
+        return row
+
+    def delete_product(self, prod_id: int) -> Optional[Dict]:
+        self.invalidate(prod_id)
+        return self.dao.delete_product(prod_id)
+
+    def adjust_stock(self, prod_id: int, delta: int) -> Optional[Dict]:
+        self.invalidate(prod_id)
+        row = self.dao.adjust_stock(prod_id, delta)
+        self._put(row)
+        return row
+
+    def adjust_stock_batch(self, deltas: Dict[int, int]) -> List[Dict]:
+        for prod_id in deltas:
+            self.invalidate(prod_id)
+        rows = self.dao.adjust_stock_batch(deltas)
+        for row in rows:
+            self._put(row)
+        return rows
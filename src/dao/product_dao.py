@@ -1,12 +1,17 @@
-from typing import Optional, List, Dict
-from src.config import get_supabase
+import time
+from typing import Optional, List, Dict, Iterator
+from src.config import get_client
+from src.db.rpc import is_missing_function
+from src.dao.pagination import chunks, fetch_page, iter_keyset, prefix_pattern
+from src.telemetry.tracing import instrument
 
 
+@instrument("dao")
 class ProductDAO:
     """Data Access Object (DAO) for Products table."""
 
-    def __init__(self):
-        self._sb = get_supabase()
+    def __init__(self, client=None):
+        self._sb = client or get_client()
 
     def create_product(
         self,   
@@ -23,39 +28,152 @@ class ProductDAO:
         if category is not None:
             payload["category"] = category
 
-        # Insert
-        self._sb.table("products").insert(payload).execute()
-
-        # Fetch inserted row by unique column (sku)
-        resp = self._sb.table("products").select("*").eq("sku", sku).limit(1).execute()
+        # Writes return the affected rows (Prefer: return=representation)
+        resp = self._sb.table("products").insert(payload).execute()
         return resp.data[0] if resp.data else None
 
+    def create_products(self, rows: List[Dict]) -> List[Dict]:
+        """
+        Insert many products with one multi-row insert; returns the inserted rows.
+        """
+        if not rows:
+            return []
+        resp = self._sb.table("products").insert(rows).execute()
+        return resp.data or []
+
     def get_product_by_id(self, prod_id: int) -> Optional[Dict]:
         resp = self._sb.table("products").select("*").eq("prod_id", prod_id).limit(1).execute()
         return resp.data[0] if resp.data else None
 
+    def get_products_by_ids(self, prod_ids: List[int]) -> List[Dict]:
+        """
+        Fetch several products in a single request.
+        """
+        ids = list(dict.fromkeys(prod_ids))
+        if not ids:
+            return []
+        resp = self._sb.table("products").select("*").in_("prod_id", ids).execute()
+        return resp.data or []
+
     def get_product_by_sku(self, sku: str) -> Optional[Dict]:
         resp = self._sb.table("products").select("*").eq("sku", sku).limit(1).execute()
         return resp.data[0] if resp.data else None
 
+    def get_products_by_skus(self, skus: List[str]) -> List[Dict]:
+        """Products with any of `skus`, one `in_` select per IN_CHUNK_SIZE SKUs."""
+        rows = []
+        for chunk in chunks(list(skus)):
+            resp = self._sb.table("products").select("*").in_("sku", chunk).execute()
+            rows.extend(resp.data or [])
+        return rows
+
     def update_product(self, prod_id: int, fields: Dict) -> Optional[Dict]:
         """
-        Update and then return the updated row.
+        Update and return the updated row.
         """
-        self._sb.table("products").update(fields).eq("prod_id", prod_id).execute()
-        resp = self._sb.table("products").select("*").eq("prod_id", prod_id).limit(1).execute()
+        resp = self._sb.table("products").update(fields).eq("prod_id", prod_id).execute()
         return resp.data[0] if resp.data else None
 
+    # ---------- Stock adjustments (sql/adjust_stock.sql) ----------
+    def adjust_stock(self, prod_id: int, delta: int) -> Optional[Dict]:
+        """
+        Add `delta` (may be negative) to stock in one statement, guarded by
+        stock + delta >= 0. Returns the updated row, or None if the product
+        does not exist or has too little stock.
+        """
+        try:
+            resp = self._sb.rpc("adjust_stock", {"p_prod_id": prod_id, "p_delta": delta}).execute()
+        except Exception as e:
+            if not is_missing_function(e):
+                raise
+            return self._adjust_stock_cas(prod_id, delta)
+        return resp.data[0] if resp.data else None
+
+    def adjust_stock_batch(self, deltas: Dict[int, int]) -> List[Dict]:
+        """
+        Apply {prod_id: delta} all-or-nothing in one request.
+        Raises Exception if any product is missing or would go negative.
+        """
+        payload = [{"prod_id": prod_id, "delta": delta} for prod_id, delta in deltas.items()]
+        try:
+            resp = self._sb.rpc("adjust_stock_batch", {"p_items": payload}).execute()
+        except Exception as e:
+            if not is_missing_function(e):
+                raise
+            return self._adjust_stock_batch_cas(deltas)
+        return resp.data or []
+
+    def _adjust_stock_cas(self, prod_id: int, delta: int, attempts: int = 5) -> Optional[Dict]:
+        # Without the database function: compare-and-set on the stock we read
+        for attempt in range(attempts):
+            row = self.get_product_by_id(prod_id)
+            if not row or row["stock"] + delta < 0:
+                return None
+            resp = (
+                self._sb.table("products")
+                .update({"stock": row["stock"] + delta})
+                .eq("prod_id", prod_id)
+                .eq("stock", row["stock"])
+                .execute()
+            )
+            if resp.data:
+                return resp.data[0]
+            time.sleep(0.01 * (attempt + 1))
+        raise Exception(f"Stock for product {prod_id} kept changing; giving up")
+
+    def _adjust_stock_batch_cas(self, deltas: Dict[int, int]) -> List[Dict]:
+        applied = {}
+        rows = []
+        for prod_id in sorted(deltas):
+            row = self._adjust_stock_cas(prod_id, deltas[prod_id])
+            if row is None:
+                # undo what was already applied
+                for done_id, done_delta in applied.items():
+                    self._adjust_stock_cas(done_id, -done_delta)
+                raise Exception(f"Not enough stock for product {prod_id}")
+            applied[prod_id] = deltas[prod_id]
+            rows.append(row)
+        return rows
+
     def delete_product(self, prod_id: int) -> Optional[Dict]:
-        # fetch row before delete (so we can return it)
-        resp_before = self._sb.table("products").select("*").eq("prod_id", prod_id).limit(1).execute()
-        row = resp_before.data[0] if resp_before.data else None
-        self._sb.table("products").delete().eq("prod_id", prod_id).execute()
-        return row
-
-    def list_products(self, limit: int = 100, category: str | None = None) -> List[Dict]:
-        q = self._sb.table("products").select("*").order("prod_id", desc=False).limit(limit)
+        # the delete returns the deleted row
+        resp = self._sb.table("products").delete().eq("prod_id", prod_id).execute()
+        return resp.data[0] if resp.data else None
+
+    def list_products(self, limit: int = 100, category: str | None = None, after: int | None = None) -> List[Dict]:
+        return self.search_products(category=category, after=after, limit=limit)
+
+    def search_products(
+        self,
+        name_prefix: str | None = None,
+        category: str | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        max_stock: int | None = None,
+        after: int | None = None,
+        limit: int = 100
+    ) -> List[Dict]:
+        """Up to `limit` products matching every given filter with prod_id > after, in prod_id order."""
+        filters = []
+        if name_prefix:
+            filters.append(("ilike", "name", prefix_pattern(name_prefix)))
         if category:
-            q = q.eq("category", category)
-        resp = q.execute()
-        return resp.data or []
+            filters.append(("eq", "category", category))
+        if min_price is not None:
+            filters.append(("gte", "price", min_price))
+        if max_price is not None:
+            filters.append(("lte", "price", max_price))
+        if max_stock is not None:
+            filters.append(("lte", "stock", max_stock))
+        return fetch_page(self._sb, "products", "prod_id", limit=limit, filters=filters, after=after)
+
+    def iter_products(self, page_size: int = 1000, columns: str = "*", category: str | None = None) -> Iterator[Dict]:
+        filters = [("eq", "category", category)] if category else None
+        return iter_keyset(self._sb, "products", "prod_id", columns, page_size, filters)
+
+    def iter_low_stock(self, threshold: int, category: str | None = None, columns: str = "*", page_size: int = 1000) -> Iterator[Dict]:
+        """Products with stock <= threshold, in prod_id order; filtered by the backend (products_stock_idx)."""
+        filters = [("lte", "stock", threshold)]
+        if category:
+            filters.append(("eq", "category", category))
+        return iter_keyset(self._sb, "products", "prod_id", columns, page_size, filters)
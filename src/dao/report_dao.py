@@ -1,17 +1,77 @@
-from typing import List, Dict
-from src.config import get_supabase
+from typing import List, Dict, Optional, Iterator, Tuple
+from src.config import get_client, REPORT_PAGE_SIZE
 from collections import defaultdict
+from src.db.rpc import is_missing_function
+from src.dao.pagination import chunks, fetch_page, iter_keyset
+from src.telemetry.tracing import instrument
 
+@instrument("dao")
 class ReportDAO:
     """DAO for reporting queries."""
 
-    def __init__(self):
-        self._sb = get_supabase()
+    def __init__(self, client=None, page_size: int = REPORT_PAGE_SIZE):
+        self._sb = client or get_client()
+        self.page_size = page_size
+        self._missing_functions = set()
 
+    # ---------- Streaming readers ----------
+    # Rows are fetched in pages ordered by primary key (keyset pagination),
+    # so memory stays flat and no server-side row cap can truncate a report.
+    def iter_orders(
+        self,
+        columns: str = "*",
+        since: str | None = None,
+        until: str | None = None,
+        status: str | None = None,
+        after_id: int | None = None
+    ) -> Iterator[Dict]:
+        """
+        Orders, optionally only those with since <= order_date < until,
+        a given status, or order_id > after_id.
+        """
+        filters = []
+        if since:
+            filters.append(("gte", "order_date", since))
+        if until:
+            filters.append(("lt", "order_date", until))
+        if status:
+            filters.append(("eq", "status", status))
+        return self._iter_rows("orders", "order_id", columns, filters, after=after_id)
+
+    def iter_status_log(self, columns: str = "*", after_id: int | None = None, before: str | None = None) -> Iterator[Dict]:
+        """order_status_log entries (sql/report_state.sql) with log_id > after_id and logged_at < before."""
+        filters = [("lt", "logged_at", before)] if before else []
+        return self._iter_rows("order_status_log", "log_id", columns, filters, after=after_id)
+
+    def iter_order_items(self, columns: str = "*") -> Iterator[Dict]:
+        return self._iter_rows("order_items", "item_id", columns)
+
+    def iter_products(self, columns: str = "*") -> Iterator[Dict]:
+        return self._iter_rows("products", "prod_id", columns)
+
+    def iter_customers(self, columns: str = "*") -> Iterator[Dict]:
+        return self._iter_rows("customers", "cust_id", columns)
+
+    def iter_key_range(self, table: str, key: str, columns: str = "*", after=None, upto=None) -> Iterator[Dict]:
+        """Rows of `table` with after < key <= upto (either bound optional), in key order."""
+        filters = [("lte", key, upto)] if upto is not None else []
+        return self._iter_rows(table, key, columns, filters, after=after)
+
+    def key_bounds(self, table: str, key: str) -> Optional[Tuple[int, int]]:
+        """Smallest and largest `key` in `table`, or None when it is empty."""
+        first = fetch_page(self._sb, table, key, key, limit=1)
+        if not first:
+            return None
+        last = fetch_page(self._sb, table, key, key, limit=1, desc=True)
+        return first[0][key], last[0][key]
+
+    def _iter_rows(self, table: str, key: str, columns: str, filters: list | None = None, after=None) -> Iterator[Dict]:
+        return iter_keyset(self._sb, table, key, columns, self.page_size, filters, after)
+
+    # ---------- Whole-table reads ----------
     def get_all_orders(self) -> List[Dict]:
         # Returns raw orders rows (contains at least order_id, cust_id, order_date, status, total_amount)
-        resp = self._sb.table("orders").select("*").execute()
-        return resp.data or []
+        return list(self.iter_orders())
 
     def get_order_items(self, order_id: int) -> List[Dict]:
         # Returns items rows (contains at least item_id, order_id, prod_id, quantity, price)
@@ -19,9 +79,60 @@ class ReportDAO:
         return resp.data or []
 
     def get_all_products(self) -> List[Dict]:
-        resp = self._sb.table("products").select("*").execute()
-        return resp.data or []
+        return list(self.iter_products())
 
     def get_all_customers(self) -> List[Dict]:
-        resp = self._sb.table("customers").select("*").execute()
-        return resp.data or []
+        return list(self.iter_customers())
+
+    def get_orders_by_ids(self, order_ids: List[int], columns: str = "*") -> List[Dict]:
+        return self._select_in("orders", "order_id", order_ids, columns)
+
+    def get_items_for_orders(self, order_ids: List[int], columns: str = "*") -> List[Dict]:
+        return self._select_in("order_items", "order_id", order_ids, columns)
+
+    def _select_in(self, table: str, column: str, values: List, columns: str) -> List[Dict]:
+        rows = []
+        for chunk in chunks(values):
+            resp = self._sb.table(table).select(columns).in_(column, chunk).execute()
+            rows.extend(resp.data or [])
+        return rows
+
+    def get_product_names(self, prod_ids: List[int]) -> Dict[int, str]:
+        rows = self._select_in("products", "prod_id", list(prod_ids), "prod_id,name")
+        return {p["prod_id"]: p.get("name") for p in rows}
+
+    def get_product_categories(self, prod_ids: List[int]) -> Dict[int, str]:
+        rows = self._select_in("products", "prod_id", prod_ids, "prod_id,category")
+        return {p["prod_id"]: p.get("category") for p in rows}
+
+    def get_customer_cities(self, cust_ids: List[int]) -> Dict[int, str]:
+        rows = self._select_in("customers", "cust_id", cust_ids, "cust_id,city")
+        return {c["cust_id"]: c.get("city") for c in rows}
+
+    # ---------- Server-side aggregations (sql/report_functions.sql) ----------
+    # Each returns None when the database function is not installed.
+    def top_selling_products(self, top_n: int) -> Optional[List[Dict]]:
+        return self._call("top_selling_products", {"p_top_n": top_n})
+
+    def revenue_between(self, start: str, end: str) -> Optional[float]:
+        total = self._call("revenue_between", {"p_start": start, "p_end": end})
+        return None if total is None else float(total)
+
+    def orders_per_customer(self, min_orders: int | None = None) -> Optional[List[Dict]]:
+        return self._call("orders_per_customer", {"p_min_orders": min_orders})
+
+    def product_sales_since(self, since: str) -> Optional[List[Dict]]:
+        """[{"prod_id", "quantity"}] sold in non-cancelled orders with order_date >= since."""
+        return self._call("product_sales_since", {"p_since": since})
+
+    def _call(self, function: str, params: Dict):
+        if function in self._missing_functions:
+            return None
+        try:
+            resp = self._sb.rpc(function, params).execute()
+        except Exception as e:
+            if is_missing_function(e):
+                self._missing_functions.add(function)
+                return None
+            raise
+        return resp.data
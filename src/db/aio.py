@@ -0,0 +1,55 @@
+"""
+Shared plumbing for the asyncio DAOs and services.
+
+Blocking backend calls run on one thread pool (ASYNC_MAX_WORKERS threads)
+and are awaited from the event loop. AsyncFacade turns every public method
+of a synchronous object into a coroutine with the same name, arguments and
+exceptions, and turns iter_* readers into async generators.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from src.config import ASYNC_MAX_WORKERS
+
+_executor = ThreadPoolExecutor(max_workers=ASYNC_MAX_WORKERS, thread_name_prefix="backend")
+
+# Rows pulled from a wrapped iterator per thread hop
+ITER_BATCH = 500
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking callable on the backend thread pool and await its result."""
+    loop = asyncio.get_running_loop()
+    # Carry the caller's context over so trace spans nest under the awaiting task
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, functools.partial(ctx.run, fn, *args, **kwargs))
+
+
+class AsyncFacade:
+    """Coroutine facade over a synchronous object, available as `.sync`."""
+
+    def __init__(self, sync):
+        self.sync = sync
+
+    def __getattr__(self, name):
+        attr = getattr(self.sync, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        if name.startswith("iter_"):
+            return functools.partial(self._aiter, attr)
+
+        async def call(*args, **kwargs):
+            return await run_blocking(attr, *args, **kwargs)
+        call.__name__ = name
+        return call
+
+    async def _aiter(self, method, *args, **kwargs):
+        rows = await run_blocking(method, *args, **kwargs)
+        while True:
+            batch = await run_blocking(lambda: list(islice(rows, ITER_BATCH)))
+            if not batch:
+                return
+            for row in batch:
+                yield row
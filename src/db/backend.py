@@ -0,0 +1,60 @@
+"""
+Storage backends.
+
+A backend is any client exposing the PostgREST-style query builder the
+DAOs are written against: `table(name)` and `rpc(name, params)`. The
+supabase client and SQLiteClient both qualify. DB_BACKEND picks which one
+`src.config.get_client()` hands to the DAOs; other backends can be added
+with register_backend(). With DB_CALL_LAYER on, each client is wrapped in
+a ResilientClient (src/db/resilience.py) when first created.
+"""
+import threading
+from typing import Any, Callable, Dict, Protocol
+
+
+class Backend(Protocol):
+    def table(self, name: str) -> Any: ...
+
+    def rpc(self, name: str, params: Dict | None = None) -> Any: ...
+
+
+_factories: Dict[str, Callable[[], Backend]] = {}
+_instances: Dict[str, Backend] = {}
+_lock = threading.Lock()
+
+
+def register_backend(name: str, factory: Callable[[], Backend]):
+    """Register a zero-argument factory under `name` (replacing any previous one)."""
+    with _lock:
+        _factories[name] = factory
+        _instances.pop(name, None)
+
+
+def get_backend(name: str) -> Backend:
+    """Return the process-wide client for backend `name`, creating it on first use."""
+    with _lock:
+        if name not in _instances:
+            if name not in _factories:
+                raise RuntimeError(f"Unknown DB_BACKEND '{name}' (available: {', '.join(sorted(_factories))})")
+            client = _factories[name]()
+            from src.config import DB_CALL_LAYER
+            if DB_CALL_LAYER:
+                from src.db.resilience import from_config
+                client = from_config(client)
+            _instances[name] = client
+        return _instances[name]
+
+
+def _supabase() -> Backend:
+    from src.config import get_supabase
+    return get_supabase()
+
+
+def _sqlite() -> Backend:
+    from src.config import SQLITE_PATH
+    from src.db.sqlite_backend import SQLiteClient
+    return SQLiteClient(SQLITE_PATH)
+
+
+register_backend("supabase", _supabase)
+register_backend("sqlite", _sqlite)
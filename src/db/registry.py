@@ -0,0 +1,182 @@
+"""
+Process-wide registry of data-access clients.
+
+Every DAO gets its client from here, so a process holds one Supabase client
+per (url, key) and every DAO using it sends its requests over that client's
+keep-alive httpx connection pool (HTTP/2 when the `h2` package is installed).
+Pool size, timeouts and retries come from src.config. A request made
+inside a resilience.deadline() gets at most the time left as its timeout.
+"""
+import threading
+import time
+from typing import Dict, Tuple
+
+import httpx
+from supabase import Client, ClientOptions, create_client
+
+from src import config
+from src.db.resilience import remaining
+
+# Requests that never reached the server can always be retried; responses
+# with these statuses are only retried for idempotent methods. With
+# DB_CALL_LAYER on, the call layer (src/db/resilience.py) does all retrying
+# (within deadlines and circuit breakers), so the transport retries nothing.
+RETRY_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class PoolMetrics:
+    """Thread-safe counters describing how the shared pool is used."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.retries = 0
+        self.errors = 0
+
+    def started(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def finished(self, failed: bool = False):
+        with self._lock:
+            self.in_flight -= 1
+            if failed:
+                self.errors += 1
+
+    def retried(self):
+        with self._lock:
+            self.retries += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "retries": self.retries,
+                "errors": self.errors,
+            }
+
+
+class RetryTransport(httpx.HTTPTransport):
+    """
+    httpx transport that retries connection failures, and 429/5xx responses
+    to idempotent requests, with exponential backoff. Caps each attempt's
+    timeouts at the current deadline. Records pool metrics.
+    """
+
+    def __init__(self, retries: int, backoff: float, metrics: PoolMetrics, **kwargs):
+        super().__init__(**kwargs)
+        self.retries = retries
+        self.backoff = backoff
+        self.metrics = metrics
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        idempotent = request.method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            _cap_timeouts(request)
+            self.metrics.started()
+            try:
+                response = super().handle_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                self.metrics.finished(failed=True)
+                if attempt >= self.retries:
+                    raise
+            except httpx.TransportError:
+                self.metrics.finished(failed=True)
+                if attempt >= self.retries or not idempotent:
+                    raise
+            else:
+                self.metrics.finished(failed=response.status_code >= 500)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries or not idempotent:
+                    return response
+                response.close()
+            time.sleep(self.backoff * (2 ** attempt))
+            attempt += 1
+            self.metrics.retried()
+
+    def open_connections(self) -> int:
+        return len(getattr(self._pool, "connections", []))
+
+
+def _cap_timeouts(request: httpx.Request):
+    # Within a deadline, no phase of the request may wait longer than the time left
+    left = remaining()
+    if left is None:
+        return
+    left = max(left, 0.001)
+    timeouts = request.extensions.get("timeout") or {}
+    request.extensions["timeout"] = {
+        phase: left if timeouts.get(phase) is None else min(timeouts[phase], left)
+        for phase in ("connect", "read", "write", "pool")
+    }
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+_lock = threading.Lock()
+_clients: Dict[Tuple[str, str], Client] = {}
+_transports: Dict[Tuple[str, str], RetryTransport] = {}
+_metrics = PoolMetrics()
+
+
+def _build_http_client(transport_key: Tuple[str, str]) -> httpx.Client:
+    http2 = config.DB_HTTP2 and _http2_available()
+    transport = RetryTransport(
+        retries=0 if config.DB_CALL_LAYER else config.DB_RETRIES,
+        backoff=config.DB_RETRY_BACKOFF,
+        metrics=_metrics,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=config.DB_POOL_SIZE,
+            max_keepalive_connections=config.DB_POOL_SIZE,
+            keepalive_expiry=config.DB_KEEPALIVE_EXPIRY,
+        ),
+    )
+    _transports[transport_key] = transport
+    timeout = httpx.Timeout(config.DB_TIMEOUT, connect=config.DB_CONNECT_TIMEOUT)
+    return httpx.Client(transport=transport, timeout=timeout, http2=http2)
+
+
+def get_client(url: str, key: str) -> Client:
+    """Return the shared client for (url, key), creating it on first use."""
+    with _lock:
+        client = _clients.get((url, key))
+        if client is None:
+            options = ClientOptions(
+                postgrest_client_timeout=config.DB_TIMEOUT,
+                httpx_client=_build_http_client((url, key)),
+            )
+            client = create_client(url, key, options=options)
+            _clients[(url, key)] = client
+        return client
+
+
+def pool_metrics() -> Dict[str, int]:
+    """Request/retry counters plus the number of clients and open connections."""
+    stats = _metrics.snapshot()
+    with _lock:
+        stats["clients"] = len(_clients)
+        stats["open_connections"] = sum(t.open_connections() for t in _transports.values())
+    return stats
+
+
+def close_all():
+    """Drop every registered client and close their connection pools."""
+    with _lock:
+        for transport in _transports.values():
+            transport.close()
+        _transports.clear()
+        _clients.clear()
@@ -0,0 +1,321 @@
+"""
+Call-execution layer between the DAOs and a backend client.
+
+ResilientClient wraps any backend (see src/db/backend.py) and runs every
+request's execute() through a CallExecutor, which adds:
+
+- single-flight: identical reads in flight at the same moment share one
+  request (a write in this process starts a new generation, so a read
+  issued after it never joins a read issued before it);
+- retries of transient failures (connection errors, 429/5xx, PostgREST
+  connection errors) with exponential backoff and full jitter, for reads
+  and read-only database functions. Writes are only retried when the
+  request provably never left (connect errors), because a lost response
+  may hide an applied write. The HTTP transport does not retry on its own
+  while this layer is on (src/db/registry.py);
+- a circuit breaker per table / function: after DB_BREAKER_THRESHOLD
+  consecutive transient failures, calls fail fast with CircuitOpenError
+  for DB_BREAKER_COOLDOWN seconds, then one probe decides whether it closes;
+- deadlines: `with deadline(seconds):` bounds every call made inside it,
+  in this thread and in the threads that copy its context (the report
+  pool, the asyncio backend pool). Attempts and backoff sleeps that
+  would overrun it raise DeadlineExceeded, and the HTTP transport gives
+  each request the time left as its timeout (src/db/registry.py).
+
+Failures that are not transient (constraint violations, missing
+functions, ...) pass through unchanged. Transient ones that cannot be
+retried surface as BackendUnavailable.
+"""
+import contextvars
+import copy
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from src.db.rpc import READ_ONLY_FUNCTIONS
+
+# Error codes / HTTP statuses worth another attempt
+TRANSIENT_CODES = {"429", "500", "502", "503", "504", "PGRST000", "PGRST001", "PGRST002", "PGRST003", "40001", "40P01"}
+# Exception class names (httpx and builtins) for requests that failed on the way
+TRANSIENT_ERRORS = {"TransportError", "TimeoutException", "ConnectionError", "TimeoutError"}
+# ... of which these mean the request was never sent, so even a write may be retried
+UNSENT_ERRORS = {"ConnectError", "ConnectTimeout", "PoolTimeout", "ConnectionRefusedError"}
+WRITE_OPS = {"insert", "update", "upsert", "delete"}
+
+
+class BackendUnavailable(Exception):
+    """A call failed transiently and could not (or may not) be retried."""
+
+    def __init__(self, message: str, target: str | None = None):
+        super().__init__(message)
+        self.target = target
+
+
+class CircuitOpenError(BackendUnavailable):
+    pass
+
+
+class DeadlineExceeded(BackendUnavailable):
+    pass
+
+
+def is_transient(error: Exception) -> bool:
+    if str(getattr(error, "code", None)) in TRANSIENT_CODES:
+        return True
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+
+def is_unsent(error: Exception) -> bool:
+    return any(cls.__name__ in UNSENT_ERRORS for cls in type(error).__mro__)
+
+
+# ---------- Deadlines ----------
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: float):
+    """Calls inside must finish within `seconds` (or an enclosing, earlier deadline)."""
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(current, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+# ---------- Circuit breaker ----------
+class CircuitBreaker:
+    """closed -> open after `threshold` consecutive failures -> half_open after `cooldown` s -> closed on success."""
+
+    def __init__(self, threshold: int, cooldown: float, clock: Callable[[], float] = time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self._clock() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._clock() - self.opened_at < self.cooldown or self._probing:
+                return False
+            self._probing = True  # one probe at a time while half open
+            return True
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def abandon(self):
+        # A call was interrupted before it had an outcome: free the probe slot
+        with self._lock:
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.threshold:
+                self.opened_at = self._clock()
+            self._probing = False
+
+
+# ---------- Executor ----------
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class CallExecutor:
+    def __init__(
+        self,
+        retries: int = 2,
+        backoff: float = 0.05,
+        max_backoff: float = 1.0,
+        breaker_threshold: int = 5,
+        breaker_cooldown: float = 10.0,
+        sleep: Callable[[float], None] = time.sleep,
+        jitter: Callable[[], float] = random.random,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._sleep = sleep
+        self._jitter = jitter
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._flights: Dict[tuple, _Flight] = {}
+        self._generation = 0
+        self.counters = {"calls": 0, "coalesced": 0, "retries": 0, "rejected": 0, "failed": 0}
+
+    def breaker(self, target: str) -> CircuitBreaker:
+        with self._lock:
+            if target not in self._breakers:
+                self._breakers[target] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return self._breakers[target]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = {t: b.state for t, b in self._breakers.items() if b.state != "closed"}
+            return {**self.counters, "open_circuits": breakers}
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def execute(self, target: str, request: str, read: bool, run: Callable[[], Any]):
+        """
+        Run `run` (one backend request to `target`). `request` describes it
+        fully, so that identical reads can share one flight.
+        """
+        self._count("calls")
+        if not read:
+            try:
+                return self._attempt(target, run, idempotent=False)
+            finally:
+                with self._lock:
+                    self._generation += 1
+        with self._lock:
+            key = (target, request, self._generation)
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            self._count("coalesced")
+            flight.done.wait(remaining())
+            if not flight.done.is_set():
+                raise DeadlineExceeded(f"Deadline exceeded waiting for {target}", target)
+            if flight.error is not None:
+                raise flight.error
+            # The leader's caller owns the original rows
+            return copy.deepcopy(flight.result)
+        try:
+            flight.result = self._attempt(target, run, idempotent=True)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _attempt(self, target: str, run: Callable[[], Any], idempotent: bool):
+        breaker = self.breaker(target)
+        attempt = 0
+        while True:
+            left = remaining()
+            if left is not None and left <= 0:
+                raise DeadlineExceeded(f"Deadline exceeded before calling {target}", target)
+            if not breaker.allow():
+                self._count("rejected")
+                raise CircuitOpenError(f"Circuit open for {target}; backend calls are failing", target)
+            error, settled = None, False
+            try:
+                result = run()
+                settled = True
+            except Exception as e:
+                error, settled = e, True
+            finally:
+                if not settled:
+                    breaker.abandon()  # KeyboardInterrupt and the like
+            if error is None:
+                breaker.success()
+                return result
+            if not is_transient(error):
+                breaker.success()  # the backend answered
+                raise error
+            breaker.failure()
+            if not (idempotent or is_unsent(error)) or attempt >= self.retries:
+                self._count("failed")
+                raise BackendUnavailable(f"{target} unavailable: {error}", target) from error
+            delay = self._jitter() * min(self.max_backoff, self.backoff * 2 ** attempt)
+            left = remaining()
+            if left is not None and left <= delay:
+                raise DeadlineExceeded(f"Deadline exceeded retrying {target}: {error}", target) from error
+            self._count("retries")
+            self._sleep(delay)
+            attempt += 1
+
+
+# ---------- Client wrapper ----------
+class _Request:
+    """Stands in for a query builder: forwards each call and remembers it."""
+
+    def __init__(self, executor: CallExecutor, target: str, builder, read: bool | None = None, calls: tuple = ()):
+        self._executor = executor
+        self._target = target
+        self._builder = builder
+        self._read = read
+        self._calls = calls
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            read = self._read
+            if read is None and (name == "select" or name in WRITE_OPS):
+                read = name == "select"
+            return _Request(self._executor, self._target, attr(*args, **kwargs), read, self._calls + ((name, args, kwargs),))
+        return call
+
+    def execute(self):
+        # Only reads need a description of the request (their single-flight key)
+        request = repr(self._calls) if self._read else ""
+        return self._executor.execute(self._target, request, bool(self._read), self._builder.execute)
+
+
+class ResilientClient:
+    """Backend wrapper sending every request through a CallExecutor."""
+
+    def __init__(self, client, executor: CallExecutor | None = None):
+        self.client = client
+        self.executor = executor or CallExecutor()
+
+    def table(self, name: str) -> _Request:
+        return _Request(self.executor, name, self.client.table(name))
+
+    def rpc(self, name: str, params: Dict | None = None) -> _Request:
+        return _Request(self.executor, f"rpc/{name}", self.client.rpc(name, params), name in READ_ONLY_FUNCTIONS, (params,))
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def from_config(client) -> ResilientClient:
+    from src import config
+    executor = CallExecutor(
+        retries=config.DB_RETRIES,
+        backoff=config.DB_RETRY_BACKOFF,
+        max_backoff=config.DB_RETRY_BACKOFF_MAX,
+        breaker_threshold=config.DB_BREAKER_THRESHOLD,
+        breaker_cooldown=config.DB_BREAKER_COOLDOWN,
+    )
+    return ResilientClient(client, executor)
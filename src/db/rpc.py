@@ -0,0 +1,13 @@
+"""Helpers for calling database functions through PostgREST rpc()."""
+
+# PostgREST / Postgres error codes meaning "no such function"
+MISSING_FUNCTION_CODES = {"PGRST202", "42883"}
+
+
+def is_missing_function(error: Exception) -> bool:
+    """True when `error` says the called database function is not installed."""
+    return getattr(error, "code", None) in MISSING_FUNCTION_CODES
+
+# Database functions that only read, so the call layer may retry and
+# coalesce them (src/db/resilience.py); any other function is treated as a write
+READ_ONLY_FUNCTIONS = {"top_selling_products", "revenue_between", "orders_per_customer", "product_sales_since"}
@@ -0,0 +1,544 @@
+"""
+SQLite storage backend.
+
+SQLiteClient implements the part of the PostgREST query builder the DAOs
+use (table().select/insert/update/delete, filters, order/limit/range,
+embedded resources in select lists and rpc()) on top of the standard library's sqlite3, with the same tables and
+indexes as the Supabase schema and Python versions of the database
+functions in sql/. Select it with DB_BACKEND=sqlite (and SQLITE_PATH).
+It also serves as the deterministic stand-in for benchmarks.
+"""
+import json
+import sqlite3
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+# Foreign keys resource embedding follows, as PostgREST derives them from the
+# schema: (table, embedded table) -> (column on table, column on embedded, to-many)
+RELATIONSHIPS = {
+    ("orders", "order_items"): ("order_id", "order_id", True),
+    ("orders", "payments"): ("order_id", "order_id", True),
+    ("orders", "customers"): ("cust_id", "cust_id", False),
+    ("order_items", "orders"): ("order_id", "order_id", False),
+    ("order_items", "products"): ("prod_id", "prod_id", False),
+    ("payments", "orders"): ("order_id", "order_id", False),
+    ("customers", "orders"): ("cust_id", "cust_id", True),
+    ("products", "order_items"): ("prod_id", "prod_id", True),
+}
+
+# Bound parameters per IN (...) when fetching embedded rows
+_EMBED_CHUNK = 500
+
+# sqlite3 constraint failures -> the Postgres error code PostgREST would report
+CONSTRAINT_CODES = {
+    "UNIQUE constraint failed": "23505",
+    "FOREIGN KEY constraint failed": "23503",
+    "NOT NULL constraint failed": "23502",
+    "CHECK constraint failed": "23514",
+}
+
+SCHEMA = """
+create table if not exists products (
+    prod_id integer primary key autoincrement,
+    name text not null,
+    sku text not null unique,
+    price real not null,
+    stock integer not null default 0,
+    category text
+);
+create table if not exists customers (
+    cust_id integer primary key autoincrement,
+    name text not null,
+    email text not null unique,
+    phone text,
+    city text
+);
+create table if not exists orders (
+    order_id integer primary key autoincrement,
+    cust_id integer not null references customers (cust_id),
+    order_date text not null default (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    status text not null default 'PLACED',
+    total_amount real not null default 0
+);
+create table if not exists order_items (
+    item_id integer primary key autoincrement,
+    order_id integer not null references orders (order_id),
+    prod_id integer not null references products (prod_id),
+    quantity integer not null,
+    price real not null
+);
+create table if not exists payments (
+    payment_id integer primary key autoincrement,
+    order_id integer not null references orders (order_id),
+    amount real not null,
+    status text not null default 'PENDING',
+    method text
+);
+create table if not exists order_status_log (
+    log_id integer primary key autoincrement,
+    order_id integer not null references orders (order_id),
+    cancelled integer not null,
+    logged_at text not null default (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+);
+create trigger if not exists orders_cancellation_log after update of status on orders
+when (old.status = 'CANCELLED') <> (new.status = 'CANCELLED')
+begin
+    insert into order_status_log (order_id, cancelled) values (new.order_id, new.status = 'CANCELLED');
+end;
+create index if not exists products_category_idx on products (category);
+create index if not exists products_price_idx on products (price);
+create index if not exists products_name_idx on products (name collate nocase);
+create index if not exists products_stock_idx on products (stock);
+create index if not exists customers_city_idx on customers (city);
+create index if not exists customers_name_idx on customers (name collate nocase);
+create index if not exists orders_cust_id_idx on orders (cust_id);
+create index if not exists orders_order_date_idx on orders (order_date);
+create index if not exists orders_placed_idx on orders (order_id) where status = 'PLACED';
+create index if not exists order_items_order_id_idx on order_items (order_id);
+create index if not exists order_items_prod_id_idx on order_items (prod_id);
+create index if not exists payments_order_id_idx on payments (order_id);
+"""
+
+# Run once, when order_status_log is created: orders cancelled before it existed
+BACKFILL_STATUS_LOG = """
+insert into order_status_log (order_id, cancelled)
+select order_id, 1 from orders where status = 'CANCELLED' order by order_id
+"""
+
+
+class SQLiteError(Exception):
+    """Mirrors postgrest's APIError: carries a message and an error code."""
+
+    def __init__(self, message: str, code: str | None = None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+
+@dataclass
+class SQLiteResponse:
+    data: Any
+    count: Optional[int] = None
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _encode(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _split_columns(columns: str) -> List[str]:
+    """Split a select list on top-level commas: "*, items:order_items(*, products(name))"."""
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(columns):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(columns[start:i])
+            start = i + 1
+    parts.append(columns[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _parse_select(columns: str):
+    """(plain columns, [(key, table, inner select), ...]) for a PostgREST select list."""
+    plain, embeds = [], []
+    for part in _split_columns(columns):
+        if part.endswith(")") and "(" in part:
+            head, inner = part[:-1].split("(", 1)
+            key, _, table = head.partition(":")
+            table = (table or key).split("!")[0].strip()
+            embeds.append((key.strip(), table, inner))
+        else:
+            plain.append(part)
+    return plain, embeds
+
+
+def _select(conn: sqlite3.Connection, table: str, columns: str, where: str = "", params=(), suffix: str = "") -> List[Dict]:
+    plain, embeds = _parse_select(columns)
+    # Join columns must be read even when not selected; they are dropped again below
+    needed = [RELATIONSHIPS[(table, t)][0] for _, t, _ in embeds if (table, t) in RELATIONSHIPS]
+    extra = [] if not plain or "*" in plain else [c for c in dict.fromkeys(needed) if c not in plain]
+    cols = "*" if not plain or "*" in plain else ", ".join(_quote(c) for c in plain + extra)
+    rows = [dict(r) for r in conn.execute(f"SELECT {cols} FROM {_quote(table)}{where}{suffix}", list(params))]
+    for key, target, inner in embeds:
+        _embed(conn, table, rows, key, target, inner)
+    for row in rows:
+        for c in extra:
+            del row[c]
+    return rows
+
+
+def _embed(conn: sqlite3.Connection, table: str, rows: List[Dict], key: str, target: str, inner: str):
+    if (table, target) not in RELATIONSHIPS:
+        raise SQLiteError(f"Could not find a relationship between '{table}' and '{target}'", code="PGRST200")
+    local, foreign, many = RELATIONSHIPS[(table, target)]
+    values = list({r[local] for r in rows if r.get(local) is not None})
+    plain, _ = _parse_select(inner)
+    if plain and "*" not in plain and foreign not in plain:
+        select, drop = f"{foreign},{inner}", True
+    else:
+        select, drop = inner, False
+    related = defaultdict(list)
+    for i in range(0, len(values), _EMBED_CHUNK):
+        chunk = values[i:i + _EMBED_CHUNK]
+        where = f" WHERE {_quote(foreign)} IN ({', '.join('?' for _ in chunk)})"
+        for child in _select(conn, target, select, where, chunk, " ORDER BY rowid"):
+            related[child[foreign]].append(child)
+    for row in rows:
+        children = related.get(row.get(local), [])
+        if drop:
+            children = [{k: v for k, v in c.items() if k != foreign} for c in children]
+        row[key] = children if many else (children[0] if children else None)
+
+
+class _Query:
+    """One request against a table; built fluently and sent by execute()."""
+
+    def __init__(self, client: "SQLiteClient", table: str):
+        self._client = client
+        self._table = table
+        self._op = "select"
+        self._columns = "*"
+        self._count = None
+        self._payload = None
+        self._where: List[str] = []
+        self._params: List[Any] = []
+        self._order: List[str] = []
+        self._limit: Optional[int] = None
+        self._offset: Optional[int] = None
+
+    # ---------- operations ----------
+    def select(self, columns: str = "*", count: str | None = None):
+        self._op = "select"
+        self._columns = columns
+        self._count = count
+        return self
+
+    def insert(self, payload, **_):
+        self._op = "insert"
+        self._payload = payload
+        return self
+
+    def update(self, fields: Dict, **_):
+        self._op = "update"
+        self._payload = fields
+        return self
+
+    def delete(self, **_):
+        self._op = "delete"
+        return self
+
+    # ---------- filters ----------
+    def _filter(self, column: str, op: str, value):
+        self._where.append(f"{_quote(column)} {op} ?")
+        self._params.append(_encode(value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "=", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "!=", value)
+
+    def gt(self, column, value):
+        return self._filter(column, ">", value)
+
+    def gte(self, column, value):
+        return self._filter(column, ">=", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "<", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "<=", value)
+
+    def like(self, column, pattern):
+        return self._filter(column, "LIKE", pattern.replace("*", "%"))
+
+    def ilike(self, column, pattern):
+        # SQLite's LIKE is case-insensitive (ASCII), and can use a NOCASE index for prefixes
+        self._where.append(f"{_quote(column)} LIKE ? ESCAPE '\\'")
+        self._params.append(pattern.replace("*", "%"))
+        return self
+
+    def is_(self, column, value):
+        if value is None or value == "null":
+            self._where.append(f"{_quote(column)} IS NULL")
+            return self
+        return self._filter(column, "IS", value)
+
+    def in_(self, column, values):
+        values = list(values)
+        if not values:
+            self._where.append("0")
+            return self
+        self._where.append(f"{_quote(column)} IN ({', '.join('?' for _ in values)})")
+        self._params.extend(_encode(v) for v in values)
+        return self
+
+    # ---------- modifiers ----------
+    def order(self, column: str, desc: bool = False, **_):
+        self._order.append(f"{_quote(column)} {'DESC' if desc else 'ASC'}")
+        return self
+
+    def limit(self, size: int, **_):
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int, **_):
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    # ---------- execution ----------
+    def _where_sql(self) -> str:
+        return f" WHERE {' AND '.join(self._where)}" if self._where else ""
+
+    def _run(self, conn: sqlite3.Connection):
+        table = _quote(self._table)
+        if self._op == "select":
+            suffix = ""
+            if self._order:
+                suffix += f" ORDER BY {', '.join(self._order)}"
+            if self._limit is not None:
+                suffix += f" LIMIT {int(self._limit)}"
+                if self._offset:
+                    suffix += f" OFFSET {int(self._offset)}"
+            data = _select(conn, self._table, self._columns, self._where_sql(), self._params, suffix)
+            count = None
+            if self._count:
+                count = conn.execute(f"SELECT count(*) FROM {table}{self._where_sql()}", self._params).fetchone()[0]
+            return SQLiteResponse(data, count)
+
+        if self._op == "insert":
+            rows = self._payload if isinstance(self._payload, list) else [self._payload]
+            data = []
+            with conn:
+                for row in rows:
+                    cols = list(row)
+                    sql = (
+                        f"INSERT INTO {table} ({', '.join(_quote(c) for c in cols)}) "
+                        f"VALUES ({', '.join('?' for _ in cols)}) RETURNING *"
+                    )
+                    data.extend(dict(r) for r in conn.execute(sql, [_encode(row[c]) for c in cols]).fetchall())
+            return SQLiteResponse(data)
+
+        if self._op == "update":
+            cols = list(self._payload)
+            sets = ", ".join(f"{_quote(c)} = ?" for c in cols)
+            sql = f"UPDATE {table} SET {sets}{self._where_sql()} RETURNING *"
+            with conn:
+                rows = conn.execute(sql, [_encode(self._payload[c]) for c in cols] + self._params).fetchall()
+            return SQLiteResponse([dict(r) for r in rows])
+
+        if self._op == "delete":
+            sql = f"DELETE FROM {table}{self._where_sql()} RETURNING *"
+            with conn:
+                rows = conn.execute(sql, self._params).fetchall()
+            return SQLiteResponse([dict(r) for r in rows])
+
+        raise SQLiteError(f"Unsupported operation: {self._op}")
+
+    def execute(self) -> SQLiteResponse:
+        return self._client._send(self._table, self._op, self._run, body=(self._payload, self._params))
+
+
+class _RPC:
+    def __init__(self, client: "SQLiteClient", name: str, params: Dict):
+        self._client = client
+        self._name = name
+        self._params = params or {}
+
+    def execute(self) -> SQLiteResponse:
+        def run(conn):
+            fn = self._client.functions.get(self._name)
+            if fn is None:
+                raise SQLiteError(f"Could not find the function {self._name}", code="PGRST202")
+            with conn:
+                return SQLiteResponse(fn(conn, self._params))
+        return self._client._send(f"rpc/{self._name}", "rpc", run, body=self._params)
+
+
+class SQLiteClient:
+    """
+    Drop-in replacement for the supabase Client backed by one sqlite3
+    connection. Requests are serialised with a lock, so one client can be
+    shared by every DAO and thread in the process.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.functions: Dict[str, Callable] = dict(FUNCTIONS)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        new_log = not self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'order_status_log'").fetchone()
+        self._conn.executescript(SCHEMA)
+        if new_log:
+            with self._conn:
+                self._conn.execute(BACKFILL_STATUS_LOG)
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+    def rpc(self, name: str, params: Dict | None = None) -> _RPC:
+        return _RPC(self, name, params)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _send(self, target: str, op: str, run: Callable, body: Any = None):
+        # Every request funnels through here; subclasses hook in for accounting.
+        # `body` is what a remote client would put on the wire (payload, filters).
+        with self._lock:
+            try:
+                return run(self._conn)
+            except sqlite3.IntegrityError as e:
+                raise SQLiteError(str(e), code=_constraint_code(str(e))) from e
+
+
+def _constraint_code(message: str) -> str:
+    for prefix, code in CONSTRAINT_CODES.items():
+        if message.startswith(prefix):
+            return code
+    return "23000"  # integrity_constraint_violation
+
+
+# ---------- Database functions (Python versions of sql/*.sql) ----------
+def _place_order(conn: sqlite3.Connection, params: Dict):
+    cust_id = params["p_cust_id"]
+    lines = params["p_items"]
+    quantities: Dict[int, int] = defaultdict(int)
+    for line in lines:
+        quantities[line["prod_id"]] += line["quantity"]
+
+    for prod_id in sorted(quantities):
+        cur = conn.execute(
+            "UPDATE products SET stock = stock - ? WHERE prod_id = ? AND stock >= ?",
+            (quantities[prod_id], prod_id, quantities[prod_id]),
+        )
+        if cur.rowcount == 0:
+            if conn.execute("SELECT 1 FROM products WHERE prod_id = ?", (prod_id,)).fetchone():
+                raise SQLiteError(f"Not enough stock for product {prod_id}", code="P0001")
+            raise SQLiteError(f"Product not found with id: {prod_id}", code="P0001")
+
+    placeholders = ", ".join("?" for _ in quantities)
+    prices = dict(conn.execute(
+        f"SELECT prod_id, price FROM products WHERE prod_id IN ({placeholders})", list(quantities)
+    ).fetchall())
+    total = sum(prices[line["prod_id"]] * line["quantity"] for line in lines)
+
+    order_id = conn.execute(
+        "INSERT INTO orders (cust_id, status, total_amount) VALUES (?, 'PLACED', ?) RETURNING order_id",
+        (cust_id, total),
+    ).fetchone()[0]
+    conn.executemany(
+        "INSERT INTO order_items (order_id, prod_id, quantity, price) VALUES (?, ?, ?, ?)",
+        [(order_id, line["prod_id"], line["quantity"], prices[line["prod_id"]]) for line in lines],
+    )
+    return order_id
+
+
+def _top_selling_products(conn: sqlite3.Connection, params: Dict):
+    rows = conn.execute(
+        """
+        SELECT oi.prod_id AS prod_id, p.name AS product, sum(oi.quantity) AS quantity
+          FROM order_items oi
+          JOIN orders o ON o.order_id = oi.order_id
+          LEFT JOIN products p ON p.prod_id = oi.prod_id
+         WHERE o.status <> 'CANCELLED'
+         GROUP BY oi.prod_id, p.name
+         ORDER BY 3 DESC, 1
+         LIMIT ?
+        """,
+        (params.get("p_top_n", 5),),
+    )
+    return [dict(r) for r in rows]
+
+
+def _revenue_between(conn: sqlite3.Connection, params: Dict):
+    return conn.execute(
+        "SELECT coalesce(sum(total_amount), 0) FROM orders WHERE order_date >= ? AND order_date < ? AND status <> 'CANCELLED'",
+        (params["p_start"], params["p_end"]),
+    ).fetchone()[0]
+
+
+def _orders_per_customer(conn: sqlite3.Connection, params: Dict):
+    min_orders = params.get("p_min_orders")
+    rows = conn.execute(
+        """
+        SELECT cust_id, count(*) AS total_orders
+          FROM orders
+         WHERE status <> 'CANCELLED'
+         GROUP BY cust_id
+        HAVING ? IS NULL OR count(*) > ?
+         ORDER BY 1
+        """,
+        (min_orders, min_orders),
+    )
+    return [dict(r) for r in rows]
+
+
+def _product_sales_since(conn: sqlite3.Connection, params: Dict):
+    rows = conn.execute(
+        """
+        SELECT oi.prod_id AS prod_id, sum(oi.quantity) AS quantity
+          FROM order_items oi JOIN orders o ON o.order_id = oi.order_id
+         WHERE o.order_date >= ? AND o.status <> 'CANCELLED'
+         GROUP BY oi.prod_id
+         ORDER BY 1
+        """,
+        (params["p_since"],),
+    )
+    return [dict(r) for r in rows]
+
+
+def _adjust_stock(conn: sqlite3.Connection, params: Dict):
+    rows = conn.execute(
+        "UPDATE products SET stock = stock + ? WHERE prod_id = ? AND stock + ? >= 0 RETURNING *",
+        (params["p_delta"], params["p_prod_id"], params["p_delta"]),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def _adjust_stock_batch(conn: sqlite3.Connection, params: Dict):
+    deltas: Dict[int, int] = defaultdict(int)
+    for line in params["p_items"]:
+        deltas[line["prod_id"]] += line["delta"]
+    rows = []
+    for prod_id in sorted(deltas):
+        row = conn.execute(
+            "UPDATE products SET stock = stock + ? WHERE prod_id = ? AND stock + ? >= 0 RETURNING *",
+            (deltas[prod_id], prod_id, deltas[prod_id]),
+        ).fetchone()
+        if row is None:
+            if conn.execute("SELECT 1 FROM products WHERE prod_id = ?", (prod_id,)).fetchone():
+                raise SQLiteError(f"Not enough stock for product {prod_id}", code="P0001")
+            raise SQLiteError(f"Product not found with id: {prod_id}", code="P0001")
+        rows.append(dict(row))
+    return rows
+
+
+FUNCTIONS: Dict[str, Callable] = {
+    "place_order": _place_order,
+    "top_selling_products": _top_selling_products,
+    "revenue_between": _revenue_between,
+    "orders_per_customer": _orders_per_customer,
+    "product_sales_since": _product_sales_since,
+    "adjust_stock": _adjust_stock,
+    "adjust_stock_batch": _adjust_stock_batch,
+}
@@ -0,0 +1,85 @@
+"""
+Asyncio variants of the services.
+
+Every Async*Service has the same methods and raises the same errors
+(ProductError, OrderError, ...) as its synchronous service, which it wraps
+as `.sync`. Methods run the sync method on the backend thread pool, so the
+two never drift apart; only flows whose requests are independent of each
+other (process_payment) are written out here, to overlap them with
+asyncio.gather.
+"""
+import asyncio
+from typing import Dict, Optional
+from src.db.aio import AsyncFacade
+from src.dao.async_dao import AsyncCustomerDAO, AsyncOrderDAO, AsyncPaymentDAO, AsyncProductDAO, AsyncReportDAO
+from src.services.customer_service import CustomerService
+from src.services.order_service import OrderService, OrderError
+from src.services.payment_service import PaymentService, PaymentError
+from src.services.product_service import ProductService
+from src.services.report_service import ReportService
+
+
+class AsyncProductService(AsyncFacade):
+    def __init__(self, service: Optional[ProductService] = None):
+        super().__init__(service or ProductService())
+        self.dao = AsyncProductDAO(self.sync.dao)
+
+
+class AsyncCustomerService(AsyncFacade):
+    def __init__(self, service: Optional[CustomerService] = None):
+        super().__init__(service or CustomerService())
+        self.dao = AsyncCustomerDAO(self.sync.dao)
+
+
+class AsyncReportService(AsyncFacade):
+    def __init__(self, service: Optional[ReportService] = None):
+        super().__init__(service or ReportService())
+        self.dao = AsyncReportDAO(self.sync.dao)
+
+
+class AsyncOrderService(AsyncFacade):
+    def __init__(self, service: Optional[OrderService] = None, product_service: Optional[AsyncProductService] = None):
+        if service is None:
+            service = OrderService(product_service=product_service.sync if product_service else None)
+        super().__init__(service)
+        self.dao = AsyncOrderDAO(self.sync.dao)
+        self.product_service = product_service or AsyncProductService(self.sync.product_service)
+
+
+class AsyncPaymentService(AsyncFacade):
+    def __init__(self, service: Optional[PaymentService] = None, order_service: Optional[AsyncOrderService] = None):
+        if service is None:
+            service = PaymentService(order_service=order_service.sync if order_service else None)
+        super().__init__(service)
+        self.dao = AsyncPaymentDAO(self.sync.dao)
+        self.order_service = order_service or AsyncOrderService(self.sync.order_service)
+
+    # PROCESS PAYMENT
+    async def process_payment(self, order_id: int, method: str) -> Dict:
+        # Validate payment and order together before changing either
+        payment, order = await asyncio.gather(
+            self.dao.get_payment_by_order(order_id),
+            self.order_service.dao.get_order_header(order_id),
+        )
+        if not payment:
+            raise PaymentError(f"No payment record found for order {order_id}")
+        if payment["status"] != "PENDING":
+            raise PaymentError(f"Cannot process payment with status {payment['status']}")
+        if not order:
+            raise OrderError(f"Order {order_id} not found")
+        if order["status"] != "PLACED":
+            raise OrderError("Only orders with status 'PLACED' can be completed")
+        # Both updates are conditional; if either row changed since the read,
+        # the other update is undone
+        paid, completed = await asyncio.gather(
+            self.dao.transition_payments([order_id], "PENDING", {"status": "PAID", "method": method}),
+            self.order_service.dao.transition_orders([order_id], "PLACED", "COMPLETED"),
+        )
+        if paid and completed:
+            return paid[0]
+        if paid:
+            await self.dao.transition_payments([order_id], "PAID", {"status": "PENDING", "method": None})
+            raise OrderError("Order is no longer PLACED")
+        if completed:
+            await self.order_service.dao.transition_orders([order_id], "COMPLETED", "PLACED")
+        raise PaymentError("Payment is no longer PENDING")
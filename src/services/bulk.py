@@ -0,0 +1,81 @@
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Tuple
+from src.db.resilience import BackendUnavailable, is_transient
+
+
+def import_in_chunks(
+    records: Iterable[Dict],
+    chunk_size: int,
+    validate: Callable[[Dict], Dict],
+    key: str,
+    find_existing: Callable[[List], List[Dict]],
+    insert_many: Callable[[List[Dict]], List[Dict]],
+) -> Dict:
+    """
+    Shared bulk-import loop for the services.
+
+    Records are read lazily and handled `chunk_size` at a time: each record is
+    validated (validate() returns the row to insert or raises ValueError),
+    duplicates of `key` are checked with one find_existing() lookup per chunk,
+    and the survivors go out in one insert_many() call. If a chunk insert is
+    rejected, its rows are retried one by one so only the bad rows fail.
+    Backend outages are not row errors: they propagate and stop the import.
+
+    Returns {"inserted": n, "errors": [{"row": row_number, "error": message}]},
+    with row numbers counted from 1.
+    """
+    result = {"inserted": 0, "errors": []}
+    numbered = enumerate(records, start=1)
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            return result
+        _import_chunk(chunk, validate, key, find_existing, insert_many, result)
+
+
+def _import_chunk(chunk: List[Tuple[int, Dict]], validate, key, find_existing, insert_many, result: Dict):
+    rows, seen = [], set()
+    for row_no, record in chunk:
+        try:
+            if isinstance(record, Exception):
+                raise ValueError(str(record))
+            if not isinstance(record, dict):
+                raise ValueError("Expected an object")
+            row = validate(record)
+        except ValueError as e:
+            result["errors"].append({"row": row_no, "error": str(e)})
+            continue
+        if row[key] in seen:
+            result["errors"].append({"row": row_no, "error": f"Duplicate {key} in file: {row[key]}"})
+            continue
+        seen.add(row[key])
+        rows.append((row_no, row))
+
+    existing = {r[key] for r in find_existing([row[key] for _, row in rows])}
+    new_rows = []
+    for row_no, row in rows:
+        if row[key] in existing:
+            result["errors"].append({"row": row_no, "error": f"{key} already exists: {row[key]}"})
+        else:
+            new_rows.append((row_no, row))
+    if not new_rows:
+        return
+
+    try:
+        result["inserted"] += len(insert_many([row for _, row in new_rows]))
+    except Exception as e:
+        if not _rejected(e):
+            raise
+        # Something in the chunk was rejected (e.g. a concurrent insert); isolate it
+        for row_no, row in new_rows:
+            try:
+                result["inserted"] += len(insert_many([row]))
+            except Exception as e:
+                if not _rejected(e):
+                    raise
+                result["errors"].append({"row": row_no, "error": str(e)})
+
+
+def _rejected(error: Exception) -> bool:
+    # The backend refused the rows; an unreachable backend would fail every row alike
+    return not isinstance(error, BackendUnavailable) and not is_transient(error)
@@ -1,9 +1,13 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, Iterator
 from src.dao.customer_dao import CustomerDAO
+from src.dao.pagination import MAX_PAGE_SIZE, to_page
+from src.services.bulk import import_in_chunks
+from src.telemetry.tracing import instrument
 
 class CustomerError(Exception):
     pass
 
+@instrument("service")
 class CustomerService:
     def __init__(self, dao: Optional[CustomerDAO] = None):
         self.dao = dao or CustomerDAO()
@@ -27,8 +31,8 @@ class CustomerService:
             raise CustomerError(f"Customer not found with email: {email}")
         return c
 
-    def list_customers(self, city: str | None = None, limit: int = 100) -> List[Dict]:
-        return self.dao.list_customers(limit=limit, city=city)
+    def list_customers(self, city: str | None = None, limit: int = 100, cursor: int | None = None) -> List[Dict]:
+        return self.dao.list_customers(limit=limit, city=city, after=cursor)
 
     # UPDATE
     def update_customer(self, cust_id: int, phone: str | None = None, city: str | None = None) -> Dict:
@@ -39,25 +43,77 @@ class CustomerService:
             fields["city"] = city
         if not fields:
             raise CustomerError("No fields to update")
-        return self.dao.update_customer(cust_id, fields)
+        c = self.dao.update_customer(cust_id, fields)
+        if not c:
+            raise CustomerError(f"Customer not found with id: {cust_id}")
+        return c
 
     # DELETE
     def delete_customer(self, cust_id: int, has_orders_func) -> Dict:
-        c = self.dao.get_customer_by_id(cust_id)
-        if not c:
-            raise CustomerError(f"Customer not found with id: {cust_id}")
+        """Delete a customer without orders, e.g. delete_customer(cust_id, order_service.has_orders)."""
         if has_orders_func(cust_id):
             raise CustomerError("Cannot delete customer with existing orders")
-        return self.dao.delete_customer(cust_id)
+        c = self.dao.delete_customer(cust_id)
+        if not c:
+            raise CustomerError(f"Customer not found with id: {cust_id}")
+        return c
+
+    # BULK
+    def import_customers(self, records: Iterable[Dict], chunk_size: int = 500) -> Dict:
+        """
+        Validate and insert customers chunk by chunk (one email lookup and one
+        multi-row insert per chunk). Bad rows are reported, not fatal.
+        Returns {"inserted": n, "errors": [{"row": i, "error": msg}, ...]}.
+        """
+        return import_in_chunks(
+            records,
+            chunk_size,
+            validate=self._validate_customer_record,
+            key="email",
+            find_existing=self.dao.get_customers_by_emails,
+            insert_many=self.dao.create_customers,
+        )
+
+    def export_customers(self, page_size: int = 1000) -> Iterator[Dict]:
+        return self.dao.iter_customers(page_size=page_size)
+
+    def _validate_customer_record(self, record: Dict) -> Dict:
+        row = {f: str(record.get(f) or "").strip() for f in ("name", "email", "phone", "city")}
+        missing = [f for f, v in row.items() if not v]
+        if missing:
+            raise ValueError(f"Missing required fields: {', '.join(missing)}")
+        return row
 
     # SEARCH
     def search_customers(self, email: str | None = None, city: str | None = None) -> List[Dict]:
+        """
+        The customer with `email` plus the customers in `city` (union, each
+        customer once, keyed by cust_id). Both lookups use the backend indexes.
+        """
         results = []
         if email:
             c = self.dao.get_customer_by_email(email)
             if c:
                 results.append(c)
         if city:
-            city_customers = self.dao.list_customers(city=city)
-            results.extend([c for c in city_customers if c not in results])
+            seen = {c["cust_id"] for c in results}
+            results.extend(c for c in self.dao.list_customers(city=city) if c["cust_id"] not in seen)
         return results
+
+    def find_customers(
+        self,
+        email: str | None = None,
+        city: str | None = None,
+        name_prefix: str | None = None,
+        cursor: int | None = None,
+        page_size: int = 100
+    ) -> Dict:
+        """
+        One page of customers matching all given filters, in cust_id order:
+        {"items": [...], "next_cursor": cust_id or None on the last page}.
+        The filters run as one backend query, so every customer appears at most once.
+        """
+        if not 0 < page_size <= MAX_PAGE_SIZE:
+            raise CustomerError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+        rows = self.dao.search_customers(name_prefix=name_prefix, email=email, city=city, after=cursor, limit=page_size + 1)
+        return to_page(rows, page_size, "cust_id")
@@ -1,34 +1,64 @@
+from typing import Optional
+from collections import defaultdict
+from datetime import date, datetime, timedelta
 from src.dao.order_dao import OrderDAO
+from src.dao.pagination import MAX_PAGE_SIZE, to_page
+from src.db.resilience import BackendUnavailable
 from src.services.product_service import ProductService, ProductError
+from src.telemetry.tracing import instrument
 
 class OrderError(Exception):
     pass
 
+@instrument("service")
 class OrderService:
-    def __init__(self):
-        self.dao = OrderDAO()
-        self.product_service = ProductService()
+    def __init__(self, dao: Optional[OrderDAO] = None, product_service: Optional[ProductService] = None):
+        self.product_service = product_service or ProductService()
+        self.dao = dao or OrderDAO(product_service=self.product_service)
 
     # CREATE
-    def create_order(self, cust_id: int, items: list[dict]):
+    def create_order(self, cust_id: int, items: list[dict], atomic: bool = False):
+        if atomic:
+            # Whole order in one server-side transaction
+            try:
+                order_id = self.dao.create_order_atomic(cust_id, items)
+            except Exception as e:
+                raise OrderError(str(e)) from e
+            # Stock changed server-side; drop the cached rows
+            for item in items:
+                self.product_service.dao.invalidate(item["prod_id"])
+            return self.get_order_details(order_id)
+
+        # Fetch every product in the basket with one request (cache first)
+        products = self.product_service.get_products_by_ids([item["prod_id"] for item in items])
+
+        # Calculate total
         total_amount = 0
-        # Validate products and calculate total
+        quantities = defaultdict(int)
         for item in items:
-            product = self.product_service.get_product_by_id(item["prod_id"])
-            if product["stock"] < item["quantity"]:
-                raise OrderError(f"Not enough stock for product {product['name']}")
-            total_amount += product["price"] * item["quantity"]
+            quantities[item["prod_id"]] += item["quantity"]
+            total_amount += products[item["prod_id"]]["price"] * item["quantity"]
 
-        # Deduct stock
-        for item in items:
-            product = self.product_service.get_product_by_id(item["prod_id"])
-            new_stock = product["stock"] - item["quantity"]
-            self.product_service.update_product(
-                prod_id=item["prod_id"],
-                fields={"stock": new_stock}
-            )
-
-        order_id = self.dao.create_order(cust_id, items, total_amount)
+        # Reserve stock for the whole basket in one guarded update
+        try:
+            self.product_service.reserve_stock(quantities)
+        except ProductError as e:
+            raise OrderError(self._stock_error(quantities) or str(e)) from e
+
+        try:
+            order_id = self.dao.insert_order(cust_id, total_amount)
+        except Exception as e:
+            # No items were written, so the stock is ours to give back even if
+            # a lost response hides an applied insert (that header has no
+            # items and is cancelled by `order expire` without releasing any)
+            self._release_reserved(quantities, e)
+            if isinstance(e, BackendUnavailable):
+                raise OrderError(f"Order not placed (stock released), try again: {e}") from e
+            raise
+        try:
+            self.dao.insert_order_items(order_id, items, products)
+        except Exception as e:
+            self._abandon_order(order_id, quantities, e)
         return self.get_order_details(order_id)
 
     # READ
@@ -38,26 +68,150 @@ class OrderService:
             raise OrderError(f"Order {order_id} not found")
         return order
 
-    def list_orders(self, cust_id: int):
-        return self.dao.list_orders(cust_id)
+    def list_orders(
+        self,
+        cust_id: int,
+        status: str | None = None,
+        start: date | None = None,
+        end: date | None = None,
+        cursor: int | None = None,
+        page_size: int = 100
+    ) -> dict:
+        """
+        One page of a customer's orders, newest first, optionally only those
+        with `status` and start <= order date < end:
+        {"items": [...], "next_cursor": order_id or None on the last page}.
+        """
+        if not 0 < page_size <= MAX_PAGE_SIZE:
+            raise OrderError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+        if start and end and start >= end:
+            raise OrderError("start must be before end")
+        rows = self.dao.list_orders(
+            cust_id, status=status.upper() if status else None,
+            since=start.isoformat() if start else None, until=end.isoformat() if end else None,
+            before=cursor, limit=page_size + 1
+        )
+        return to_page(rows, page_size, "order_id")
+
+    def has_orders(self, cust_id: int) -> bool:
+        """Whether the customer has any order (one limit 1 query); see CustomerService.delete_customer."""
+        return self.dao.has_orders(cust_id)
 
     # CANCEL
     def cancel_order(self, order_id: int):
-        order = self.get_order_details(order_id)
-        if order["status"] != "PLACED":
+        # Conditional update first: of a racing cancel, expiry or payment,
+        # only the one that moves the order releases its stock
+        rows = self.dao.transition_orders([order_id], "PLACED", "CANCELLED")
+        if not rows:
+            if not self.dao.get_order_header(order_id):
+                raise OrderError(f"Order {order_id} not found")
             raise OrderError("Only orders with status 'PLACED' can be cancelled")
         # Restore stock
-        for item in order["items"]:
-            product = self.product_service.get_product_by_id(item["prod_id"])
-            self.product_service.update_product(
-                prod_id=item["prod_id"],
-                fields={"stock": product["stock"] + item["quantity"]}
-            )
-        return self.dao.update_order_status(order_id, "CANCELLED")
+        quantities = defaultdict(int)
+        for item in self.dao.get_items_for_orders([order_id]):
+            quantities[item["prod_id"]] += item["quantity"]
+        if quantities:
+            try:
+                self.product_service.release_stock(quantities)
+            except ProductError as e:
+                self.dao.transition_orders([order_id], "CANCELLED", "PLACED")
+                raise OrderError(f"Could not release stock: {e}") from e
+        return rows[0]
+
+    def cancel_orders(self, order_ids: list[int]) -> dict:
+        """
+        Cancel every order in `order_ids` that is still PLACED. Statuses flip
+        in bulk conditional updates first, so an order raced by another
+        cancel or a payment is skipped rather than released twice. The
+        stock of all cancelled orders is then given back as one delta per
+        product: {"cancelled": [...], "skipped": [...], "released": {prod_id: qty}}.
+        """
+        order_ids = list(dict.fromkeys(order_ids))
+        cancelled = [o["order_id"] for o in self.dao.transition_orders(order_ids, "PLACED", "CANCELLED")]
+        quantities = defaultdict(int)
+        for item in self.dao.get_items_for_orders(cancelled):
+            quantities[item["prod_id"]] += item["quantity"]
+        if quantities:
+            try:
+                self.product_service.release_stock(quantities)
+            except ProductError as e:
+                # Stock is untouched (all-or-nothing), so the orders go back to PLACED
+                self.dao.transition_orders(cancelled, "CANCELLED", "PLACED")
+                raise OrderError(f"Could not release stock: {e}") from e
+        done = set(cancelled)
+        return {"cancelled": cancelled, "skipped": [oid for oid in order_ids if oid not in done], "released": dict(quantities)}
+
+    def expire_orders(self, older_than: timedelta, batch_size: int = 1000, dry_run: bool = False) -> dict:
+        """
+        Cancel PLACED orders dated more than `older_than` ago, `batch_size`
+        at a time in order_id pages (each page is one cancel_orders call).
+        With dry_run, only counts them.
+        """
+        if older_than <= timedelta(0):
+            raise OrderError("older_than must be positive")
+        if not 0 < batch_size <= MAX_PAGE_SIZE:
+            raise OrderError(f"batch_size must be between 1 and {MAX_PAGE_SIZE}")
+        cutoff = (datetime.utcnow() - older_than).isoformat()
+        summary = {"cutoff": cutoff, "expired": 0, "skipped": 0, "units_released": 0}
+        after = None
+        while True:
+            page = self.dao.list_placed_before(cutoff, after_id=after, limit=batch_size)
+            if not page:
+                break
+            after = page[-1]["order_id"]
+            if dry_run:
+                summary["expired"] += len(page)
+            else:
+                result = self.cancel_orders([o["order_id"] for o in page])
+                summary["expired"] += len(result["cancelled"])
+                summary["skipped"] += len(result["skipped"])
+                summary["units_released"] += sum(result["released"].values())
+            if len(page) < batch_size:
+                break
+        return summary
 
     # COMPLETE
     def complete_order(self, order_id: int):
-        order = self.get_order_details(order_id)
-        if order["status"] != "PLACED":
-            raise OrderError("Only orders with status 'PLACED' can be completed")
-        return self.dao.update_order_status(order_id, "COMPLETED")
+        # Conditional update first; the header is only read to explain a refusal
+        rows = self.dao.transition_orders([order_id], "PLACED", "COMPLETED")
+        if rows:
+            return rows[0]
+        if not self.dao.get_order_header(order_id):
+            raise OrderError(f"Order {order_id} not found")
+        raise OrderError("Only orders with status 'PLACED' can be completed")
+
+    # ---------- Helpers ----------
+    def _release_reserved(self, quantities: dict, cause: Exception):
+        try:
+            self.product_service.release_stock(quantities)
+        except ProductError as release_error:
+            raise OrderError(f"Order not placed and its stock could not be released: {release_error}") from cause
+
+    def _abandon_order(self, order_id: int, quantities: dict, cause: Exception):
+        """
+        The items insert of `order_id` failed, possibly after being applied.
+        The order is cancelled with a conditional update first, and only the
+        caller that wins that update releases the reserved stock.
+        """
+        try:
+            cancelled = self.dao.transition_orders([order_id], "PLACED", "CANCELLED")
+        except Exception:
+            raise OrderError(
+                f"Order {order_id} may be incomplete and could not be cancelled; "
+                f"it stays PLACED with its stock reserved: {cause}"
+            ) from cause
+        if not cancelled:
+            raise OrderError(f"Order {order_id} changed while it was being placed; its stock was left with it") from cause
+        self._release_reserved(quantities, cause)
+        raise OrderError(f"Order {order_id} could not be completed and was cancelled (stock released): {cause}") from cause
+
+    def _stock_error(self, quantities: dict):
+        # Name the first product that is short (or gone), from a fresh read
+        try:
+            current = self.product_service.get_products_by_ids(list(quantities), consistent=True)
+        except ProductError as e:
+            return str(e)  # "Product not found with id: ..."
+        for prod_id, quantity in quantities.items():
+            if current[prod_id]["stock"] < quantity:
+                return f"Not enough stock for product {current[prod_id]['name']}"
+        return None
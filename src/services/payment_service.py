@@ -1,10 +1,14 @@
-from typing import Dict, Optional
+from collections import defaultdict
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
 from src.dao.payment_dao import PaymentDAO
 from src.services.order_service import OrderService, OrderError
+from src.telemetry.tracing import instrument
 
 class PaymentError(Exception):
     pass
 
+@instrument("service")
 class PaymentService:
     def __init__(self, dao: Optional[PaymentDAO] = None, order_service: Optional[OrderService] = None):
         self.dao = dao or PaymentDAO()
@@ -28,9 +32,113 @@ class PaymentService:
         payment = self.get_payment(order_id)
         if payment["status"] != "PENDING":
             raise PaymentError(f"Cannot process payment with status {payment['status']}")
-        updated_payment = self.dao.update_payment(order_id, {"status": "PAID", "method": method})
-        self.order_service.complete_order(order_id)
-        return updated_payment
+        # Conditional updates, as in process_payments: a payment or order
+        # changed since the read (paid, cancelled, expired) is not overwritten
+        paid = self.dao.transition_payments([order_id], "PENDING", {"status": "PAID", "method": method})
+        if not paid:
+            raise PaymentError("Payment is no longer PENDING")
+        if self.order_service.dao.transition_orders([order_id], "PLACED", "COMPLETED"):
+            return paid[0]
+        # The order cannot be completed: put its payment back
+        self.dao.transition_payments([order_id], "PAID", {"status": "PENDING", "method": None})
+        if not self.order_service.dao.get_order_header(order_id):
+            raise OrderError(f"Order {order_id} not found")
+        raise OrderError("Only orders with status 'PLACED' can be completed")
+
+    def process_payments(self, records: Iterable[Dict], chunk_size: int = 1000) -> Dict:
+        """
+        Settle many {"order_id", "method"} records, chunk by chunk: one bulk
+        read of payments and orders, then conditional PENDING -> PAID and
+        PLACED -> COMPLETED updates (one per method / one per chunk), so a row
+        changed by someone else in between is reported instead of overwritten.
+        Returns {"paid": n, "failed": m, "results": [...]} with one result per
+        record, in input order, each {"row", "order_id"} plus "error" or
+        "payment_status"/"order_status". Row numbers are counted from 1.
+        """
+        summary = {"paid": 0, "failed": 0, "results": []}
+        numbered = enumerate(records, start=1)
+        seen = set()
+        while True:
+            chunk = list(islice(numbered, chunk_size))
+            if not chunk:
+                return summary
+            for result in self._process_chunk(chunk, seen):
+                summary["failed" if "error" in result else "paid"] += 1
+                summary["results"].append(result)
+
+    def _process_chunk(self, chunk: List, seen: set) -> List[Dict]:
+        results, methods = [], {}
+        for row_no, record in chunk:
+            result = {"row": row_no, "order_id": record.get("order_id") if isinstance(record, dict) else None}
+            results.append(result)
+            try:
+                order_id, method = self._validate_payment_record(record)
+            except ValueError as e:
+                result["error"] = str(e)
+                continue
+            result["order_id"] = order_id
+            if order_id in seen:
+                result["error"] = f"Duplicate order_id in file: {order_id}"
+                continue
+            seen.add(order_id)
+            methods[order_id] = method
+
+        errors = {}
+        payments = self.dao.get_payments_by_orders(list(methods))
+        orders = self.order_service.dao.get_order_headers(list(methods), "order_id,status")
+        for order_id in methods:
+            payment, order = payments.get(order_id), orders.get(order_id)
+            if not payment:
+                errors[order_id] = f"No payment record found for order {order_id}"
+            elif payment["status"] != "PENDING":
+                errors[order_id] = f"Cannot process payment with status {payment['status']}"
+            elif not order:
+                errors[order_id] = f"Order {order_id} not found"
+            elif order["status"] != "PLACED":
+                errors[order_id] = "Only orders with status 'PLACED' can be completed"
+
+        by_method = defaultdict(list)
+        for order_id, method in methods.items():
+            if order_id not in errors:
+                by_method[method].append(order_id)
+        paid = set()
+        for method, order_ids in by_method.items():
+            rows = self.dao.transition_payments(order_ids, "PENDING", {"status": "PAID", "method": method})
+            paid.update(p["order_id"] for p in rows)
+        for order_id in methods:
+            if order_id not in errors and order_id not in paid:
+                errors[order_id] = "Payment is no longer PENDING"
+
+        completed = {o["order_id"] for o in self.order_service.dao.transition_orders(list(paid), "PLACED", "COMPLETED")}
+        stale = [order_id for order_id in paid if order_id not in completed]
+        if stale:
+            # The order changed after the read: put its payment back
+            self.dao.transition_payments(stale, "PAID", {"status": "PENDING", "method": None})
+            for order_id in stale:
+                errors[order_id] = "Order is no longer PLACED"
+
+        for result in results:
+            if "error" in result:
+                continue
+            if result["order_id"] in errors:
+                result["error"] = errors[result["order_id"]]
+            else:
+                result.update(payment_status="PAID", order_status="COMPLETED")
+        return results
+
+    def _validate_payment_record(self, record) -> tuple:
+        if isinstance(record, Exception):
+            raise ValueError(str(record))
+        if not isinstance(record, dict):
+            raise ValueError("Expected an object")
+        try:
+            order_id = int(record.get("order_id"))
+        except (TypeError, ValueError):
+            raise ValueError("order_id must be an integer")
+        method = str(record.get("method") or "").strip()
+        if not method:
+            raise ValueError("method is required")
+        return order_id, method
 
     # REFUND
     def refund_payment(self, order_id: int) -> Dict:
@@ -1,12 +1,30 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, Iterator
+from src.config import CATALOG_SNAPSHOT_MAX_AGE, CATALOG_SNAPSHOT_PATH, PRODUCT_CACHE_ENABLED, PRODUCT_CACHE_SIZE
+from src.dao.catalog_snapshot import CatalogSnapshot, PRODUCT_COLUMNS, build_snapshot, shared_snapshot
 from src.dao.product_dao import ProductDAO
+from src.dao.product_cache import CachedProductDAO
+from src.dao.pagination import MAX_PAGE_SIZE, to_page
+from src.services.bulk import import_in_chunks
+from src.telemetry.tracing import instrument
 
 class ProductError(Exception):
     pass
 
+@instrument("service")
 class ProductService:
-    def __init__(self, dao: Optional[ProductDAO] = None):
-        self.dao = dao or ProductDAO()
+    def __init__(self, dao: Optional[ProductDAO] = None, cache_size: int | None = None, catalog: Optional[CatalogSnapshot] = None):
+        """
+        Reads go through a CachedProductDAO. cache_size defaults to
+        PRODUCT_CACHE_SIZE (0 when PRODUCT_CACHE_ENABLED is off). `catalog`
+        defaults to the snapshot at CATALOG_SNAPSHOT_PATH, if any.
+        """
+        self.catalog = catalog or shared_snapshot(CATALOG_SNAPSHOT_PATH, CATALOG_SNAPSHOT_MAX_AGE)
+        if isinstance(dao, CachedProductDAO):
+            self.dao = dao
+        else:
+            if cache_size is None:
+                cache_size = PRODUCT_CACHE_SIZE if PRODUCT_CACHE_ENABLED else 0
+            self.dao = CachedProductDAO(dao or ProductDAO(), max_size=cache_size)
 
     # CREATE
     def add_product(
@@ -29,47 +47,163 @@ class ProductService:
         return self.dao.create_product(name, sku, price, stock, category)
 
     # READ
-    def get_product_by_id(self, prod_id: int) -> Dict:
-        p = self.dao.get_product_by_id(prod_id)
+    def get_product_by_id(self, prod_id: int, consistent: bool = False) -> Dict:
+        p = self.dao.get_product_by_id(prod_id, consistent=consistent)
         if not p:
             raise ProductError(f"Product not found with id: {prod_id}")
         return p
 
-    def get_product_by_sku(self, sku: str) -> Dict:
-        p = self.dao.get_product_by_sku(sku)
+    def get_products_by_ids(self, prod_ids: List[int], consistent: bool = False) -> Dict[int, Dict]:
+        """
+        Fetch several products in at most one round trip, keyed by prod_id.
+        Raises ProductError if any id does not exist.
+        """
+        products = {p["prod_id"]: p for p in self.dao.get_products_by_ids(prod_ids, consistent=consistent)}
+        for prod_id in prod_ids:
+            if prod_id not in products:
+                raise ProductError(f"Product not found with id: {prod_id}")
+        return products
+
+    def get_product_by_sku(self, sku: str, consistent: bool = False) -> Dict:
+        p = self.dao.get_product_by_sku(sku, consistent=consistent)
         if not p:
             raise ProductError(f"Product not found with SKU: {sku}")
         return p
 
-    def list_products(self, limit: int = 100, category: str | None = None) -> List[Dict]:
-        return self.dao.list_products(limit=limit, category=category)
+    def list_products(self, limit: int = 100, category: str | None = None, cursor: int | None = None) -> List[Dict]:
+        return self.dao.list_products(limit=limit, category=category, after=cursor)
+
+    def search_products(
+        self,
+        name_prefix: str | None = None,
+        category: str | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        max_stock: int | None = None,
+        cursor: int | None = None,
+        page_size: int = 100
+    ) -> Dict:
+        """
+        One page of products matching all given filters, in prod_id order:
+        {"items": [...], "next_cursor": prod_id or None on the last page}.
+        Pass next_cursor back as `cursor` for the following page.
+        """
+        if not 0 < page_size <= MAX_PAGE_SIZE:
+            raise ProductError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise ProductError("min_price cannot be greater than max_price")
+        rows = self.dao.search_products(
+            name_prefix=name_prefix, category=category, min_price=min_price, max_price=max_price,
+            max_stock=max_stock, after=cursor, limit=page_size + 1
+        )
+        return to_page(rows, page_size, "prod_id")
 
     # UPDATE
     def update_product(self, prod_id: int, fields: Dict) -> Dict:
         if not fields:
             raise ProductError("No fields provided for update")
-        p = self.dao.get_product_by_id(prod_id)
+        p = self.dao.update_product(prod_id, fields)
         if not p:
             raise ProductError(f"Product not found with id: {prod_id}")
-        return self.dao.update_product(prod_id, fields)
+        self._snapshot_changed(prod_id)
+        return p
 
     def restock_product(self, prod_id: int, delta: int) -> Dict:
         if delta <= 0:
             raise ProductError("Delta must be positive")
-        p = self.dao.get_product_by_id(prod_id)
+        p = self.dao.adjust_stock(prod_id, delta)
         if not p:
             raise ProductError("Product not found")
-        new_stock = (p.get("stock") or 0) + delta
-        return self.dao.update_product(prod_id, {"stock": new_stock})
+        return p
+
+    # STOCK
+    def reserve_stock(self, quantities: Dict[int, int]) -> List[Dict]:
+        """
+        Deduct {prod_id: quantity} atomically and all-or-nothing.
+        Raises ProductError if any product lacks stock.
+        """
+        try:
+            return self.dao.adjust_stock_batch({pid: -qty for pid, qty in quantities.items()})
+        except Exception as e:
+            raise ProductError(str(e)) from e
+
+    def release_stock(self, quantities: Dict[int, int]) -> List[Dict]:
+        """Give {prod_id: quantity} back to stock in one request."""
+        try:
+            return self.dao.adjust_stock_batch(dict(quantities))
+        except Exception as e:
+            raise ProductError(str(e)) from e
 
     # DELETE
     def delete_product(self, prod_id: int) -> Dict:
-        p = self.dao.get_product_by_id(prod_id)
+        p = self.dao.delete_product(prod_id)
         if not p:
             raise ProductError(f"Product not found with id: {prod_id}")
-        return self.dao.delete_product(prod_id)
+        self._snapshot_changed(prod_id)
+        return p
+
+    def cache_stats(self) -> Dict:
+        return self.dao.stats()
+
+    # BULK
+    def import_products(self, records: Iterable[Dict], chunk_size: int = 500) -> Dict:
+        """
+        Validate and insert products chunk by chunk (one SKU lookup and one
+        multi-row insert per chunk). Bad rows are reported, not fatal.
+        Returns {"inserted": n, "errors": [{"row": i, "error": msg}, ...]}.
+        """
+        return import_in_chunks(
+            records,
+            chunk_size,
+            validate=self._validate_product_record,
+            key="sku",
+            find_existing=self.dao.get_products_by_skus,
+            insert_many=self.dao.create_products,
+        )
+
+    def export_products(self, page_size: int = 1000) -> Iterator[Dict]:
+        return self.dao.iter_products(page_size=page_size)
+
+    def build_catalog_snapshot(self, path: str | None = None) -> Dict:
+        """Write a new catalog snapshot to `path` (default CATALOG_SNAPSHOT_PATH) and load it."""
+        path = path or CATALOG_SNAPSHOT_PATH
+        if not path:
+            raise ProductError("No snapshot path given and CATALOG_SNAPSHOT_PATH is not set")
+        version = build_snapshot(self.dao.iter_products(columns=PRODUCT_COLUMNS), path)
+        if self.catalog is not None and self.catalog.path == path:
+            self.catalog.reload_if_changed(min_interval=0)
+        else:
+            self.catalog = shared_snapshot(path, CATALOG_SNAPSHOT_MAX_AGE)
+        return {"path": path, "version": version, "products": len(self.catalog)}
+
+    def _snapshot_changed(self, prod_id: int):
+        # The snapshot's row is now out of date; its readers fall back to the database
+        if self.catalog is not None:
+            self.catalog.invalidate(prod_id)
+
+    def _validate_product_record(self, record: Dict) -> Dict:
+        name = str(record.get("name") or "").strip()
+        sku = str(record.get("sku") or "").strip()
+        if not name or not sku:
+            raise ValueError("name and sku are required")
+        try:
+            price = float(record.get("price"))
+            stock = int(record.get("stock") or 0)
+        except (TypeError, ValueError):
+            raise ValueError("price must be a number and stock an integer")
+        if price <= 0:
+            raise ValueError("Price must be greater than 0")
+        if stock < 0:
+            raise ValueError("Stock cannot be negative")
+        row = {"name": name, "sku": sku, "price": price, "stock": stock}
+        if record.get("category"):
+            row["category"] = record["category"]
+        return row
 
     # CUSTOM
     def get_low_stock(self, threshold: int = 5) -> List[Dict]:
-        all_products = self.dao.list_products(limit=1000)
-        return [p for p in all_products if (p.get("stock") or 0) <= threshold]
+        return list(self.iter_low_stock(threshold))
+
+    def iter_low_stock(self, threshold: int = 5, category: str | None = None) -> Iterator[Dict]:
+        # stock <= threshold is filtered by the backend, page by page
+        return self.dao.iter_low_stock(threshold, category, page_size=MAX_PAGE_SIZE)
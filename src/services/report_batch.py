@@ -0,0 +1,211 @@
+"""
+Several reports from one scan of orders and order_items (`report all`).
+
+Each report is an Aggregator registered in AGGREGATORS. scan() reads every
+table the requested aggregators need exactly once. Cancelled orders are
+skipped, as by every report engine: orders aggregators see each row's
+status, and order_items aggregators get the ids of the cancelled orders,
+read up front. The table's key range is
+split into partitions that are read side by side on a thread pool, and each
+partition folds its rows into its own aggregator instances. Partitions are
+then merged, and the reports' results (with their lookups, e.g. product
+names) are also produced on the pool.
+"""
+import contextvars
+import heapq
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+from src.dao.report_dao import ReportDAO
+from src.services.report_service import last_month_bounds, parse_iso_datetime
+
+# table -> its key, for partitioning
+TABLE_KEYS = {"orders": "order_id", "order_items": "item_id"}
+
+# report name -> aggregator class
+AGGREGATORS: Dict[str, type] = {}
+
+
+def register(name: str):
+    def decorator(cls):
+        AGGREGATORS[name] = cls
+        return cls
+    return decorator
+
+
+class Aggregator(ABC):
+    """
+    One report folded from the rows of one table (`source`). Only `columns`
+    of it are read. merge() adds another partition's totals into this one.
+    """
+    source = "orders"
+    columns: Tuple[str, ...] = ()
+
+    @abstractmethod
+    def add(self, row: Dict):
+        ...
+
+    @abstractmethod
+    def merge(self, other: "Aggregator"):
+        ...
+
+    @abstractmethod
+    def result(self, service):
+        ...
+
+
+@register("top_products")
+class TopProducts(Aggregator):
+    source = "order_items"
+    columns = ("order_id", "prod_id", "quantity")
+
+    def __init__(self, top_n: int = 5, cancelled: frozenset = frozenset(), **_):
+        self.top_n = top_n
+        self.cancelled = cancelled
+        self.quantities = defaultdict(int)
+
+    def add(self, row: Dict):
+        if row.get("prod_id") is None or row.get("order_id") is None or row["order_id"] in self.cancelled:
+            return
+        try:
+            self.quantities[row["prod_id"]] += int(row.get("quantity") or 0)
+        except (TypeError, ValueError):
+            pass
+
+    def merge(self, other: "TopProducts"):
+        for pid, qty in other.quantities.items():
+            self.quantities[pid] += qty
+
+    def result(self, service) -> List[Dict]:
+        # Ties go to the lowest prod_id, as in every report engine
+        ranked = heapq.nlargest(self.top_n, self.quantities.items(), key=lambda x: (x[1], -x[0]))
+        names = service._product_names([pid for pid, _ in ranked])
+        return [{"prod_id": pid, "product": names.get(pid), "quantity": qty} for pid, qty in ranked]
+
+
+@register("total_revenue_last_month")
+class RevenueLastMonth(Aggregator):
+    columns = ("order_date", "status", "total_amount")
+
+    def __init__(self, last_month: Tuple[datetime, datetime] | None = None, **_):
+        self.start, self.end = last_month or last_month_bounds()
+        self.total = 0.0
+
+    def add(self, row: Dict):
+        if row.get("status") == "CANCELLED":
+            return
+        order_date = parse_iso_datetime(row.get("order_date"))
+        if order_date and self.start <= order_date < self.end:
+            try:
+                self.total += float(row.get("total_amount") or 0)
+            except (TypeError, ValueError):
+                pass
+
+    def merge(self, other: "RevenueLastMonth"):
+        self.total += other.total
+
+    def result(self, service) -> float:
+        return round(self.total, 2)
+
+
+@register("total_orders_per_customer")
+class OrdersPerCustomer(Aggregator):
+    columns = ("cust_id", "status")
+
+    def __init__(self, **_):
+        self.counts = defaultdict(int)
+
+    def add(self, row: Dict):
+        if row.get("cust_id") is not None and row.get("status") != "CANCELLED":
+            self.counts[row["cust_id"]] += 1
+
+    def merge(self, other: "OrdersPerCustomer"):
+        for cust_id, n in other.counts.items():
+            self.counts[cust_id] += n
+
+    def result(self, service) -> List[Dict]:
+        return [{"cust_id": cid, "total_orders": n} for cid, n in sorted(self.counts.items())]
+
+
+@register("frequent_customers")
+class FrequentCustomers(OrdersPerCustomer):
+    def __init__(self, min_orders: int = 2, **_):
+        super().__init__()
+        self.min_orders = min_orders
+
+    def result(self, service) -> List[Dict]:
+        return [c for c in super().result(service) if c["total_orders"] > self.min_orders]
+
+
+# ---------- Scan ----------
+def _submit(pool: ThreadPoolExecutor, fn: Callable, *args):
+    # Keep the caller's trace context in the worker thread
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _partitions(bounds: Tuple[int, int] | None, count: int) -> List[Tuple[int | None, int | None]]:
+    """(after, upto) key ranges covering `bounds`; the last one is open-ended."""
+    if bounds is None:
+        return []
+    low, high = bounds
+    step = max(1, -(-(high - low + 1) // count))
+    ranges = []
+    after = low - 1
+    while after < high:
+        ranges.append((after, after + step))
+        after += step
+    ranges[-1] = (ranges[-1][0], None)
+    return ranges
+
+
+def _fold(dao: ReportDAO, table: str, columns: str, after, upto, factories: Dict[str, Callable]) -> Dict[str, Aggregator]:
+    aggregators = {name: factory() for name, factory in factories.items()}
+    adds = [a.add for a in aggregators.values()]
+    for row in dao.iter_key_range(table, TABLE_KEYS[table], columns, after, upto):
+        for add in adds:
+            add(row)
+    return aggregators
+
+
+def scan(service, reports: List[str], params: Dict, workers: int = 4) -> Dict:
+    """
+    Run `reports` (names in AGGREGATORS) over one partitioned scan of each
+    table they read. `params` go to every aggregator (e.g. top_n, min_orders).
+    Returns report name -> result.
+    """
+    unknown = [name for name in reports if name not in AGGREGATORS]
+    if unknown:
+        raise ValueError(f"Unknown report(s): {', '.join(unknown)}")
+    dao = service.dao
+    sources = {AGGREGATORS[name].source for name in reports}
+    by_source: Dict[str, Dict[str, Callable]] = defaultdict(dict)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="report") as pool:
+        bounds = {table: _submit(pool, dao.key_bounds, table, TABLE_KEYS[table]) for table in sources}
+        cancelled = frozenset(service.cancelled_order_ids()) if "order_items" in sources else frozenset()
+        for name in reports:
+            cls = AGGREGATORS[name]
+            by_source[cls.source][name] = lambda cls=cls: cls(**params, cancelled=cancelled)
+        folds = []
+        for table, factories in by_source.items():
+            wanted = {c for name in factories for c in AGGREGATORS[name].columns}
+            columns = ",".join(sorted(wanted | {TABLE_KEYS[table]}))
+            for after, upto in _partitions(bounds[table].result(), workers):
+                folds.append(_submit(pool, _fold, dao, table, columns, after, upto, factories))
+
+        merged: Dict[str, Aggregator] = {}
+        for future in folds:
+            for name, aggregator in future.result().items():
+                if name in merged:
+                    merged[name].merge(aggregator)
+                else:
+                    merged[name] = aggregator
+        # Tables with no rows still give (empty) reports
+        for factories in by_source.values():
+            for name, factory in factories.items():
+                merged.setdefault(name, factory())
+
+        results = {name: _submit(pool, merged[name].result, service) for name in reports}
+        return {name: future.result() for name, future in results.items()}
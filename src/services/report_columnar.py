@@ -0,0 +1,206 @@
+"""
+Columnar report engine.
+
+ColumnarReports loads orders and order_items once into NumPy arrays and
+answers the ReportService reports with vectorized group-bys instead of
+per-row loops. Results are identical to ReportService's row-by-row
+computation: rows are skipped by the same rules (cancelled orders and
+their items excluded), top products break ties by lowest prod_id, and
+floats are added in the same order (np.add.at / cumsum are sequential,
+unlike np.sum).
+
+NumPy is an optional dependency, only needed for REPORT_ENGINE=columnar.
+"""
+from datetime import date, datetime
+from functools import cached_property
+from typing import Dict, List, Tuple
+from src.services.report_service import parse_iso_datetime
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+ORDER_COLUMNS = "order_id,cust_id,order_date,status,total_amount"
+ITEM_COLUMNS = "order_id,prod_id,quantity"
+PERIODS = ("day", "week", "month")
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("The columnar report engine needs numpy (pip install numpy)")
+
+
+# ---------- Bulk conversion ----------
+def parse_dates(values: List) -> "np.ndarray":
+    """
+    parse_iso_datetime over a whole column, as datetime64[us] with NaT where
+    it would return None. Standard 'YYYY-MM-DD[(T| )HH:MM[:SS[.ffffff]]]'
+    strings, with or without a Z / offset suffix, are parsed in bulk; any
+    other value goes through parse_iso_datetime itself.
+    """
+    _require_numpy()
+    n = len(values)
+    out = np.full(n, np.datetime64("NaT"), dtype="datetime64[us]")
+    if not n:
+        return out
+    is_str = np.fromiter((isinstance(v, str) for v in values), dtype=bool, count=n)
+    slow = ~is_str
+
+    idx = np.flatnonzero(is_str)
+    if idx.size:
+        try:
+            raw = np.array([values[i] for i in idx], dtype="S")
+        except UnicodeEncodeError:
+            raw = None
+        if raw is None or raw.dtype.itemsize < 10:
+            slow[idx] = True
+        else:
+            width = raw.dtype.itemsize
+            m = raw.view(np.uint8).reshape(-1, width).copy()
+            rows = np.arange(len(m))
+            lengths = (m != 0).sum(axis=1)
+
+            # Same trimming as parse_iso_datetime: a trailing Z, then
+            # everything from the first '+' (else '-') after the date part
+            z = (lengths > 0) & (m[rows, np.maximum(lengths - 1, 0)] == ord("Z"))
+            m[rows[z], lengths[z] - 1] = 0
+            after_date = np.arange(width) >= 10
+            plus = (m == ord("+")) & after_date
+            minus = (m == ord("-")) & after_date
+            cut = np.where(plus.any(axis=1), plus.argmax(axis=1), np.where(minus.any(axis=1), minus.argmax(axis=1), width))
+            m[np.arange(width)[None, :] >= cut[:, None]] = 0
+            lengths = (m != 0).sum(axis=1)
+
+            shape_ok = (lengths >= 10) & (m[:, 4] == ord("-")) & (m[:, 7] == ord("-"))
+            if width > 10:
+                shape_ok &= (lengths == 10) | (m[:, 10] == ord("T")) | (m[:, 10] == ord(" "))
+            fast = np.flatnonzero(shape_ok)
+            try:
+                out[idx[fast]] = m[fast].view(f"S{width}").ravel().astype("datetime64[us]")
+            except ValueError:
+                fast = fast[:0]
+            done = np.zeros(len(idx), dtype=bool)
+            done[fast] = True
+            slow[idx[~done]] = True
+
+    for i in np.flatnonzero(slow):
+        parsed = parse_iso_datetime(values[i])
+        if parsed is not None:
+            out[i] = np.datetime64(parsed, "us")
+    return out
+
+
+def _to_numbers(values: List, dtype, convert) -> Tuple["np.ndarray", "np.ndarray"]:
+    """(array, valid) where invalid marks values `convert` (float / int) rejects."""
+    try:
+        return np.array(values, dtype=dtype), np.ones(len(values), dtype=bool)
+    except (TypeError, ValueError, OverflowError):
+        pass
+    arr = np.zeros(len(values), dtype=dtype)
+    valid = np.ones(len(values), dtype=bool)
+    for i, v in enumerate(values):
+        try:
+            arr[i] = convert(v)
+        except Exception:
+            valid[i] = False
+    return arr, valid
+
+
+class ColumnarReports:
+    """
+    Column snapshot of a ReportDAO's orders and order_items. Each table is
+    streamed into arrays the first time a report needs it and reused after.
+    """
+
+    def __init__(self, dao):
+        _require_numpy()
+        self.dao = dao
+
+    @cached_property
+    def _orders(self) -> Dict[str, "np.ndarray"]:
+        custs, dates, totals = [], [], []
+        for o in self.dao.iter_orders(ORDER_COLUMNS):
+            if o.get("status") == "CANCELLED":
+                continue
+            custs.append(o.get("cust_id") or o.get("customer_id") or 0)
+            dates.append(o.get("order_date") or o.get("created_at") or o.get("order_date_iso"))
+            totals.append(o.get("total_amount") or 0)
+        total, total_valid = _to_numbers(totals, np.float64, float)
+        return {
+            "cust": np.array(custs, dtype=np.int64),  # 0 = no customer
+            "date": parse_dates(dates),  # NaT = unparsable
+            "total": total,
+            "total_valid": total_valid,
+        }
+
+    @cached_property
+    def _items(self) -> Dict[str, "np.ndarray"]:
+        prods, qtys = [], []
+        cancelled = {o["order_id"] for o in self.dao.iter_orders("order_id", status="CANCELLED")}
+        for item in self.dao.iter_order_items(ITEM_COLUMNS):
+            if item.get("prod_id") is None or item.get("order_id") is None or item["order_id"] in cancelled:
+                continue
+            prods.append(item["prod_id"])
+            qtys.append(item.get("quantity") or item.get("qty") or 0)
+        qty, qty_valid = _to_numbers(qtys, np.int64, int)
+        return {"prod": np.array(prods, dtype=np.int64)[qty_valid], "qty": qty[qty_valid]}
+
+    # ---------- Reports ----------
+    def top_products(self, top_n: int) -> List[Tuple[int, int]]:
+        """(prod_id, quantity) by quantity desc; ties by lowest prod_id."""
+        items = self._items
+        if not items["prod"].size:
+            return []
+        keys, inverse = np.unique(items["prod"], return_inverse=True)
+        sums = np.zeros(len(keys), dtype=np.int64)
+        np.add.at(sums, inverse, items["qty"])
+        ranked = np.lexsort((keys, -sums))[:top_n]
+        return list(zip(keys[ranked].tolist(), sums[ranked].tolist()))
+
+    def orders_per_customer(self) -> List[Tuple[int, int]]:
+        """(cust_id, orders) in order of each customer's first order."""
+        custs = self._orders["cust"]
+        custs = custs[custs != 0]
+        if not custs.size:
+            return []
+        keys, first, counts = np.unique(custs, return_index=True, return_counts=True)
+        by_first = np.argsort(first, kind="stable")
+        return list(zip(keys[by_first].tolist(), counts[by_first].tolist()))
+
+    def frequent_customers(self, min_orders: int) -> List[Tuple[int, int]]:
+        return [(cid, n) for cid, n in self.orders_per_customer() if n > min_orders]
+
+    def _in_window(self, start: datetime, end: datetime) -> "np.ndarray":
+        orders = self._orders
+        start64, end64 = np.datetime64(start, "us"), np.datetime64(end, "us")
+        return orders["total_valid"] & (orders["date"] >= start64) & (orders["date"] < end64)
+
+    def revenue_between(self, start: datetime, end: datetime) -> float:
+        """Sum of total_amount for start <= order_date < end (NaT dates never match)."""
+        values = self._orders["total"][self._in_window(start, end)]
+        return float(np.cumsum(values)[-1]) if values.size else 0.0
+
+    def revenue_by_period(self, period: str, start: datetime, end: datetime) -> List[Tuple[date, float]]:
+        """Revenue per day / ISO week (Monday) / month in [start, end), as (period start, total)."""
+        if period not in PERIODS:
+            raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+        mask = self._in_window(start, end)
+        days = self._orders["date"][mask].astype("datetime64[D]")
+        if period == "week":
+            # 1970-01-01 was a Thursday
+            day_numbers = days.astype(np.int64)
+            days = (day_numbers - (day_numbers + 3) % 7).astype("datetime64[D]")
+        elif period == "month":
+            days = days.astype("datetime64[M]").astype("datetime64[D]")
+        if not days.size:
+            return []
+        keys, inverse = np.unique(days, return_inverse=True)
+        sums = np.zeros(len(keys), dtype=np.float64)
+        np.add.at(sums, inverse, self._orders["total"][mask])
+        return [(k.item(), s) for k, s in zip(keys, sums.tolist())]
+
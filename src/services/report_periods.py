@@ -0,0 +1,25 @@
+"""
+Periods and groupings of the revenue reports. Kept free of other imports,
+since the CLI builds its `report revenue` choices from it.
+"""
+from datetime import date, timedelta
+
+GRANULARITIES = ("day", "week", "month")
+GROUP_BYS = ("city", "category")
+
+
+def period_start(day: date, granularity: str) -> date:
+    """First day of the day / ISO week / month containing `day`."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def check_rollup(granularity: str, group_by: str | None):
+    """Raise ValueError unless granularity / group_by name a known rollup."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    if group_by is not None and group_by not in GROUP_BYS:
+        raise ValueError(f"group_by must be one of {', '.join(GROUP_BYS)}")
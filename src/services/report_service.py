@@ -1,57 +1,138 @@
+import contextvars
 from typing import List, Dict
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from collections import defaultdict
+from src.config import CATALOG_SNAPSHOT_MAX_AGE, CATALOG_SNAPSHOT_PATH, REPORT_ENGINE, REPORT_WORKERS
+from src.dao.catalog_snapshot import shared_snapshot
 from src.dao.report_dao import ReportDAO
+from src.telemetry.tracing import instrument
 
+@instrument("service")
 class ReportService:
-    def __init__(self, dao: ReportDAO = None):
+    def __init__(self, dao: ReportDAO = None, server_side: bool = True, state=None, engine: str = REPORT_ENGINE, catalog=None):
+        """
+        Cancelled orders are left out of every report, by every engine.
+        With a ReportState (`state`), reports are served from its incrementally
+        refreshed aggregates. Otherwise, with `server_side`, they are aggregated
+        by the database functions in sql/report_functions.sql; if those are not
+        installed (or server_side is False) they are computed here from the raw
+        rows, row by row (engine="python") or over NumPy arrays loaded once and
+        kept until reload_columns() (engine="columnar"). Product names come
+        from `catalog` (default: the CATALOG_SNAPSHOT_PATH snapshot) when set.
+        """
         self.dao = dao or ReportDAO()
+        self.server_side = server_side
+        self.state = state
+        if engine not in ("python", "columnar"):
+            raise ValueError(f"Unknown report engine '{engine}'")
+        self.engine = engine
+        self._columns = None
+        self.catalog = catalog or shared_snapshot(CATALOG_SNAPSHOT_PATH, CATALOG_SNAPSHOT_MAX_AGE)
+
+    # prod_id -> name, from the catalog snapshot where possible
+    def _product_names(self, prod_ids: List[int]) -> Dict[int, str]:
+        names = {}
+        if self.catalog is not None:
+            self.catalog.reload_if_changed()
+            names = self.catalog.names(prod_ids)
+        missing = [pid for pid in prod_ids if pid not in names]
+        if missing:
+            names.update(self.dao.get_product_names(missing))
+        return names
+
+    # Columnar snapshot of orders/order_items (see report_columnar.py)
+    def _columnar(self):
+        if self._columns is None:
+            from src.services.report_columnar import ColumnarReports
+            self._columns = ColumnarReports(self.dao)
+        return self._columns
+
+    def reload_columns(self):
+        self._columns = None
+
+    # Fold new orders into the materialized state (no-op without one)
+    def refresh_state(self) -> int:
+        if self.state is None:
+            return 0
+        return self.state.refresh(self.dao)
 
     # Top N selling products by total quantity
     def top_selling_products(self, top_n: int = 5) -> List[Dict]:
+        if self.state is not None:
+            self.refresh_state()
+            ranked = self.state.top_products(top_n)
+            names = self._product_names([pid for pid, _ in ranked])
+            return [{"prod_id": pid, "product": names.get(pid), "quantity": qty} for pid, qty in ranked]
+
+        if self.server_side:
+            rows = self.dao.top_selling_products(top_n)
+            if rows is not None:
+                return [{"prod_id": r["prod_id"], "product": r["product"], "quantity": r["quantity"]} for r in rows]
+
+        if self.engine == "columnar":
+            ranked = self._columnar().top_products(top_n)
+            names = self._product_names([pid for pid, _ in ranked])
+            return [{"prod_id": pid, "product": names.get(pid), "quantity": qty} for pid, qty in ranked]
+
         product_sales = defaultdict(int)
+        cancelled = self.cancelled_order_ids()
 
-        # Sum quantities per prod_id across all orders
-        for order in self.dao.get_all_orders():
-            order_id = order.get("order_id")
-            if order_id is None:
+        # Sum quantities per prod_id, streaming order_items page by page
+        for item in self.dao.iter_order_items("order_id,prod_id,quantity"):
+            pid = item.get("prod_id")
+            qty = item.get("quantity") or item.get("qty") or 0
+            if pid is None or item.get("order_id") is None or item["order_id"] in cancelled:
+                continue
+            try:
+                product_sales[pid] += int(qty)
+            except Exception:
+                # ignore malformed quantity values
                 continue
-            items = self.dao.get_order_items(order_id)
-            for item in items:
-                pid = item.get("prod_id")
-                qty = item.get("quantity") or item.get("qty") or 0
-                if pid is None:
-                    continue
-                try:
-                    product_sales[pid] += int(qty)
-                except Exception:
-                    # ignore malformed quantity values
-                    continue
 
-        # Sort by total qty desc and take top_n
-        sorted_products = sorted(product_sales.items(), key=lambda x: x[1], reverse=True)[:top_n]
+        # Sort by total qty desc (ties: lowest prod_id, as top_selling_products() in SQL) and take top_n
+        sorted_products = sorted(product_sales.items(), key=lambda x: (-x[1], x[0]))[:top_n]
 
-        # Map product ids to names (if available)
-        all_products = {p["prod_id"]: p for p in self.dao.get_all_products() if p.get("prod_id") is not None}
+        # Map product ids to names (if available); only the top_n are fetched
+        names = self._product_names([pid for pid, _ in sorted_products])
         result = []
         for pid, qty in sorted_products:
-            prod = all_products.get(pid)
             result.append({
                 "prod_id": pid,
-                "product": prod.get("name") if prod else None,
+                "product": names.get(pid),
                 "quantity": qty
             })
         return result
 
     # Total revenue in the last month (calendar month before current)
     def total_revenue_last_month(self) -> float:
-        today = datetime.utcnow()
-        first_day_this_month = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        last_day_last_month = first_day_this_month - timedelta(seconds=1)
-        first_day_last_month = (first_day_this_month - timedelta(days=1)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        """
+        Revenue of the orders with start <= order_date < end (end being the
+        first instant of this month), rounded to cents; every engine uses
+        these bounds and this rounding.
+        """
+        first_day_last_month, first_day_this_month = last_month_bounds()
+
+        if self.state is not None:
+            self.refresh_state()
+            return self.state.revenue_between(first_day_last_month.date(), first_day_this_month.date())
+
+        if self.server_side:
+            total = self.dao.revenue_between(first_day_last_month.isoformat(), first_day_this_month.isoformat())
+            if total is not None:
+                return round(total, 2)
+
+        if self.engine == "columnar":
+            return round(self._columnar().revenue_between(first_day_last_month, first_day_this_month), 2)
 
         total = 0.0
-        for order in self.dao.get_all_orders():
+        orders = self.dao.iter_orders(
+            "order_id,order_date,status,total_amount",
+            since=first_day_last_month.isoformat(),
+            until=first_day_this_month.isoformat(),
+        )
+        for order in orders:
+            if order.get("status") == "CANCELLED":
+                continue
             # Orders table uses `order_date` in your schema
             raw_date = order.get("order_date") or order.get("created_at") or order.get("order_date_iso")
             if not raw_date:
@@ -60,20 +141,52 @@ class ReportService:
             if not order_date:
                 continue
             # Compare in UTC
-            if first_day_last_month <= order_date <= last_day_last_month:
+            if first_day_last_month <= order_date < first_day_this_month:
                 total_amount = order.get("total_amount") or 0
                 try:
                     total += float(total_amount)
                 except Exception:
                     continue
-        return total
+        return round(total, 2)
+
+    # Revenue for any date range, per day / week / month, optionally by city or category
+    def revenue_report(self, start: date, end: date, granularity: str = "day", group_by: str | None = None) -> List[Dict]:
+        """
+        Revenue for start <= day < end, cancelled orders excluded as in every
+        other report, so a month's row equals total_revenue_last_month for it.
+        Served from the daily buckets of the materialized state when there is
+        one (REPORT_STATE_PATH), so a query costs O(days); otherwise the
+        orders in the range are read and bucketed on each call.
+        """
+        from src.services.report_periods import check_rollup
+        from src.services.report_state import ReportState
+        check_rollup(granularity, group_by)
+        if self.state is not None:
+            self.refresh_state()
+            state = self.state
+        else:
+            state = ReportState(settle_seconds=0)
+            state.load_window(self.dao, start, end, group_by)
+        return state.revenue_rollup(start, end, granularity, group_by)
 
     # Total orders per customer (by cust_id)
     def total_orders_per_customer(self) -> List[Dict]:
+        if self.state is not None:
+            self.refresh_state()
+            return [{"cust_id": cid, "total_orders": c} for cid, c in self.state.orders_per_customer().items()]
+
+        if self.server_side:
+            rows = self.dao.orders_per_customer()
+            if rows is not None:
+                return [{"cust_id": r["cust_id"], "total_orders": r["total_orders"]} for r in rows]
+
+        if self.engine == "columnar":
+            return [{"cust_id": cid, "total_orders": c} for cid, c in self._columnar().orders_per_customer()]
+
         counts = defaultdict(int)
-        for order in self.dao.get_all_orders():
+        for order in self.dao.iter_orders("order_id,cust_id,status"):
             cust_id = order.get("cust_id") or order.get("customer_id")
-            if cust_id is None:
+            if cust_id is None or order.get("status") == "CANCELLED":
                 continue
             counts[cust_id] += 1
         return [{"cust_id": cid, "total_orders": c} for cid, c in counts.items()]
@@ -81,32 +194,101 @@ class ReportService:
     # Customers with more than `min_orders` orders (default: more than 2)
     def frequent_customers(self, min_orders: int = 2) -> List[Dict]:
         # requirement: customers who placed more than 2 orders
+        if self.server_side and self.state is None:
+            rows = self.dao.orders_per_customer(min_orders)
+            if rows is not None:
+                return [{"cust_id": r["cust_id"], "total_orders": r["total_orders"]} for r in rows]
         return [c for c in self.total_orders_per_customer() if c["total_orders"] > min_orders]
 
-    # ---------- Helpers ----------
-    def _parse_iso_datetime_safe(self, s):
+    # Every report of the nightly run, as one document
+    def all_reports(self, top_n: int = 5, min_orders: int = 2, workers: int = REPORT_WORKERS) -> Dict:
         """
-        Parse ISO datetime strings returned from Supabase.
-        Supabase may return '2025-09-22T10:30:00Z' or without 'Z'.
-        Return a timezone-naive UTC datetime on success, or None on failure.
+        top_products, total_revenue_last_month, total_orders_per_customer and
+        frequent_customers together. With materialized state, or the database
+        functions installed, each is already cheap (the database calls are
+        made side by side); otherwise orders and order_items are each scanned
+        once, in key-range partitions on `workers` threads, for all four
+        reports (see report_batch.py).
         """
-        if isinstance(s, datetime):
-            return s
-        if not isinstance(s, str):
-            return None
-        # remove trailing Z and fractional timezone if any, keep as UTC naive
-        try:
-            if s.endswith("Z"):
-                s = s[:-1]
-            # Some timestamps include +00:00 or other offsets -> remove offset for fromisoformat
-            # If there is a '+' or '-' for offset after the time portion, split it off
-            for sign in ("+", "-"):
-                # find sign after date portion
-                idx = s.find(sign, 10)  # offset signs appear after YYYY-MM-DDT...
-                if idx != -1:
-                    s = s[:idx]
-                    break
-            # fromisoformat can parse 'YYYY-MM-DDTHH:MM:SS' and 'YYYY-MM-DDTHH:MM:SS.ssssss'
-            return datetime.fromisoformat(s)
-        except Exception:
+        reports = None
+        if self.state is not None or (self.engine == "columnar" and not self.server_side):
+            reports = {
+                "top_products": self.top_selling_products(top_n),
+                "total_revenue_last_month": self.total_revenue_last_month(),
+                "total_orders_per_customer": self.total_orders_per_customer(),
+                "frequent_customers": self.frequent_customers(min_orders),
+            }
+        elif self.server_side:
+            reports = self._server_side_reports(top_n, min_orders, workers)
+        if reports is None:
+            from src.services.report_batch import scan
+            reports = scan(self, ["top_products", "total_revenue_last_month", "total_orders_per_customer", "frequent_customers"],
+                           {"top_n": top_n, "min_orders": min_orders, "last_month": last_month_bounds()}, workers)
+        return {"generated_at": datetime.utcnow().isoformat(), **reports}
+
+    def _server_side_reports(self, top_n: int, min_orders: int, workers: int) -> Dict | None:
+        # None if any of the database functions is missing
+        from concurrent.futures import ThreadPoolExecutor
+        start, end = last_month_bounds()
+        calls = {
+            "top_products": (self.dao.top_selling_products, top_n),
+            "total_revenue_last_month": (self.dao.revenue_between, start.isoformat(), end.isoformat()),
+            "total_orders_per_customer": (self.dao.orders_per_customer,),
+            "frequent_customers": (self.dao.orders_per_customer, min_orders),
+        }
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(calls)))) as pool:
+            futures = {name: pool.submit(contextvars.copy_context().run, *call) for name, call in calls.items()}
+            rows = {name: future.result() for name, future in futures.items()}
+        if any(r is None for r in rows.values()):
             return None
+        customers = lambda rs: [{"cust_id": r["cust_id"], "total_orders": r["total_orders"]} for r in rs]
+        return {
+            "top_products": [{"prod_id": r["prod_id"], "product": r["product"], "quantity": r["quantity"]} for r in rows["top_products"]],
+            "total_revenue_last_month": rows["total_revenue_last_month"],
+            "total_orders_per_customer": customers(rows["total_orders_per_customer"]),
+            "frequent_customers": customers(rows["frequent_customers"]),
+        }
+
+    # ---------- Helpers ----------
+    # Every engine leaves cancelled orders out of every report
+    def cancelled_order_ids(self) -> set:
+        return {o["order_id"] for o in self.dao.iter_orders("order_id", status="CANCELLED")}
+
+    def _parse_iso_datetime_safe(self, s):
+        return parse_iso_datetime(s)
+
+
+def last_month_bounds(today: datetime | None = None):
+    """(first instant of last calendar month, first instant of this month), UTC-naive."""
+    today = today or datetime.utcnow()
+    first_day_this_month = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    first_day_last_month = (first_day_this_month - timedelta(days=1)).replace(day=1)
+    return first_day_last_month, first_day_this_month
+
+
+def parse_iso_datetime(s):
+    """
+    Parse ISO datetime strings returned from Supabase.
+    Supabase may return '2025-09-22T10:30:00Z' or without 'Z'.
+    Return a timezone-naive UTC datetime on success, or None on failure.
+    """
+    if isinstance(s, datetime):
+        return s
+    if not isinstance(s, str):
+        return None
+    # remove trailing Z and fractional timezone if any, keep as UTC naive
+    try:
+        if s.endswith("Z"):
+            s = s[:-1]
+        # Some timestamps include +00:00 or other offsets -> remove offset for fromisoformat
+        # If there is a '+' or '-' for offset after the time portion, split it off
+        for sign in ("+", "-"):
+            # find sign after date portion
+            idx = s.find(sign, 10)  # offset signs appear after YYYY-MM-DDT...
+            if idx != -1:
+                s = s[:idx]
+                break
+        # fromisoformat can parse 'YYYY-MM-DDTHH:MM:SS' and 'YYYY-MM-DDTHH:MM:SS.ssssss'
+        return datetime.fromisoformat(s)
+    except Exception:
+        return None
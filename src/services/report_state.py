@@ -0,0 +1,249 @@
+import json
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+from src.dao.report_dao import ReportDAO
+from src.services.report_periods import GROUP_BYS, check_rollup, period_start
+from src.services.report_service import parse_iso_datetime
+from src.telemetry.tracing import instrument
+
+STATE_VERSION = 3
+ORDER_COLUMNS = "order_id,cust_id,order_date,status,total_amount"
+LOG_COLUMNS = "log_id,order_id,cancelled"
+UNKNOWN = "unknown"  # bucket for orders without a customer city / items without a category
+
+
+@instrument("service")
+class ReportState:
+    """
+    Incrementally maintained report aggregates, persisted as a JSON file.
+
+    Keeps per-customer order counts, per-product quantities and per-day
+    revenue (in total, by customer city and by product category) together
+    with an order_id/order_date high-water mark and a mark in the
+    order_status_log table (sql/report_state.sql), which records every
+    order entering or leaving CANCELLED. refresh() folds in the orders past
+    the first mark, then backs out (or back in) the orders logged past the
+    second, so an idle refresh costs two empty reads however many orders
+    were ever cancelled. Cancelled orders are not counted.
+    """
+
+    def __init__(self, path: str | None = None, settle_seconds: int = 5):
+        # Orders younger than settle_seconds may still be receiving items,
+        # so they are left for the next refresh.
+        self.path = path
+        self.settle_seconds = settle_seconds
+        self.last_order_id = 0
+        self.last_order_date: str | None = None
+        self.last_log_id = 0
+        self.customer_orders: Dict[int, int] = defaultdict(int)
+        self.product_quantities: Dict[int, int] = defaultdict(int)
+        self.daily_revenue: Dict[str, float] = defaultdict(float)
+        # day -> city / category -> revenue
+        self.daily_city_revenue: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.daily_category_revenue: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        # Lookups for the grouped buckets, kept for the life of the object
+        self._cities: Dict[int, str] = {}
+        self._categories: Dict[int, str] = {}
+        if path and os.path.exists(path):
+            self._load()
+
+    # ---------- Refresh ----------
+    def refresh(self, dao: ReportDAO) -> int:
+        """Apply the delta since the last refresh. Returns the number of orders applied."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.settle_seconds)
+        applied = 0
+        batch = []
+        for order in dao.iter_orders(ORDER_COLUMNS, after_id=self.last_order_id):
+            order_date = parse_iso_datetime(order.get("order_date"))
+            if order_date and order_date > cutoff:
+                break
+            batch.append(order)
+            if len(batch) >= dao.page_size:
+                applied += self._fold(dao, batch)
+                batch = []
+        if batch:
+            applied += self._fold(dao, batch)
+        applied += self._apply_status_log(dao, cutoff)
+        if applied:
+            self.save()
+        return applied
+
+    def load_window(self, dao: ReportDAO, start: date, end: date, group_by: str | None = None) -> int:
+        """
+        Fold only the orders dated start <= day < end, for a one-off state
+        used to answer one revenue_rollup(..., group_by) without a persisted
+        one. Only the lookups that grouping needs are read (none for plain
+        totals), so the other buckets of this state stay incomplete.
+        """
+        groups = (group_by,) if group_by else ()
+        applied = 0
+        batch = []
+        for order in dao.iter_orders(ORDER_COLUMNS, since=start.isoformat(), until=end.isoformat()):
+            if order.get("status") == "CANCELLED":
+                continue
+            batch.append(order)
+            if len(batch) >= dao.page_size:
+                applied += self._fold(dao, batch, groups)
+                batch = []
+        if batch:
+            applied += self._fold(dao, batch, groups)
+        return applied
+
+    def _fold(self, dao: ReportDAO, orders: List[Dict], groups: Tuple[str, ...] = GROUP_BYS) -> int:
+        # Every order is folded as live: the status log has an entry for each
+        # cancellation, which _apply_status_log backs out once folded.
+        # Items feed product quantities and category revenue; a full fold
+        # (every group) always reads them.
+        items = self._items_by_order(dao, [o["order_id"] for o in orders]) if "category" in groups else {}
+        self._fill_lookups(dao, orders, items, groups)
+        for order in orders:
+            self._apply(order, items.get(order["order_id"], []), sign=1)
+        self.last_order_id = orders[-1]["order_id"]
+        self.last_order_date = orders[-1].get("order_date")
+        return len(orders)
+
+    def _apply_status_log(self, dao: ReportDAO, cutoff: datetime) -> int:
+        """
+        Back out orders logged as cancelled (and back in those logged as
+        restored) past last_log_id, in log order. Stops at the first entry
+        for an order not folded yet; the next refresh continues from there.
+        """
+        entries = []
+        for entry in dao.iter_status_log(LOG_COLUMNS, after_id=self.last_log_id, before=cutoff.isoformat()):
+            if entry["order_id"] > self.last_order_id:
+                break
+            entries.append(entry)
+        if not entries:
+            return 0
+        order_ids = list({e["order_id"] for e in entries})
+        orders = {o["order_id"]: o for o in dao.get_orders_by_ids(order_ids, ORDER_COLUMNS)}
+        items = self._items_by_order(dao, order_ids)
+        self._fill_lookups(dao, list(orders.values()), items)
+        for entry in entries:
+            order = orders.get(entry["order_id"])
+            if order is not None:
+                self._apply(order, items.get(order["order_id"], []), sign=-1 if entry["cancelled"] else 1)
+        self.last_log_id = entries[-1]["log_id"]
+        return len(entries)
+
+    def _items_by_order(self, dao: ReportDAO, order_ids: List[int]) -> Dict[int, List[Dict]]:
+        grouped = defaultdict(list)
+        for item in dao.get_items_for_orders(order_ids, "order_id,prod_id,quantity,price"):
+            grouped[item["order_id"]].append(item)
+        return grouped
+
+    def _fill_lookups(self, dao: ReportDAO, orders: List[Dict], items: Dict[int, List[Dict]], groups: Tuple[str, ...] = GROUP_BYS):
+        # Only ids not seen before cost a request, and only for the groupings wanted
+        cust_ids, prod_ids = set(), set()
+        if "city" in groups:
+            cust_ids = {o["cust_id"] for o in orders if o.get("cust_id") is not None} - self._cities.keys()
+        if "category" in groups:
+            prod_ids = {i["prod_id"] for rows in items.values() for i in rows if i.get("prod_id") is not None} - self._categories.keys()
+        if cust_ids:
+            found = dao.get_customer_cities(list(cust_ids))
+            self._cities.update({cid: found.get(cid) or UNKNOWN for cid in cust_ids})
+        if prod_ids:
+            found = dao.get_product_categories(list(prod_ids))
+            self._categories.update({pid: found.get(pid) or UNKNOWN for pid in prod_ids})
+
+    def _apply(self, order: Dict, items: List[Dict], sign: int):
+        cust_id = order.get("cust_id")
+        if cust_id is not None:
+            self.customer_orders[cust_id] += sign
+        for item in items:
+            if item.get("prod_id") is not None:
+                self.product_quantities[item["prod_id"]] += sign * int(item.get("quantity") or 0)
+        order_date = parse_iso_datetime(order.get("order_date"))
+        if order_date:
+            day = order_date.date().isoformat()
+            amount = sign * float(order.get("total_amount") or 0)
+            self.daily_revenue[day] += amount
+            self.daily_city_revenue[day][self._cities.get(cust_id, UNKNOWN)] += amount
+            # Category revenue is the sum of the item lines (price * quantity)
+            for item in items:
+                category = self._categories.get(item.get("prod_id"), UNKNOWN)
+                self.daily_category_revenue[day][category] += sign * float(item.get("price") or 0) * int(item.get("quantity") or 0)
+
+    # ---------- Queries ----------
+    def orders_per_customer(self) -> Dict[int, int]:
+        return {cid: n for cid, n in self.customer_orders.items() if n > 0}
+
+    def top_products(self, top_n: int) -> List[Tuple[int, int]]:
+        ranked = sorted(((pid, q) for pid, q in self.product_quantities.items() if q > 0), key=lambda x: (-x[1], x[0]))
+        return ranked[:top_n]
+
+    def revenue_between(self, start: date, end: date) -> float:
+        """Revenue for start <= day < end."""
+        start_key, end_key = start.isoformat(), end.isoformat()
+        total = sum(v for day, v in self.daily_revenue.items() if start_key <= day < end_key)
+        return round(total, 2)
+
+    def revenue_rollup(self, start: date, end: date, granularity: str = "day", group_by: str | None = None) -> List[Dict]:
+        """
+        Revenue for start <= day < end per day, ISO week (keyed by its Monday)
+        or month (keyed by its 1st), optionally split by customer city or
+        product category. Walks the daily buckets, so it costs O(days).
+        Ungrouped results include periods without revenue.
+        """
+        check_rollup(granularity, group_by)
+        buckets = {"city": self.daily_city_revenue, "category": self.daily_category_revenue}.get(group_by)
+
+        totals: Dict[Tuple[str, str | None], float] = defaultdict(float)
+        day = start
+        while day < end:
+            key = day.isoformat()
+            period = period_start(day, granularity).isoformat()
+            if buckets is None:
+                totals[(period, None)] += self.daily_revenue.get(key, 0.0)
+            else:
+                for group, amount in buckets.get(key, {}).items():
+                    totals[(period, group)] += amount
+            day += timedelta(days=1)
+
+        rows = []
+        for (period, group), amount in totals.items():
+            amount = round(amount, 2)
+            if group_by is None:
+                rows.append({"period": period, "revenue": amount})
+            elif amount:
+                rows.append({"period": period, group_by: group, "revenue": amount})
+        rows.sort(key=lambda r: (r["period"], -r["revenue"]))
+        return rows
+
+    # ---------- Persistence ----------
+    def save(self):
+        if not self.path:
+            return
+        payload = {
+            "version": STATE_VERSION,
+            "last_order_id": self.last_order_id,
+            "last_order_date": self.last_order_date,
+            "last_log_id": self.last_log_id,
+            "customer_orders": self.customer_orders,
+            "product_quantities": self.product_quantities,
+            "daily_revenue": self.daily_revenue,
+            "daily_city_revenue": self.daily_city_revenue,
+            "daily_category_revenue": self.daily_category_revenue,
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp, self.path)
+
+    def _load(self):
+        with open(self.path) as f:
+            payload = json.load(f)
+        if payload.get("version") != STATE_VERSION:
+            return
+        self.last_order_id = payload["last_order_id"]
+        self.last_order_date = payload["last_order_date"]
+        self.last_log_id = payload["last_log_id"]
+        self.customer_orders.update({int(k): v for k, v in payload["customer_orders"].items()})
+        self.product_quantities.update({int(k): v for k, v in payload["product_quantities"].items()})
+        self.daily_revenue.update(payload["daily_revenue"])
+        for day, groups in payload["daily_city_revenue"].items():
+            self.daily_city_revenue[day].update(groups)
+        for day, groups in payload["daily_category_revenue"].items():
+            self.daily_category_revenue[day].update(groups)
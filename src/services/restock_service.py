@@ -0,0 +1,91 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+from src.config import RESTOCK_WINDOW_DAYS, RESTOCK_LEAD_TIME_DAYS, RESTOCK_COVER_DAYS
+from src.dao.product_dao import ProductDAO
+from src.dao.report_dao import ReportDAO
+from src.telemetry.tracing import instrument
+
+PRODUCT_COLUMNS = "prod_id,name,sku,category,stock"
+
+class RestockError(Exception):
+    pass
+
+@instrument("service")
+class RestockService:
+    """
+    Low-stock listing and restock recommendations. Products are streamed in
+    prod_id pages, so both scale with the catalog; sales velocity comes from
+    the product_sales_since database function (sql/restock.sql) or, without
+    it, from the order items of the window.
+    """
+
+    def __init__(self, product_dao: Optional[ProductDAO] = None, report_dao: Optional[ReportDAO] = None):
+        self.product_dao = product_dao or ProductDAO()
+        self.report_dao = report_dao or ReportDAO()
+
+    # READ
+    def low_stock(self, threshold: int = 5, category: str | None = None) -> Iterator[Dict]:
+        if threshold < 0:
+            raise RestockError("Threshold cannot be negative")
+        return self.product_dao.iter_low_stock(threshold, category, PRODUCT_COLUMNS)
+
+    def sales_velocity(self, window_days: int = RESTOCK_WINDOW_DAYS) -> Dict[int, float]:
+        """prod_id -> average units sold per day over the last `window_days` (cancelled orders excluded)."""
+        if window_days <= 0:
+            raise RestockError("window_days must be greater than 0")
+        # UTC, like the other report windows, whatever the local time zone
+        since = (datetime.now(timezone.utc) - timedelta(days=window_days)).isoformat()
+        sold = self.report_dao.product_sales_since(since)
+        if sold is not None:
+            totals = {r["prod_id"]: r["quantity"] or 0 for r in sold}
+        else:
+            totals = self._sales_since(since)
+        return {prod_id: qty / window_days for prod_id, qty in totals.items()}
+
+    def _sales_since(self, since: str, batch: int = 1000) -> Dict[int, int]:
+        # Orders of the window streamed by key, their items fetched `batch` orders at a time
+        totals = defaultdict(int)
+        orders = (o["order_id"] for o in self.report_dao.iter_orders("order_id,status", since=since) if o.get("status") != "CANCELLED")
+        while True:
+            order_ids = list(islice(orders, batch))
+            if not order_ids:
+                return dict(totals)
+            for item in self.report_dao.get_items_for_orders(order_ids, "order_id,prod_id,quantity"):
+                totals[item["prod_id"]] += item.get("quantity") or 0
+
+    def restock_plan(
+        self,
+        window_days: int = RESTOCK_WINDOW_DAYS,
+        lead_time_days: int = RESTOCK_LEAD_TIME_DAYS,
+        cover_days: int = RESTOCK_COVER_DAYS,
+        category: str | None = None
+    ) -> List[Dict]:
+        """
+        Products that will not last through the lead time plus `cover_days`
+        at their current velocity, most urgent (fewest days of cover) first.
+        Each row has velocity (units/day), days_of_cover and suggested_qty,
+        the units needed to hold lead_time_days + cover_days of sales.
+        `category` limits the plan to that category's products.
+        """
+        if lead_time_days < 0 or cover_days < 0:
+            raise RestockError("lead_time_days and cover_days cannot be negative")
+        velocity = self.sales_velocity(window_days)
+        horizon = lead_time_days + cover_days
+        plan = []
+        for p in self.product_dao.iter_products(columns=PRODUCT_COLUMNS, category=category):
+            rate = velocity.get(p["prod_id"], 0.0)
+            stock = p.get("stock") or 0
+            suggested = math.ceil(round(rate * horizon, 6)) - stock
+            if rate <= 0 or suggested <= 0:
+                continue
+            plan.append({
+                **p,
+                "velocity": round(rate, 3),
+                "days_of_cover": round(max(stock, 0) / rate, 1),
+                "suggested_qty": suggested,
+            })
+        plan.sort(key=lambda r: (r["days_of_cover"], -r["velocity"], r["prod_id"]))
+        return plan
@@ -0,0 +1,188 @@
+"""
+Exporters receive each finished trace (the root Span with its children).
+
+    SummaryExporter     in-process per-operation totals (used by --profile)
+    LogExporter         one log line per span, indented by depth
+    PrometheusExporter  counters in the Prometheus text format, for the
+                        node_exporter textfile collector
+    OTLPJsonExporter    OTLP/JSON lines, readable by the OpenTelemetry
+                        collector's otlpjsonfile receiver
+
+from_spec() builds them from the TRACE_EXPORTERS setting, e.g.
+"log,prometheus=/var/lib/node_exporter/retail.prom,otlp=traces.jsonl".
+"""
+import json
+import logging
+from abc import ABC, abstractmethod
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+from src.telemetry.tracing import Span
+
+logger = logging.getLogger("retail.trace")
+
+
+class Exporter(ABC):
+    @abstractmethod
+    def export(self, root: Span):
+        ...
+
+    def flush(self):
+        pass
+
+
+@dataclass
+class OperationStats:
+    layer: str
+    calls: int = 0
+    errors: int = 0
+    total_ns: int = 0
+    self_ns: int = 0
+    max_ns: int = 0
+
+
+class SummaryExporter(Exporter):
+    """Aggregates calls, total/self time and errors per operation name."""
+
+    def __init__(self):
+        self.stats: Dict[str, OperationStats] = {}
+        self._lock = threading.Lock()
+
+    def export(self, root: Span):
+        with self._lock:
+            for _, span in root.walk():
+                stats = self.stats.get(span.name)
+                if stats is None:
+                    stats = self.stats[span.name] = OperationStats(span.layer)
+                stats.calls += 1
+                stats.errors += span.error is not None
+                stats.total_ns += span.duration_ns
+                stats.self_ns += span.self_ns
+                stats.max_ns = max(stats.max_ns, span.duration_ns)
+
+    def format(self) -> str:
+        """Table of operations, slowest total first."""
+        lines = [f"{'operation':<46} {'layer':<8} {'calls':>6} {'total ms':>10} {'self ms':>10} {'mean ms':>9} {'max ms':>9}"]
+        with self._lock:
+            ranked = sorted(self.stats.items(), key=lambda kv: kv[1].total_ns, reverse=True)
+        for name, s in ranked:
+            errors = f"  ({s.errors} failed)" if s.errors else ""
+            lines.append(
+                f"{name:<46} {s.layer:<8} {s.calls:>6} {s.total_ns / 1e6:>10.2f} {s.self_ns / 1e6:>10.2f} "
+                f"{s.total_ns / s.calls / 1e6:>9.3f} {s.max_ns / 1e6:>9.3f}{errors}"
+            )
+        return "\n".join(lines)
+
+
+class LogExporter(Exporter):
+    def __init__(self, log: logging.Logger = logger, level: int = logging.INFO):
+        self.log = log
+        self.level = level
+
+    def export(self, root: Span):
+        for depth, span in root.walk():
+            extra = "".join(f" {k}={v}" for k, v in span.attributes.items())
+            error = f" error={span.error}" if span.error else ""
+            self.log.log(
+                self.level, "trace=%s %s%s %.3fms%s%s",
+                span.trace_id[:8], "  " * depth, span.name, span.duration_ns / 1e6, error, extra,
+            )
+
+
+PROMETHEUS_METRICS = (
+    ("calls_total", "Calls per DAO/service operation.", lambda s: s.calls),
+    ("errors_total", "Failed calls per DAO/service operation.", lambda s: s.errors),
+    ("seconds_total", "Time spent per DAO/service operation.", lambda s: f"{s.total_ns / 1e9:.9f}"),
+)
+
+
+class PrometheusExporter(Exporter):
+    """
+    Keeps running totals and rewrites `path` (atomically) at most every
+    `interval` seconds and on flush().
+    """
+
+    def __init__(self, path: str, interval: float = 5.0, prefix: str = "retail_operation"):
+        self.path = path
+        self.interval = interval
+        self.prefix = prefix
+        self._summary = SummaryExporter()
+        self._written = 0.0
+
+    def export(self, root: Span):
+        self._summary.export(root)
+        if time.monotonic() - self._written >= self.interval:
+            self.flush()
+
+    def flush(self):
+        with self._summary._lock:
+            stats = list(self._summary.stats.items())
+        lines = []
+        for suffix, help_text, value in PROMETHEUS_METRICS:
+            name = f"{self.prefix}_{suffix}"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for operation, s in stats:
+                lines.append(f'{name}{{layer="{s.layer}",operation="{operation}"}} {value(s)}')
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.path)
+        self._written = time.monotonic()
+
+
+class OTLPJsonExporter(Exporter):
+    """Appends one OTLP/JSON ExportTraceServiceRequest per trace to `path`."""
+
+    def __init__(self, path: str, service_name: str = "retail-inventory"):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def _otlp_span(self, span: Span) -> Dict:
+        # start_ns is wall clock; duration is measured with the monotonic clock
+        otlp = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.start_ns + span.duration_ns),
+            "attributes": [{"key": "retail.layer", "value": {"stringValue": span.layer}}]
+            + [{"key": k, "value": {"stringValue": str(v)}} for k, v in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            otlp["parentSpanId"] = span.parent_id
+        return otlp
+
+    def export(self, root: Span):
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{
+                    "scope": {"name": "src.telemetry"},
+                    "spans": [self._otlp_span(span) for _, span in root.walk()],
+                }],
+            }]
+        }
+        line = json.dumps(request, separators=(",", ":"))
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def from_spec(spec: str | None) -> List[Exporter]:
+    """Build exporters from a comma-separated spec: log, prometheus=<path>, otlp=<path>."""
+    exporters = []
+    for part in filter(None, (p.strip() for p in (spec or "").split(","))):
+        kind, _, arg = part.partition("=")
+        if kind == "log":
+            exporters.append(LogExporter())
+        elif kind == "prometheus" and arg:
+            exporters.append(PrometheusExporter(arg))
+        elif kind == "otlp" and arg:
+            exporters.append(OTLPJsonExporter(arg))
+        else:
+            raise ValueError(f"Unknown trace exporter '{part}'")
+    return exporters
@@ -0,0 +1,225 @@
+"""
+Per-operation tracing for the DAO and service layers.
+
+Classes opt in with the @instrument(layer) decorator, which only records
+them. Nothing is wrapped until enable() is called: it replaces each public
+method of the registered classes with a timing wrapper, and disable() puts
+the originals back, so tracing costs nothing while it is off.
+
+Every call made while tracing is on becomes a Span nested under the call
+that made it (tracked per thread / asyncio task with a ContextVar). When a
+top-level span finishes, the whole tree is handed to each exporter (see
+src/telemetry/exporters.py).
+"""
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_registry: Dict[type, str] = {}  # class -> layer
+_originals: Dict[Tuple[type, str], object] = {}
+_exporters: List = []
+_current: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_lock = threading.Lock()
+
+
+class Span:
+    # A plain class rather than a dataclass: every service module imports
+    # this one, and dataclasses (with inspect) is slow to import at CLI startup
+    __slots__ = ("name", "layer", "trace_id", "span_id", "parent_id", "start_ns", "duration_ns", "error", "attributes", "children")
+
+    def __init__(
+        self,
+        name: str,
+        layer: str,
+        trace_id: str,
+        span_id: str,
+        parent_id: str | None = None,
+        start_ns: int = 0,  # wall clock, for exporters
+        duration_ns: int = 0,
+        error: str | None = None,
+        attributes: Dict | None = None,
+        children: List["Span"] | None = None
+    ):
+        self.name = name
+        self.layer = layer
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start_ns = start_ns
+        self.duration_ns = duration_ns
+        self.error = error
+        self.attributes = attributes if attributes is not None else {}
+        self.children = children if children is not None else []
+
+    def __repr__(self) -> str:
+        return f"Span({self.name!r}, layer={self.layer!r}, duration_ns={self.duration_ns}, children={len(self.children)})"
+
+    @property
+    def self_ns(self) -> int:
+        """Time not spent in child spans."""
+        return max(0, self.duration_ns - sum(c.duration_ns for c in self.children))
+
+    def walk(self, depth: int = 0) -> Iterator[Tuple[int, "Span"]]:
+        """Yield (depth, span) for this span and its descendants, depth first."""
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+def _open(name: str, layer: str, attributes: Dict | None = None) -> Span:
+    parent = _current.get()
+    span = Span(
+        name=name,
+        layer=layer,
+        trace_id=parent.trace_id if parent else _new_id(16),
+        span_id=_new_id(8),
+        parent_id=parent.span_id if parent else None,
+        start_ns=time.time_ns(),
+        attributes=dict(attributes or {}),
+    )
+    if parent is not None:
+        parent.children.append(span)
+    return span
+
+
+def _finish(span: Span):
+    if span.parent_id is None:
+        for exporter in list(_exporters):
+            exporter.export(span)
+
+
+@contextmanager
+def _activate(span: Span):
+    token = _current.set(span)
+    start = time.perf_counter_ns()
+    try:
+        yield span
+    except BaseException as e:
+        span.error = type(e).__name__
+        raise
+    finally:
+        span.duration_ns += time.perf_counter_ns() - start
+        _current.reset(token)
+
+
+def span(name: str, layer: str = "app", **attributes):
+    """Context manager for a manual span (e.g. one CLI command); a no-op while tracing is off."""
+    if not _exporters:
+        return nullcontext()
+    return _span(name, layer, attributes)
+
+
+@contextmanager
+def _span(name: str, layer: str, attributes: Dict):
+    s = _open(name, layer, attributes)
+    try:
+        with _activate(s):
+            yield s
+    finally:
+        _finish(s)
+
+
+# ---------- Method wrapping ----------
+def _traced_rows(s: Span, it) -> Iterator:
+    # Streaming readers: the span stays open until the rows run out and
+    # covers the time spent producing them, not the caller's time between them.
+    rows = 0
+    try:
+        while True:
+            with _activate(s):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            rows += 1
+            yield item
+    finally:
+        s.attributes["rows"] = rows
+        _finish(s)
+
+
+def _wrap(name: str, layer: str, fn):
+    import inspect  # only needed once tracing is enabled; slow to import at CLI startup
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def traced_iter(*args, **kwargs):
+            s = _open(name, layer)
+            with _activate(s):
+                it = fn(*args, **kwargs)
+            return _traced_rows(s, it)
+        return traced_iter
+
+    @functools.wraps(fn)
+    def traced(*args, **kwargs):
+        s = _open(name, layer)
+        streaming = False
+        try:
+            with _activate(s):
+                result = fn(*args, **kwargs)
+            if inspect.isgenerator(result):
+                streaming = True
+                return _traced_rows(s, result)
+            return result
+        finally:
+            if not streaming:
+                _finish(s)
+    return traced
+
+
+def _patch(cls: type, layer: str):
+    import inspect
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith("_") or not inspect.isfunction(value):
+            continue
+        _originals[(cls, attr)] = value
+        setattr(cls, attr, _wrap(f"{cls.__name__}.{attr}", layer, value))
+
+
+def _unpatch():
+    for (cls, attr), value in _originals.items():
+        setattr(cls, attr, value)
+    _originals.clear()
+
+
+def instrument(layer: str):
+    """Class decorator: register `cls` so its public methods are traced while tracing is on."""
+    def register(cls):
+        with _lock:
+            _registry[cls] = layer
+            if _exporters:
+                _patch(cls, layer)
+        return cls
+    return register
+
+
+# ---------- Switch ----------
+def enable(*exporters):
+    """Start tracing every registered class, sending finished traces to `exporters`."""
+    with _lock:
+        if _exporters:
+            _unpatch()
+        _exporters[:] = exporters
+        for cls, layer in _registry.items():
+            _patch(cls, layer)
+
+
+def disable():
+    """Stop tracing, restore the original methods and flush the exporters."""
+    with _lock:
+        _unpatch()
+        exporters = list(_exporters)
+        _exporters.clear()
+    for exporter in exporters:
+        exporter.flush()
+
+
+def is_enabled() -> bool:
+    return bool(_exporters)